@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк: отдельное соединение на каждый запрос против пула keep-alive сессий.
+
+Прогоняет process_repository обоих менеджеров против локального mock API
+и считает, сколько соединений (рукопожатий) было открыто и сколько это
+стоило по времени.
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+
+import requests
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'github-release-creator'))
+sys.path.insert(0, os.path.join(ROOT, 'gitlab-release-creator'))
+
+from create_releases_advanced import GitHubReleaseManager  # noqa: E402
+from create_releases_gitlab_advanced import GitLabReleaseManager  # noqa: E402
+from release_common.http_transport import HTTPTransport  # noqa: E402
+from mock_api import MockAPIState, start_mock_server  # noqa: E402
+
+
+class PerRequestTransport(HTTPTransport):
+    """Старое поведение: module-level requests.* и новое соединение на каждый вызов."""
+
+    def request(self, method, url, **kwargs):
+        return requests.request(method, url, **kwargs)
+
+
+def run_managers(server, transport, repos: int):
+    """Прогоняет GitHub и GitLab менеджеры по repos репозиториям каждый."""
+    github = GitHubReleaseManager('bench-token', transport)
+    github.base_url = server.url
+    gitlab = GitLabReleaseManager('bench-token', server.url, transport)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        for n in range(repos):
+            github.process_repository('bench', f'repo{n}')
+            gitlab.process_repository(f'bench/project{n}')
+
+
+def measure(name: str, transport, repos: int, handshake_delay: float):
+    server = start_mock_server(state=MockAPIState(), handshake_delay=handshake_delay)
+    try:
+        started = time.perf_counter()
+        run_managers(server, transport, repos)
+        elapsed = time.perf_counter() - started
+        state = server.state
+        print(f'{name:<14} {elapsed:>9.2f} {state.requests:>9} {state.connections:>11} '
+              f'{2 * repos / elapsed:>10.1f}')
+        return elapsed
+    finally:
+        transport.close()
+        server.shutdown()
+        server.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Бенчмарк пула HTTP соединений')
+    parser.add_argument('--repos', type=int, default=50,
+                        help='Репозиториев на каждую платформу (по умолчанию: 50)')
+    parser.add_argument('--handshake-ms', type=float, default=30.0,
+                        help='Имитируемая стоимость TCP+TLS рукопожатия, мс (по умолчанию: 30)')
+    args = parser.parse_args()
+
+    delay = args.handshake_ms / 1000
+    print(f'🧪 {args.repos} GitHub + {args.repos} GitLab репозиториев, '
+          f'рукопожатие {args.handshake_ms:.0f} мс\n')
+    print(f'{"transport":<14} {"time, s":>9} {"requests":>9} {"connections":>11} {"repos/s":>10}')
+    baseline = measure('per-request', PerRequestTransport(), args.repos, delay)
+    pooled = measure('pooled', HTTPTransport(), args.repos, delay)
+    print(f'\n⚡ Ускорение: x{baseline / pooled:.1f}')
+
+
+if __name__ == '__main__':
+    main()
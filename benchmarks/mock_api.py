@@ -0,0 +1,630 @@
+#!/usr/bin/env python3
+"""
+Локальный mock-сервер GitHub/GitLab API для бенчмарков.
+
+Реализует только те эндпоинты, которыми пользуются менеджеры релизов:
+теги, проверку/создание релизов, compare, поиск проекта GitLab и
+упрощенный GitHub GraphQL (aliased repository { refs / release }).
+Каждый репозиторий создается "на лету" при первом обращении.
+"""
+
+import argparse
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Set, Tuple
+from urllib.parse import parse_qs, unquote, urlsplit
+
+
+class MockAPIState:
+    def __init__(self, tags_per_repo: int = 5, commits_per_range: int = 3,
+                 graphql_max_batch: int = 100, projects_per_group: int = 250,
+                 rate_limit: int = 0, rate_window: float = 60.0,
+                 error_rate: float = 0.0, lost_post_rate: float = 0.0,
+                 latency: float = 0.0, latency_jitter: float = 0.0, diff_kb: int = 0):
+        """
+        Состояние mock API.
+
+        Args:
+            tags_per_repo: Сколько тегов отдавать для каждого репозитория
+            commits_per_range: Сколько коммитов между соседними тегами
+            graphql_max_batch: Больше алиасов в GraphQL запросе - ошибка лимитов
+            projects_per_group: Сколько репозиториев в организации GitHub и проектов
+                в группе GitLab (каждый десятый архивный, у четных тема service)
+            rate_limit: Запросов на окно rate limit (0 - без ограничения)
+            rate_window: Длина окна rate limit в секундах
+            error_rate: Доля запросов, на которые отвечать 503
+            lost_post_rate: Доля созданных релизов, ответ на которые "теряется" (504)
+            latency: Задержка ответа на каждый запрос в секундах
+            latency_jitter: Случайная добавка к задержке, от 0 до этого значения
+            diff_kb: Размер диффов в ответах compare, КБ (как у больших релизов)
+        """
+        self.tags_per_repo = tags_per_repo
+        self.commits_per_range = commits_per_range
+        self.graphql_max_batch = graphql_max_batch
+        self.projects_per_group = projects_per_group
+        self.rate_limit = rate_limit
+        self.rate_window = rate_window
+        self.rate_used = 0
+        self.rate_reset_at = time.time() + rate_window
+        self.rate_limited = 0
+        self.error_rate = error_rate
+        self.lost_post_rate = lost_post_rate
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.diff_kb = diff_kb
+        self._diff_files: Optional[List[Dict]] = None
+        # Репозиторий -> [начало первого запроса, конец последнего]
+        self.repo_spans: Dict[str, List[float]] = {}
+        self.releases: Set[Tuple[str, str]] = set()
+        self.project_ids: Dict[str, int] = {}
+        self.project_paths: Dict[int, str] = {}
+        self.connections = 0
+        self.requests = 0
+        self.not_modified = 0
+        self._lock = threading.Lock()
+
+    def count_connection(self):
+        with self._lock:
+            self.connections += 1
+
+    def count_request(self):
+        with self._lock:
+            self.requests += 1
+
+    def take_rate_budget(self) -> Tuple[bool, int, int]:
+        """Списывает запрос из окна rate limit: (разрешен ли, остаток, время сброса)."""
+        with self._lock:
+            now = time.time()
+            if now >= self.rate_reset_at:
+                self.rate_used = 0
+                self.rate_reset_at = now + self.rate_window
+            allowed = self.rate_used < self.rate_limit
+            if allowed:
+                self.rate_used += 1
+            else:
+                self.rate_limited += 1
+            return allowed, self.rate_limit - self.rate_used, int(self.rate_reset_at + 0.999)
+
+    def track(self, repo: str, started: float, finished: float):
+        """Учитывает запрос репозитория для расчета времени его обработки."""
+        with self._lock:
+            span = self.repo_spans.setdefault(repo, [started, finished])
+            span[0] = min(span[0], started)
+            span[1] = max(span[1], finished)
+
+    def repo_latencies(self) -> List[float]:
+        """Время от первого до последнего запроса каждого репозитория, с."""
+        with self._lock:
+            return [finished - started for started, finished in self.repo_spans.values()]
+
+    def response_delay(self) -> float:
+        return self.latency + (random.uniform(0, self.latency_jitter) if self.latency_jitter else 0.0)
+
+    def diff_files(self) -> List[Dict]:
+        """Файлы с патчами общим размером diff_kb (строятся один раз)."""
+        if self._diff_files is None:
+            files, remaining = [], self.diff_kb * 1024
+            while remaining > 0:
+                size = min(remaining, 64 * 1024)
+                files.append({'filename': f'src/file{len(files)}.py',
+                              'patch': '+' + 'x' * (size - 1)})
+                remaining -= size
+            self._diff_files = files
+        return self._diff_files
+
+    def count_not_modified(self):
+        with self._lock:
+            self.not_modified += 1
+
+    def reset_counters(self):
+        with self._lock:
+            self.connections = 0
+            self.requests = 0
+            self.not_modified = 0
+            self.rate_limited = 0
+            self.repo_spans = {}
+
+    def project_id(self, path: str) -> int:
+        with self._lock:
+            if path not in self.project_ids:
+                project_id = len(self.project_ids) + 1
+                self.project_ids[path] = project_id
+                self.project_paths[project_id] = path
+            return self.project_ids[path]
+
+    def tag_names(self) -> List[str]:
+        """Теги от нового к старому (по версии и по дате коммита)."""
+        return [f'v1.0.{n}' for n in range(self.tags_per_repo - 1, -1, -1)]
+
+    def tag_date(self, name: str) -> str:
+        """Дата коммита тега: каждый следующий тег на час новее."""
+        number = int(name.rsplit('.', 1)[1])
+        return time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(1700000000 + number * 3600))
+
+    def release_notes(self, tag: str) -> str:
+        """Описание существующего релиза: строка на каждый коммит диапазона."""
+        lines = [f"## What's Changed in {tag}"]
+        lines += [f'- Change {n} ({n:07d}) by @dev' for n in range(self.commits_per_range)]
+        return '\n'.join(lines)
+
+    @staticmethod
+    def listed_repo(n: int) -> Dict:
+        """Архивность и темы n-го репозитория организации или проекта группы."""
+        return {'archived': n % 10 == 9, 'topics': ['service'] if n % 2 == 0 else ['library']}
+
+    def add_release(self, repo: str, tag: str) -> bool:
+        with self._lock:
+            if (repo, tag) in self.releases:
+                return False
+            self.releases.add((repo, tag))
+            return True
+
+
+class MockAPIHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Заголовки и тело пишутся отдельно: без TCP_NODELAY keep-alive
+    # соединения упираются в задержку Nagle + delayed ACK
+    disable_nagle_algorithm = True
+    server: 'MockAPIServer'
+    _rate_headers: Dict[str, str] = {}
+
+    def setup(self):
+        super().setup()
+        # Новое соединение: имитируем стоимость TCP+TLS рукопожатия
+        self.server.state.count_connection()
+        if self.server.handshake_delay:
+            time.sleep(self.server.handshake_delay)
+
+    def log_message(self, format, *args):
+        pass
+
+    # ---- утилиты ответа ----
+
+    def _send_json(self, status: int, payload, headers: Optional[Dict[str, str]] = None):
+        body = json.dumps(payload).encode('utf-8')
+        headers = {**self._rate_headers, **(headers or {})}
+        if self.command == 'GET' and status == 200:
+            # Как GitHub/GitLab: ETag по содержимому и 304 на If-None-Match
+            etag = f'"{hashlib.sha1(body).hexdigest()}"'
+            headers['ETag'] = etag
+            if self.headers.get('If-None-Match') == etag:
+                self.server.state.count_not_modified()
+                self.send_response(304)
+                self.send_header('ETag', etag)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        # На HEAD - те же заголовки (включая Content-Length), но без тела
+        if self.command != 'HEAD':
+            self.wfile.write(body)
+
+    def _page(self, query, items: List) -> Tuple[List, Optional[int]]:
+        """Страница списка по per_page/page и номер следующей страницы."""
+        per_page = min(int(query.get('per_page', 30)), 100)
+        page = int(query.get('page', 1))
+        start = (page - 1) * per_page
+        next_page = page + 1 if start + per_page < len(items) else None
+        return items[start:start + per_page], next_page
+
+    def _read_json(self) -> Dict:
+        length = int(self.headers.get('Content-Length') or 0)
+        raw = self.rfile.read(length) if length else b''
+        return json.loads(raw or b'{}')
+
+    def _check_rate_limit(self, path: str) -> bool:
+        """Заголовки лимита как у GitHub (X-RateLimit-*) или GitLab (RateLimit-*)."""
+        self._rate_headers = {}
+        state = self.server.state
+        if not state.rate_limit:
+            return True
+        allowed, remaining, reset_at = state.take_rate_budget()
+        prefix = 'RateLimit' if path.startswith('/api/v4/') else 'X-RateLimit'
+        self._rate_headers = {f'{prefix}-Limit': str(state.rate_limit),
+                              f'{prefix}-Remaining': str(remaining),
+                              f'{prefix}-Reset': str(reset_at)}
+        if not allowed:
+            # Тело отклоненного запроса нужно дочитать, иначе оно останется
+            # в keep-alive соединении и испортит следующий запрос
+            self._read_json()
+            if prefix == 'RateLimit':
+                self._send_json(429, {'message': 'Too Many Requests'},
+                                {'Retry-After': str(max(reset_at - int(time.time()), 1))})
+            else:
+                self._send_json(403, {'message': 'API rate limit exceeded'})
+        return allowed
+
+    def _repo_key(self, path: str) -> Optional[str]:
+        """Репозиторий или проект, к которому относится запрос (для статистики)."""
+        match = REPO_PATH.match(path)
+        if match:
+            return f'{match.group(1)}/{match.group(2)}'
+        match = PROJECT_PATH.match(path)
+        if match:
+            project = match.group(1)
+            if project.isdigit():
+                return self.server.state.project_paths.get(int(project), project)
+            return unquote(project)
+        return None
+
+    def _route(self, method: str):
+        started = time.monotonic()
+        state = self.server.state
+        state.count_request()
+        parts = urlsplit(self.path)
+        try:
+            delay = state.response_delay()
+            if delay:
+                time.sleep(delay)
+            self._dispatch(method, parts)
+        finally:
+            repo = self._repo_key(parts.path)
+            if repo is not None:
+                state.track(repo, started, time.monotonic())
+
+    def _dispatch(self, method: str, parts):
+        if not self._check_rate_limit(parts.path):
+            return
+        if random.random() < self.server.state.error_rate:
+            self._read_json()
+            self._send_json(503, {'message': 'Service Unavailable'})
+            return
+        query = {k: v[-1] for k, v in parse_qs(parts.query).items()}
+        for route_method, pattern, handler in ROUTES:
+            if route_method != ('GET' if method == 'HEAD' else method):
+                continue
+            match = pattern.fullmatch(parts.path)
+            if match:
+                return handler(self, query, *match.groups())
+        self._send_json(404, {'message': 'Not Found'})
+
+    def do_GET(self):
+        self._route('GET')
+
+    def do_HEAD(self):
+        self._route('HEAD')
+
+    def do_POST(self):
+        self._route('POST')
+
+    def do_PATCH(self):
+        self._route('PATCH')
+
+    def do_PUT(self):
+        self._route('PUT')
+
+    # ---- GitHub ----
+
+    def github_tags(self, query, owner, repo):
+        # Как GitHub: порядок строковый, а не по версии (v1.0.9 выше v1.0.10)
+        names = sorted(self.server.state.tag_names(), reverse=True)
+        page, next_page = self._page(query, names)
+        tags = []
+        for name in page:
+            sha = f'{owner}-{repo}-{name}'.ljust(40, '0')[:40]
+            # Как GitHub: ссылки на архивы и коммит в каждом теге
+            tags.append({'name': name,
+                         'zipball_url': f'{self.server.url}/repos/{owner}/{repo}/zipball/refs/tags/{name}',
+                         'tarball_url': f'{self.server.url}/repos/{owner}/{repo}/tarball/refs/tags/{name}',
+                         'commit': {'sha': sha,
+                                    'url': f'{self.server.url}/repos/{owner}/{repo}/commits/{sha}'},
+                         'node_id': f'REF_{sha[:24]}'})
+        headers = {}
+        if next_page:
+            per_page = min(int(query.get('per_page', 30)), 100)
+            headers['Link'] = (f'<{self.server.url}/repos/{owner}/{repo}/tags'
+                               f'?per_page={per_page}&page={next_page}>; rel="next"')
+        self._send_json(200, tags, headers)
+
+    def github_org_repos(self, query, org):
+        state = self.server.state
+        page, next_page = self._page(query, list(range(state.projects_per_group)))
+        repos = [{'name': f'repo{n}', 'full_name': f'{org}/repo{n}', 'fork': False,
+                  **state.listed_repo(n)} for n in page]
+        headers = {}
+        if next_page:
+            per_page = min(int(query.get('per_page', 30)), 100)
+            headers['Link'] = (f'<{self.server.url}/orgs/{org}/repos'
+                               f'?per_page={per_page}&page={next_page}>; rel="next"')
+        self._send_json(200, repos, headers)
+
+    def github_release_by_tag(self, query, owner, repo, tag):
+        if (f'github:{owner}/{repo}', tag) in self.server.state.releases:
+            self._send_json(200, {'tag_name': tag,
+                                  'html_url': f'https://github.com/{owner}/{repo}/releases/tag/{tag}',
+                                  'body': self.server.state.release_notes(tag),
+                                  'author': {'login': 'dev', 'type': 'User'}, 'assets': []})
+        else:
+            self._send_json(404, {'message': 'Not Found'})
+
+    def github_compare(self, query, owner, repo, base, head):
+        # Как GitHub: без per_page не больше 250 коммитов
+        numbers = list(range(self.server.state.commits_per_range))
+        headers = {}
+        if 'per_page' in query:
+            numbers, next_page = self._page(query, numbers)
+            if next_page:
+                headers['Link'] = (f'<{self.server.url}/repos/{owner}/{repo}/compare/{base}...{head}'
+                                   f'?per_page={query["per_page"]}&page={next_page}>; rel="next"')
+        else:
+            numbers = numbers[:250]
+        commits = [{'sha': f'{n:040d}',
+                    'html_url': f'https://github.com/{owner}/{repo}/commit/{n:040d}',
+                    'commit': {'message': f'Change {n}', 'author': {'name': 'dev'}}}
+                   for n in numbers]
+        # Как GitHub: файлы с патчами отдаются на первой странице
+        files = self.server.state.diff_files() if query.get('page', '1') == '1' else []
+        self._send_json(200, {'total_commits': self.server.state.commits_per_range,
+                              'commits': commits, 'files': files}, headers)
+
+    def github_create_release(self, query, owner, repo):
+        payload = self._read_json()
+        tag = payload.get('tag_name')
+        if not self.server.state.add_release(f'github:{owner}/{repo}', tag):
+            self._send_json(422, {'message': 'Validation Failed',
+                                  'errors': [{'resource': 'Release', 'code': 'already_exists',
+                                              'field': 'tag_name'}]})
+            return
+        if random.random() < self.server.state.lost_post_rate:
+            # Релиз создан, но ответ клиенту "потерялся"
+            self._send_json(504, {'message': 'Gateway Timeout'})
+            return
+        self._send_json(201, {'id': zlib.crc32(f'{owner}/{repo}@{tag}'.encode('utf-8')),
+                              'tag_name': tag,
+                              'html_url': f'https://github.com/{owner}/{repo}/releases/tag/{tag}'})
+
+    def github_update_release(self, query, owner, repo, release_id):
+        payload = self._read_json()
+        self._send_json(200, {'id': int(release_id), **payload})
+
+    def github_graphql(self, query):
+        payload = self._read_json()
+        text = payload.get('query', '')
+        variables = payload.get('variables') or {}
+        if 'compare(headRef:' in text:
+            self.github_graphql_compare(variables)
+            return
+        aliases = GRAPHQL_ALIAS.findall(text)
+        state = self.server.state
+        if len(aliases) > state.graphql_max_batch:
+            self._send_json(200, {'errors': [{'type': 'RESOURCE_LIMITS_EXCEEDED',
+                                              'message': 'Resource limits for this query exceeded.'}]})
+            return
+
+        first = GRAPHQL_FIRST.search(text)
+        refs_count = int(first.group(1)) if first else 2
+        data = {'rateLimit': {'cost': 1, 'remaining': 4999, 'resetAt': '2030-01-01T00:00:00Z'}}
+        for alias, owner_var, name_var, field, tag_var in aliases:
+            repo = f'{variables.get(owner_var)}/{variables.get(name_var)}'
+            if field == 'refs':
+                names = state.tag_names()
+                data[alias] = {'refs': {'nodes': [{'name': name} for name in names[:refs_count]],
+                                        'pageInfo': {'hasNextPage': len(names) > refs_count}}}
+            else:
+                tag = variables.get(tag_var)
+                exists = (f'github:{repo}', tag) in state.releases
+                data[alias] = {'release': {'id': f'R_{tag}'} if exists else None}
+        self._send_json(200, {'data': data})
+
+    def github_graphql_compare(self, variables):
+        start = int(variables.get('after') or 0)
+        total = self.server.state.commits_per_range
+        end = min(start + 100, total)
+        repo = f"{variables.get('owner')}/{variables.get('name')}"
+        nodes = [{'oid': f'{n:040d}', 'url': f'https://github.com/{repo}/commit/{n:040d}',
+                  'messageHeadline': f'Change {n}', 'author': {'name': 'dev'}}
+                 for n in range(start, end)]
+        commits = {'pageInfo': {'hasNextPage': end < total, 'endCursor': str(end)}, 'nodes': nodes}
+        self._send_json(200, {'data': {'repository': {'ref': {'compare': {'commits': commits}}}}})
+
+    # ---- GitLab ----
+
+    def gitlab_project(self, query, encoded_path):
+        path = unquote(encoded_path)
+        self._send_json(200, {'id': self.server.state.project_id(path),
+                              'path_with_namespace': path})
+
+    def gitlab_group_projects(self, query, encoded_group):
+        group = unquote(encoded_group)
+        state = self.server.state
+        numbers = list(range(state.projects_per_group))
+        # Фильтры, которые GitLab применяет на своей стороне
+        if query.get('archived') in ('true', 'false'):
+            archived = query['archived'] == 'true'
+            numbers = [n for n in numbers if state.listed_repo(n)['archived'] == archived]
+        if query.get('topic'):
+            topics = query['topic'].split(',')
+            numbers = [n for n in numbers
+                       if all(topic in state.listed_repo(n)['topics'] for topic in topics)]
+        page, next_page = self._page(query, numbers)
+        projects = [{'id': state.project_id(f'{group}/project{n}'),
+                     'path_with_namespace': f'{group}/project{n}', **state.listed_repo(n)}
+                    for n in page]
+        headers = {'X-Page': query.get('page', '1')}
+        if next_page:
+            headers['X-Next-Page'] = str(next_page)
+        self._send_json(200, projects, headers)
+
+    def gitlab_tags(self, query, project_id):
+        if int(project_id) not in self.server.state.project_paths:
+            self._send_json(404, {'message': '404 Project Not Found'})
+            return
+        state = self.server.state
+        names = state.tag_names()
+        if query.get('order_by', 'updated') == 'name':
+            names = sorted(names, reverse=True)
+        if query.get('sort', 'desc') == 'asc':
+            names = names[::-1]
+        page, next_page = self._page(query, names)
+        tags = []
+        for name in page:
+            sha = f'{project_id}-{name}'.ljust(40, '0')[:40]
+            # Как GitLab: коммит тега целиком, цель и признаки тега
+            tags.append({'name': name, 'message': '', 'target': sha,
+                         'commit': {'id': sha, 'short_id': sha[:8], 'created_at': state.tag_date(name),
+                                    'title': f'Release {name}', 'message': f'Release {name}\n',
+                                    'author_name': 'dev', 'author_email': 'dev@example.com',
+                                    'authored_date': state.tag_date(name), 'parent_ids': [sha]},
+                         'release': None, 'protected': False})
+        headers = {'X-Next-Page': str(next_page)} if next_page else {}
+        self._send_json(200, tags, headers)
+
+    def gitlab_release_by_tag(self, query, project_id, tag):
+        path = self.server.state.project_paths.get(int(project_id), project_id)
+        if (f'gitlab:{path}', unquote(tag)) in self.server.state.releases:
+            self._send_json(200, {'tag_name': unquote(tag),
+                                  'description': self.server.state.release_notes(unquote(tag)),
+                                  'author': {'username': 'dev'}, 'assets': {'count': 0}})
+        else:
+            self._send_json(404, {'message': '404 Not Found'})
+
+    def gitlab_compare(self, query, project_id):
+        commits = [{'id': f'{n:040d}', 'short_id': f'{n:08d}',
+                    'message': f'Change {n}', 'author_name': 'dev'}
+                   for n in range(self.server.state.commits_per_range)]
+        diffs = [{'new_path': f['filename'], 'diff': f['patch']}
+                 for f in self.server.state.diff_files()]
+        self._send_json(200, {'commits': commits, 'diffs': diffs})
+
+    def gitlab_commits(self, query, project_id):
+        # ref_name=prev..cur: новые коммиты первыми, как git log
+        numbers = list(range(self.server.state.commits_per_range - 1, -1, -1))
+        page, next_page = self._page(query, numbers)
+        commits = [{'id': f'{n:040d}', 'short_id': f'{n:08d}',
+                    'message': f'Change {n}', 'author_name': 'dev'}
+                   for n in page]
+        headers = {'X-Next-Page': str(next_page)} if next_page else {}
+        self._send_json(200, commits, headers)
+
+    def gitlab_create_release(self, query, project_id):
+        payload = self._read_json()
+        tag = payload.get('tag_name')
+        path = self.server.state.project_paths.get(int(project_id), project_id)
+        if not self.server.state.add_release(f'gitlab:{path}', tag):
+            self._send_json(409, {'message': 'Release already exists'})
+            return
+        if random.random() < self.server.state.lost_post_rate:
+            self._send_json(504, {'message': 'Gateway Timeout'})
+            return
+        self._send_json(201, {'tag_name': tag,
+                              '_links': {'self': f'https://gitlab.example/{path}/-/releases/{tag}'}})
+
+    def gitlab_update_release(self, query, project_id, tag):
+        payload = self._read_json()
+        self._send_json(200, {'tag_name': unquote(tag), **payload})
+
+
+GRAPHQL_ALIAS = re.compile(
+    r'(\w+): repository\(owner: \$(\w+), name: \$(\w+)\) \{ (refs|release)(?:\(tagName: \$(\w+)\))?')
+REPO_PATH = re.compile(r'/repos/([^/]+)/([^/]+)')
+PROJECT_PATH = re.compile(r'/api/v4/projects/([^/]+)')
+GRAPHQL_FIRST = re.compile(r'refs\(refPrefix: "refs/tags/", first: (\d+)')
+
+ROUTES = [
+    ('POST', re.compile(r'/graphql'), MockAPIHandler.github_graphql),
+    ('GET', re.compile(r'/orgs/([^/]+)/repos'), MockAPIHandler.github_org_repos),
+    ('GET', re.compile(r'/repos/([^/]+)/([^/]+)/tags'), MockAPIHandler.github_tags),
+    ('GET', re.compile(r'/repos/([^/]+)/([^/]+)/releases/tags/(.+)'), MockAPIHandler.github_release_by_tag),
+    ('GET', re.compile(r'/repos/([^/]+)/([^/]+)/compare/(.+)\.\.\.(.+)'), MockAPIHandler.github_compare),
+    ('POST', re.compile(r'/repos/([^/]+)/([^/]+)/releases'), MockAPIHandler.github_create_release),
+    ('PATCH', re.compile(r'/repos/([^/]+)/([^/]+)/releases/(\d+)'), MockAPIHandler.github_update_release),
+    ('GET', re.compile(r'/api/v4/projects/(\d+)/repository/tags'), MockAPIHandler.gitlab_tags),
+    ('GET', re.compile(r'/api/v4/projects/(\d+)/releases/(.+)'), MockAPIHandler.gitlab_release_by_tag),
+    ('GET', re.compile(r'/api/v4/projects/(\d+)/repository/compare'), MockAPIHandler.gitlab_compare),
+    ('GET', re.compile(r'/api/v4/projects/(\d+)/repository/commits'), MockAPIHandler.gitlab_commits),
+    ('POST', re.compile(r'/api/v4/projects/(\d+)/releases'), MockAPIHandler.gitlab_create_release),
+    ('PUT', re.compile(r'/api/v4/projects/(\d+)/releases/(.+)'), MockAPIHandler.gitlab_update_release),
+    ('GET', re.compile(r'/api/v4/projects/([^/]+)'), MockAPIHandler.gitlab_project),
+    ('GET', re.compile(r'/api/v4/groups/([^/]+)/projects'), MockAPIHandler.gitlab_group_projects),
+]
+
+
+class MockAPIServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # Сотни одновременных соединений от asyncio движка не должны упираться
+    # в очередь accept (по умолчанию 5) и ждать повторного SYN
+    request_queue_size = 1024
+
+    def __init__(self, address: Tuple[str, int], state: Optional[MockAPIState] = None,
+                 handshake_delay: float = 0.0):
+        """
+        Args:
+            address: (host, port); порт 0 - выбрать свободный
+            state: Состояние API (по умолчанию новое)
+            handshake_delay: Задержка на каждое новое соединение в секундах
+        """
+        super().__init__(address, MockAPIHandler)
+        self.state = state or MockAPIState()
+        self.handshake_delay = handshake_delay
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}'
+
+
+def start_mock_server(host: str = '127.0.0.1', port: int = 0, **kwargs) -> MockAPIServer:
+    """Запускает mock-сервер в фоновом потоке и возвращает его."""
+    server = MockAPIServer((host, port), **kwargs)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Mock GitHub/GitLab API для бенчмарков')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--handshake-ms', type=float, default=0.0,
+                        help='Имитация рукопожатия на новое соединение, мс')
+    parser.add_argument('--tags', type=int, default=5, help='Тегов на репозиторий')
+    parser.add_argument('--commits', type=int, default=3, help='Коммитов между соседними тегами')
+    parser.add_argument('--graphql-max-batch', type=int, default=100,
+                        help='Максимум репозиториев в одном GraphQL запросе')
+    parser.add_argument('--rate-limit', type=int, default=0,
+                        help='Запросов на окно rate limit (0 - без ограничения)')
+    parser.add_argument('--rate-window', type=float, default=60.0,
+                        help='Длина окна rate limit, с')
+    parser.add_argument('--error-rate', type=float, default=0.0,
+                        help='Доля запросов с ответом 503')
+    parser.add_argument('--lost-post-rate', type=float, default=0.0,
+                        help='Доля созданных релизов, ответ на которые теряется (504)')
+    parser.add_argument('--latency-ms', type=float, default=0.0,
+                        help='Задержка ответа на каждый запрос, мс')
+    parser.add_argument('--jitter-ms', type=float, default=0.0,
+                        help='Случайная добавка к задержке ответа, мс')
+    parser.add_argument('--diff-kb', type=int, default=0,
+                        help='Размер диффов в ответах compare, КБ')
+    parser.add_argument('--group-size', type=int, default=250,
+                        help='Репозиториев в организации GitHub и проектов в группе GitLab')
+    args = parser.parse_args()
+
+    state = MockAPIState(tags_per_repo=args.tags, commits_per_range=args.commits,
+                         graphql_max_batch=args.graphql_max_batch,
+                         projects_per_group=args.group_size,
+                         rate_limit=args.rate_limit, rate_window=args.rate_window,
+                         error_rate=args.error_rate, lost_post_rate=args.lost_post_rate,
+                         latency=args.latency_ms / 1000, latency_jitter=args.jitter_ms / 1000,
+                         diff_kb=args.diff_kb)
+    server = MockAPIServer((args.host, args.port), state,
+                           handshake_delay=args.handshake_ms / 1000)
+    print(f'🧪 Mock API слушает {server.url}')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
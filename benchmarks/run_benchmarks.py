@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк обоих CLI целиком против локального mock API.
+
+Для каждой платформы и каждого размера списка (по умолчанию 10, 100,
+1000 и 10000 репозиториев) поднимается свежий mock-сервер, CLI
+запускается отдельным процессом, как в CI, и считается:
+
+- repos/s - репозиториев в секунду за весь запуск;
+- req/repo - запросов к API на репозиторий (включая GraphQL и повторы);
+- p50/p99 - время от первого до последнего запроса репозитория, мс;
+- peak RSS - пиковая память процесса CLI, МБ.
+
+С --json результаты сохраняются в файл, с --baseline сравниваются с
+сохраненными ранее: если какая-то метрика ухудшилась больше чем на
+--max-regression, скрипт завершается с кодом 1.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+from mock_api import MockAPIState, start_mock_server
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CLIS = {
+    'github': os.path.join(ROOT, 'github-release-creator', 'create_releases_advanced.py'),
+    'gitlab': os.path.join(ROOT, 'gitlab-release-creator', 'create_releases_gitlab_advanced.py'),
+}
+DEFAULT_SIZES = [10, 100, 1000, 10000]
+
+# Метрика -> больше значит лучше (для сравнения с baseline)
+METRICS = {
+    'repos_per_sec': True,
+    'requests_per_repo': False,
+    'p50_ms': False,
+    'p99_ms': False,
+    'peak_rss_mb': False,
+}
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    """Перцентиль по ближайшему рангу (0 для пустого списка)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(fraction * len(ordered))) - 1))
+    return ordered[index]
+
+
+def cli_command(provider: str, url: str, repo_file: str, args) -> List[str]:
+    command = [sys.executable, CLIS[provider], '-f', repo_file, '-t', 'bench-token',
+               '-w', str(args.workers), '--engine', args.engine,
+               '--concurrency', str(args.concurrency)]
+    if provider == 'github':
+        command += ['--api-url', url, '--graphql-url', f'{url}/graphql']
+    else:
+        command += ['-u', url]
+    return command + args.cli_args
+
+
+def run_cli(command: List[str], env: Dict[str, str]):
+    """
+    Запускает CLI и ждет завершения.
+
+    Returns:
+        Кортеж (код возврата, пиковый RSS в МБ или None)
+    """
+    # Ошибки пишутся во временный файл, а не в канал: при переполнении
+    # канала CLI повис бы, пока мы ждем его завершения
+    with tempfile.TemporaryFile() as stderr:
+        proc = subprocess.Popen(command, env=env, stdin=subprocess.DEVNULL,
+                                stdout=subprocess.DEVNULL, stderr=stderr)
+        if hasattr(os, 'wait4'):
+            _, status, usage = os.wait4(proc.pid, 0)
+            returncode = os.waitstatus_to_exitcode(status)
+        else:
+            # Windows: пиковую память дочернего процесса так не узнать
+            returncode, usage = proc.wait(), None
+        if returncode:
+            stderr.seek(0)
+            print(stderr.read().decode('utf-8', 'replace')[-2000:], file=sys.stderr)
+    if usage is None:
+        return returncode, None
+    # Linux отдает ru_maxrss в КБ, macOS - в байтах
+    divisor = 1024 * 1024 if sys.platform == 'darwin' else 1024
+    return returncode, usage.ru_maxrss / divisor
+
+
+def run_one(provider: str, size: int, args) -> Dict:
+    state = MockAPIState(tags_per_repo=args.tags, commits_per_range=args.commits,
+                         rate_limit=args.rate_limit, rate_window=args.rate_window,
+                         error_rate=args.error_rate, latency=args.latency_ms / 1000,
+                         latency_jitter=args.jitter_ms / 1000, diff_kb=args.diff_kb)
+    server = start_mock_server(state=state)
+    prefix = 'repo' if provider == 'github' else 'project'
+    try:
+        with tempfile.TemporaryDirectory(prefix='release-bench-') as tmp:
+            repo_file = os.path.join(tmp, 'repos.txt')
+            with open(repo_file, 'w', encoding='utf-8') as f:
+                f.writelines(f'bench/{prefix}{n}\n' for n in range(size))
+            # Свой кэш на каждый запуск: ни HTTP кэш, ни журнал, ни
+            # состояние прошлых прогонов не должны влиять на результат
+            env = dict(os.environ, XDG_CACHE_HOME=tmp)
+
+            started = time.perf_counter()
+            returncode, rss = run_cli(cli_command(provider, server.url, repo_file, args), env)
+            elapsed = time.perf_counter() - started
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    latencies = state.repo_latencies()
+    return {
+        'provider': provider,
+        'repos': size,
+        'returncode': returncode,
+        'seconds': round(elapsed, 3),
+        'repos_per_sec': round(size / elapsed, 2),
+        'requests_per_repo': round(state.requests / size, 2),
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 1),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 1),
+        'peak_rss_mb': round(rss, 1) if rss is not None else None,
+    }
+
+
+def print_row(result: Dict):
+    rss = result['peak_rss_mb']
+    status = '✅' if result['returncode'] == 0 else f"❌ код {result['returncode']}"
+    print(f"{result['provider']:<8} {result['repos']:>7} {result['seconds']:>9.2f} "
+          f"{result['repos_per_sec']:>9.1f} {result['requests_per_repo']:>9.2f} "
+          f"{result['p50_ms']:>9.1f} {result['p99_ms']:>9.1f} "
+          f"{rss if rss is not None else '-':>9}  {status}", flush=True)
+
+
+def find_regressions(results: List[Dict], baseline: List[Dict], threshold: float) -> List[str]:
+    """Метрики, ухудшившиеся относительно baseline больше чем на threshold."""
+    previous = {(r['provider'], r['repos']): r for r in baseline}
+    regressions = []
+    for result in results:
+        old = previous.get((result['provider'], result['repos']))
+        if old is None:
+            continue
+        for metric, higher_is_better in METRICS.items():
+            before, after = old.get(metric), result.get(metric)
+            if not before or after is None:
+                continue
+            change = (before - after) / before if higher_is_better else (after - before) / before
+            if change > threshold:
+                regressions.append(f"{result['provider']} {result['repos']}: {metric} "
+                                   f"{before} -> {after} (хуже на {change:.0%})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Бенчмарк CLI GitHub/GitLab против локального mock API',
+        epilog='Аргументы после -- передаются обоим CLI как есть, например: -- --no-http-cache'
+    )
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES,
+                        help='Размеры списков репозиториев (по умолчанию: 10 100 1000 10000)')
+    parser.add_argument('--providers', nargs='+', choices=sorted(CLIS), default=['github', 'gitlab'])
+    parser.add_argument('-w', '--workers', type=int, default=16,
+                        help='--workers для CLI (по умолчанию: 16)')
+    parser.add_argument('--engine', choices=['threads', 'asyncio'], default='threads')
+    parser.add_argument('--concurrency', type=int, default=64,
+                        help='--concurrency для CLI с --engine asyncio (по умолчанию: 64)')
+    parser.add_argument('--latency-ms', type=float, default=5.0,
+                        help='Задержка ответа mock API, мс (по умолчанию: 5)')
+    parser.add_argument('--jitter-ms', type=float, default=5.0,
+                        help='Случайная добавка к задержке, мс (по умолчанию: 5)')
+    parser.add_argument('--diff-kb', type=int, default=0, help='Размер диффов в compare, КБ')
+    parser.add_argument('--tags', type=int, default=5, help='Тегов на репозиторий')
+    parser.add_argument('--commits', type=int, default=3, help='Коммитов между соседними тегами')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Доля ответов 503')
+    parser.add_argument('--rate-limit', type=int, default=0,
+                        help='Запросов на окно rate limit (0 - без ограничения)')
+    parser.add_argument('--rate-window', type=float, default=60.0, help='Длина окна rate limit, с')
+    parser.add_argument('--json', metavar='FILE', help='Сохранить результаты в JSON')
+    parser.add_argument('--baseline', metavar='FILE', help='Сравнить с результатами из JSON')
+    parser.add_argument('--max-regression', type=float, default=0.2,
+                        help='Допустимое ухудшение метрики относительно baseline (по умолчанию: 0.2)')
+    args, args.cli_args = parser.parse_known_args()
+    if args.cli_args and args.cli_args[0] == '--':
+        args.cli_args = args.cli_args[1:]
+
+    print(f'🧪 Mock API: задержка {args.latency_ms:.0f}±{args.jitter_ms:.0f} мс, '
+          f'ошибок {args.error_rate:.0%}, движок {args.engine}\n')
+    print(f'{"cli":<8} {"repos":>7} {"time, s":>9} {"repos/s":>9} {"req/repo":>9} '
+          f'{"p50, ms":>9} {"p99, ms":>9} {"RSS, MB":>9}')
+    results = []
+    for provider in args.providers:
+        for size in args.sizes:
+            result = run_one(provider, size, args)
+            print_row(result)
+            results.append(result)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f'\n💾 Результаты сохранены в {args.json}')
+
+    failed = any(r['returncode'] != 0 for r in results)
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = find_regressions(results, baseline, args.max_regression)
+        if regressions:
+            print(f'\n⚠️  Регрессии относительно {args.baseline}:')
+            for line in regressions:
+                print(f'   - {line}')
+            sys.exit(1)
+        print(f'\n✅ Регрессий относительно {args.baseline} нет')
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
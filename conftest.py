@@ -0,0 +1,52 @@
+"""
+Общие настройки тестов.
+
+Скрипты инструментов сами добавляют корень репозитория в sys.path; для
+тестов сюда же добавляются каталоги инструментов и benchmarks (mock API).
+"""
+
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+for path in ('benchmarks', 'gitlab-release-creator', 'github-release-creator'):
+    sys.path.insert(0, os.path.join(ROOT, path))
+sys.path.insert(0, ROOT)
+
+from mock_api import MockAPIState, start_mock_server  # noqa: E402
+from release_common.http_transport import HTTPTransport  # noqa: E402
+
+
+class RecordingTransport(HTTPTransport):
+    """Транспорт, который запоминает (метод, URL) каждого запроса."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.sent = []
+
+    def send(self, request):
+        self.sent.append((request.method, request.url))
+        return super().send(request)
+
+
+@pytest.fixture
+def mock_api():
+    """Mock API GitHub/GitLab на свободном порту."""
+    server = start_mock_server(state=MockAPIState())
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def transport():
+    with RecordingTransport() as transport:
+        yield transport
+
+
+@pytest.fixture(autouse=True)
+def isolated_cache(tmp_path, monkeypatch):
+    """Кэши, журналы и зеркала тестов - во временном каталоге, а не в ~/.cache."""
+    monkeypatch.setenv('XDG_CACHE_HOME', str(tmp_path / 'cache'))
@@ -24,6 +24,35 @@ class GitHubReleaseManager:
             'Accept': 'application/vnd.github.v3+json'
         }
         self.base_url = 'https://api.github.com'
+        
+        # Одна keep-alive сессия на все запросы к API
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        
+        # Списки тегов, уже скачанные за этот запуск: 'owner/repo' -> теги
+        self._tag_lists: Dict[str, List[Dict]] = {}
+    
+    def get_tags(self, owner: str, repo: str) -> List[Dict]:
+        """
+        Получает список тегов репозитория.
+        
+        Список скачивается один раз и запоминается, чтобы поиск последнего
+        и предыдущего тега не запрашивал его повторно.
+        
+        Args:
+            owner: Владелец репозитория
+            repo: Название репозитория
+            
+        Returns:
+            Список тегов
+        """
+        key = f'{owner}/{repo}'
+        if key not in self._tag_lists:
+            url = f'{self.base_url}/repos/{owner}/{repo}/tags'
+            response = self.session.get(url)
+            response.raise_for_status()
+            self._tag_lists[key] = response.json()
+        return self._tag_lists[key]
     
     def get_latest_tag(self, owner: str, repo: str) -> Optional[Dict]:
         """
@@ -36,13 +65,8 @@ class GitHubReleaseManager:
         Returns:
             Словарь с информацией о теге или None
         """
-        url = f'{self.base_url}/repos/{owner}/{repo}/tags'
-        
         try:
-            response = requests.get(url, headers=self.headers)
-            response.raise_for_status()
-            
-            tags = response.json()
+            tags = self.get_tags(owner, repo)
             if not tags:
                 print(f"⚠️  Нет тегов в репозитории {owner}/{repo}")
                 return None
@@ -71,7 +95,7 @@ class GitHubReleaseManager:
         url = f'{self.base_url}/repos/{owner}/{repo}/releases/tags/{tag_name}'
         
         try:
-            response = requests.get(url, headers=self.headers)
+            response = self.session.get(url)
             return response.status_code == 200
         except requests.exceptions.RequestException:
             return False
@@ -96,7 +120,7 @@ class GitHubReleaseManager:
         url = f'{self.base_url}/repos/{owner}/{repo}/compare/{previous_tag}...{current_tag}'
         
         try:
-            response = requests.get(url, headers=self.headers)
+            response = self.session.get(url)
             response.raise_for_status()
             data = response.json()
             return data.get('commits', [])
@@ -164,7 +188,7 @@ class GitHubReleaseManager:
         }
         
         try:
-            response = requests.post(url, headers=self.headers, json=payload)
+            response = self.session.post(url, json=payload)
             response.raise_for_status()
             
             release = response.json()
@@ -197,8 +221,10 @@ class GitHubReleaseManager:
         """
         print(f"\n📦 Обработка {owner}/{repo}...")
         
-        # Получаем последний тег
+        # Получаем последний тег; скачанный при этом список тегов забираем
+        # из кэша, он же нужен для поиска предыдущего тега
         latest_tag = self.get_latest_tag(owner, repo)
+        tags = self._tag_lists.pop(f'{owner}/{repo}', [])
         if not latest_tag:
             return False
         
@@ -207,13 +233,7 @@ class GitHubReleaseManager:
         # Генерируем описание релиза если нужно
         body = None
         if auto_notes:
-            # Получаем все теги для поиска предыдущего
-            url = f'{self.base_url}/repos/{owner}/{repo}/tags'
             try:
-                response = requests.get(url, headers=self.headers)
-                response.raise_for_status()
-                tags = response.json()
-                
                 previous_tag = tags[1]['name'] if len(tags) > 1 else None
                 commits = self.get_commits_since_previous_tag(owner, repo, tag_name, previous_tag)
                 body = self.generate_release_notes(commits, tag_name)
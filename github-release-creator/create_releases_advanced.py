@@ -6,75 +6,296 @@
 
 import os
 import sys
+import time
 import argparse
 import requests
-from typing import List, Dict, Optional, Tuple
+from typing import Callable, List, Dict, Optional, Tuple
+
+# Общий пакет release_common лежит в корне репозитория, рядом с каталогами инструментов
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from release_common.http_transport import HTTPTransport, HTTPRequest, Steps  # noqa: E402
+from release_common.parallel_runner import ItemStream  # noqa: E402
+from release_common.run_results import RepoResult, RepoStatus  # noqa: E402
+from github_graphql import (DEFAULT_BATCH_SIZE as DEFAULT_GRAPHQL_BATCH, DEFAULT_GRAPHQL_URL,  # noqa: E402
+                            COMMITS_PER_PAGE, GraphQLDiscovery, compare_commits_steps,
+                            graphql_url_for)
+from release_common.run_journal import RunJournal  # noqa: E402
+from release_common.state_store import StateStore  # noqa: E402
+from release_common.webhook_server import parse_github_event  # noqa: E402
+from release_common.tag_selection import (  # noqa: E402
+    DEFAULT_MAX_TAG_PAGES, TAGS_PER_PAGE, paginate_steps, release_tags_steps)
+from release_common.release_plan import PlanEntry  # noqa: E402
+from release_common.git_mirror import GitMirror, GitMirrorError  # noqa: E402
+from release_common.repo_discovery import REPOS_PER_PAGE, RepoFilter  # noqa: E402
+from release_common.records import CommitSummary, ReleaseResult, Tag  # noqa: E402
+from release_common.cli import ReleaseRun, fail  # noqa: E402
+
+
+DEFAULT_API_URL = 'https://api.github.com'
+
+
+def web_url_for(api_url: str) -> str:
+    """Адрес веб-интерфейса для URL REST API (github.com или хост GitHub Enterprise)."""
+    api_url = api_url.rstrip('/')
+    if api_url == DEFAULT_API_URL:
+        return 'https://github.com'
+    if api_url.endswith('/api/v3'):
+        return api_url[:-len('/api/v3')]
+    return api_url
 
 
 class GitHubReleaseManager:
-    def __init__(self, token: str):
+    def __init__(self, token: str, transport: Optional[HTTPTransport] = None,
+                 base_url: str = DEFAULT_API_URL, tag_order: str = 'semver',
+                 max_tag_pages: Optional[int] = DEFAULT_MAX_TAG_PAGES,
+                 graphql_url: Optional[str] = None,
+                 journal: Optional[RunJournal] = None,
+                 state: Optional[StateStore] = None,
+                 mirror: Optional[GitMirror] = None,
+                 minimal_payload: bool = False):
         """
         Инициализация менеджера релизов.
         
         Args:
             token: GitHub Personal Access Token с правами repo
+            transport: Общий HTTP транспорт (по умолчанию создается свой)
+            base_url: URL REST API (для GitHub Enterprise или mock сервера)
+            tag_order: Как выбирать последний тег: semver (по версии) или api (первый в списке)
+            max_tag_pages: Сколько страниц тегов просматривать при выборе по версии
+            graphql_url: GraphQL эндпоинт для списка коммитов между тегами
+                (по умолчанию - того же хоста, что и base_url; '' - только REST /compare)
+            journal: Журнал запуска: выбранные теги и заметки берутся из него
+                и записываются в него
+            state: Состояние прошлых запусков: если последний тег не изменился,
+                репозиторий дальше не обрабатывается (--changed-only)
+            mirror: Локальные git зеркала: теги и коммиты для заметок читаются
+                из них, а не через API (--git-mirror)
+            minimal_payload: Запрашивать как можно меньше данных: маленькие
+                страницы тегов, HEAD вместо GET там, где важен только статус
+                (--minimal-payload)
         """
         self.token = token
         self.headers = {
             'Authorization': f'token {token}',
             'Accept': 'application/vnd.github.v3+json'
         }
-        self.base_url = 'https://api.github.com'
+        self.base_url = base_url.rstrip('/')
+        self.http = transport or HTTPTransport()
+        self.tag_order = tag_order
+        self.max_tag_pages = max_tag_pages
+        # Токен уходит и на GraphQL эндпоинт: он должен быть на том же хосте, что и REST
+        self.graphql_url = graphql_url_for(self.base_url) if graphql_url is None else graphql_url
+        self.journal = journal
+        self.state = state
+        self.mirror = mirror
+        self.minimal_payload = minimal_payload
+        self.web_url = web_url_for(self.base_url)
+        
+        # Выбранные за запуск теги: 'owner/repo' -> [последний, предыдущий].
+        # По нему ищутся и последний, и предыдущий тег
+        self._tag_lists: Dict[str, List[Tag]] = {}
     
-    def get_latest_tag(self, owner: str, repo: str) -> Optional[Dict]:
-        """Получает последний тег из репозитория."""
+    # Каждый метод ниже - синхронная обертка над генератором *_steps.
+    # Генераторы описывают HTTP запросы и могут выполняться как
+    # HTTPTransport.drive, так и асинхронно через AsyncTransport.drive.
+    
+    def list_org_repositories_steps(self, org: str, on_repo: Callable[[Dict], None]) -> Steps:
+        """
+        Шаги обхода репозиториев организации.
+        
+        Репозитории каждой страницы сразу передаются в on_repo, не
+        дожидаясь следующих страниц.
+        """
+        url = f'{self.base_url}/orgs/{org}/repos'
+        
+        def on_page(page: List[Dict]) -> bool:
+            for repo in page:
+                on_repo(repo)
+            return True
+        
+        yield from paginate_steps(url, self.headers, {'type': 'all', 'per_page': REPOS_PER_PAGE},
+                                  on_page)
+    
+    def get_tags_steps(self, owner: str, repo: str) -> Steps:
+        """Шаги get_tags."""
         url = f'{self.base_url}/repos/{owner}/{repo}/tags'
+        tags: List[Tag] = []
+        yield from paginate_steps(url, self.headers, {'per_page': TAGS_PER_PAGE},
+                                  lambda page: tags.extend(map(Tag.from_api, page)) or True)
+        return tags
+    
+    def get_tags(self, owner: str, repo: str) -> List[Tag]:
+        """Получает полный список тегов (все страницы)."""
+        return self.http.drive(self.get_tags_steps(owner, repo))
+    
+    def get_release_tags_steps(self, owner: str, repo: str) -> Steps:
+        """Шаги get_release_tags."""
+        key = f'{owner}/{repo}'
+        if key not in self._tag_lists:
+            url = f'{self.base_url}/repos/{owner}/{repo}/tags'
+            # GitHub не гарантирует порядок /tags, поэтому по версии
+            # просматриваются все страницы (не больше max_tag_pages);
+            # с --tag-order api хватает первых двух тегов
+            tags, pages, truncated = yield from release_tags_steps(
+                url, self.headers, None, self.tag_order, max_pages=self.max_tag_pages,
+                minimal=self.minimal_payload)
+            if truncated:
+                print(f"⚠️  В {owner}/{repo} просмотрены только первые {pages} страниц тегов")
+            self._tag_lists[key] = tags
+        return self._tag_lists[key]
+    
+    def get_release_tags(self, owner: str, repo: str) -> List[Tag]:
+        """
+        Выбирает последний и предыдущий теги; хранятся до forget_tags().
+        
+        Теги читаются страницами, в памяти держатся только два лучших.
         
+        Returns:
+            Список из не более чем двух тегов, начиная с последнего
+        """
+        return self.http.drive(self.get_release_tags_steps(owner, repo))
+    
+    def forget_tags(self, owner: str, repo: str):
+        """Удаляет список тегов репозитория из кэша."""
+        self._tag_lists.pop(f'{owner}/{repo}', None)
+    
+    def seed_tags(self, owner: str, repo: str, tag_names: List[str]):
+        """Кладет в кэш уже известные теги (например, из GraphQL), чтобы не запрашивать /tags."""
+        self._tag_lists[f'{owner}/{repo}'] = [Tag(name) for name in tag_names]
+    
+    def seed_tags_from_mirror(self, owner: str, repo: str):
+        """Берет теги из git зеркала, если они еще не известны (из журнала или GraphQL)."""
+        key = f'{owner}/{repo}'
+        if self.mirror is None or key in self._tag_lists:
+            return
         try:
-            response = requests.get(url, headers=self.headers)
-            response.raise_for_status()
-            
-            tags = response.json()
+            self._tag_lists[key] = self.mirror.release_tags(key)
+        except GitMirrorError as e:
+            print(f"⚠️  Git зеркало {key} недоступно ({e}), теги читаются через API")
+    
+    def event_tags_steps(self, owner: str, repo: str, tag_name: str) -> Steps:
+        """
+        Шаги выбора тегов для события о новом теге: сам тег и предыдущий перед ним.
+        
+        Релиз создается для тега из события, даже если он младше последнего
+        (исправление v1.4.3 после v2.0.0); предыдущий тег ищется в зеркале
+        или через API среди тегов до него. Теги хранятся до forget_tags().
+        """
+        key = f'{owner}/{repo}'
+        previous = None
+        if self.mirror is not None:
+            try:
+                previous = self.mirror.release_tags(key, below=tag_name)
+            except GitMirrorError as e:
+                print(f"⚠️  Git зеркало {key} недоступно ({e}), теги читаются через API")
+        if previous is None:
+            url = f'{self.base_url}/repos/{owner}/{repo}/tags'
+            previous, _, _ = yield from release_tags_steps(
+                url, self.headers, None, self.tag_order, max_pages=self.max_tag_pages,
+                minimal=self.minimal_payload, below=tag_name)
+        self._tag_lists[key] = [Tag(tag_name)] + previous[:1]
+        return self._tag_lists[key]
+    
+    def get_latest_tag_steps(self, owner: str, repo: str) -> Steps:
+        """Шаги get_latest_tag."""
+        try:
+            tags = yield from self.get_release_tags_steps(owner, repo)
             if not tags:
                 print(f"⚠️  Нет тегов в репозитории {owner}/{repo}")
                 return None
             
             latest_tag = tags[0]
-            print(f"✓ Найден тег {latest_tag['name']} в {owner}/{repo}")
+            print(f"✓ Найден тег {latest_tag.name} в {owner}/{repo}")
             return latest_tag
             
         except requests.exceptions.RequestException as e:
             print(f"❌ Ошибка при получении тегов из {owner}/{repo}: {e}")
             return None
     
-    def check_release_exists(self, owner: str, repo: str, tag_name: str) -> bool:
-        """Проверяет, существует ли релиз для данного тега."""
+    def get_latest_tag(self, owner: str, repo: str) -> Optional[Tag]:
+        """Получает последний тег из репозитория."""
+        return self.http.drive(self.get_latest_tag_steps(owner, repo))
+    
+    def get_previous_tag_steps(self, owner: str, repo: str) -> Steps:
+        """Шаги get_previous_tag."""
+        tags = yield from self.get_release_tags_steps(owner, repo)
+        return tags[1].name if len(tags) > 1 else None
+    
+    def get_previous_tag(self, owner: str, repo: str) -> Optional[str]:
+        """Возвращает имя тега, предшествующего последнему, или None."""
+        return self.http.drive(self.get_previous_tag_steps(owner, repo))
+    
+    def check_release_exists_steps(self, owner: str, repo: str, tag_name: str) -> Steps:
+        """Шаги check_release_exists."""
         url = f'{self.base_url}/repos/{owner}/{repo}/releases/tags/{tag_name}'
+        # Важен только статус: HEAD обходится без тела релиза
+        method = 'HEAD' if self.minimal_payload else 'GET'
         
         try:
-            response = requests.get(url, headers=self.headers)
+            response = yield HTTPRequest(method, url, headers=self.headers)
             return response.status_code == 200
         except requests.exceptions.RequestException:
             return False
     
-    def get_commits_since_previous_tag(self, owner: str, repo: str, 
-                                       current_tag: str, previous_tag: Optional[str]) -> List[Dict]:
-        """Получает список коммитов между двумя тегами."""
+    def check_release_exists(self, owner: str, repo: str, tag_name: str) -> bool:
+        """Проверяет, существует ли релиз для данного тега."""
+        return self.http.drive(self.check_release_exists_steps(owner, repo, tag_name))
+    
+    def get_commits_since_previous_tag_steps(self, owner: str, repo: str,
+                                             current_tag: str,
+                                             previous_tag: Optional[str]) -> Steps:
+        """Шаги get_commits_since_previous_tag."""
         if not previous_tag:
             return []
         
+        if self.mirror is not None:
+            try:
+                commits = self.mirror.commits(f'{owner}/{repo}', previous_tag, current_tag)
+                return [self._mirror_commit(owner, repo, commit) for commit in commits]
+            except GitMirrorError as e:
+                print(f"⚠️  Git зеркало {owner}/{repo} недоступно ({e}), коммиты читаются через API")
+        
+        if self.graphql_url:
+            # Только поля коммитов, без патчей и без потолка в 250 коммитов
+            try:
+                return (yield from compare_commits_steps(
+                    self.graphql_url, {'Authorization': f'bearer {self.token}'},
+                    owner, repo, previous_tag, current_tag))
+            except requests.exceptions.RequestException as e:
+                print(f"⚠️  GraphQL compare недоступен ({e}), используется REST")
+        
+        # REST /compare отдает и патчи файлов; страницы по 100 коммитов
+        # позволяют получить больше 250 коммитов. От каждой страницы
+        # остаются только записи для заметок
         url = f'{self.base_url}/repos/{owner}/{repo}/compare/{previous_tag}...{current_tag}'
+        commits: List[CommitSummary] = []
+        
+        def add_page(data: Dict) -> bool:
+            page = data.get('commits', [])
+            commits.extend(CommitSummary.from_github(commit) for commit in page)
+            return len(page) == COMMITS_PER_PAGE
         
         try:
-            response = requests.get(url, headers=self.headers)
-            response.raise_for_status()
-            data = response.json()
-            return data.get('commits', [])
+            yield from paginate_steps(url, self.headers, {'per_page': COMMITS_PER_PAGE}, add_page)
+            return commits
         except requests.exceptions.RequestException as e:
             print(f"⚠️  Не удалось получить коммиты: {e}")
             return []
     
-    def generate_release_notes(self, commits: List[Dict], tag_name: str) -> str:
+    def _mirror_commit(self, owner: str, repo: str, commit: Dict) -> CommitSummary:
+        """Коммит из git зеркала в том же виде, что и из /compare."""
+        return CommitSummary(commit['sha'], commit['message'].split('\n', 1)[0],
+                             commit['author_name'],
+                             f"{self.web_url}/{owner}/{repo}/commit/{commit['sha']}")
+    
+    def get_commits_since_previous_tag(self, owner: str, repo: str, 
+                                       current_tag: str, previous_tag: Optional[str]) -> List[CommitSummary]:
+        """Получает список коммитов между двумя тегами."""
+        return self.http.drive(
+            self.get_commits_since_previous_tag_steps(owner, repo, current_tag, previous_tag))
+    
+    def generate_release_notes(self, commits: List[CommitSummary], tag_name: str) -> str:
         """Генерирует описание релиза на основе коммитов."""
         if not commits:
             return f"Release {tag_name}"
@@ -82,84 +303,317 @@ class GitHubReleaseManager:
         notes = [f"## What's Changed in {tag_name}\n"]
         
         for commit in commits:
-            message = commit['commit']['message'].split('\n')[0]
-            author = commit['commit']['author']['name']
-            sha = commit['sha'][:7]
-            notes.append(f"- {message} ({sha}) by @{author}")
+            notes.append(f"- {commit.title} ({commit.sha[:7]}) by @{commit.author}")
         
-        notes.append(f"\n**Full Changelog**: {commits[0]['html_url'].rsplit('/', 1)[0]}/compare/{tag_name}")
+        notes.append(f"\n**Full Changelog**: {commits[0].url.rsplit('/', 1)[0]}/compare/{tag_name}")
         
         return '\n'.join(notes)
     
-    def create_release(self, owner: str, repo: str, tag_name: str, 
-                      name: Optional[str] = None, body: Optional[str] = None,
-                      draft: bool = False, prerelease: bool = False) -> Optional[Dict]:
-        """Создает релиз в репозитории."""
-        url = f'{self.base_url}/repos/{owner}/{repo}/releases'
-        
-        if self.check_release_exists(owner, repo, tag_name):
-            print(f"⚠️  Релиз для тега {tag_name} уже существует в {owner}/{repo}")
-            return None
-        
-        payload = {
+    @staticmethod
+    def _build_release_payload(tag_name: str, name: Optional[str], body: Optional[str],
+                               draft: bool, prerelease: bool) -> Dict:
+        return {
             'tag_name': tag_name,
             'name': name or tag_name,
             'body': body or f'Release {tag_name}',
             'draft': draft,
             'prerelease': prerelease
         }
+    
+    def _post_release_steps(self, owner: str, repo: str, payload: Dict,
+                            existing_ok: bool = False) -> Steps:
+        """
+        Шаги POST /releases; ошибки запроса пробрасываются наружу.
         
-        try:
-            response = requests.post(url, headers=self.headers, json=payload)
+        Args:
+            existing_ok: Вернуть None, если релиз для тега уже существовал
+                (для оптимистичного создания без предварительной проверки)
+        """
+        url = f'{self.base_url}/repos/{owner}/{repo}/releases'
+        
+        # Повтор POST безопасен: второй релиз для того же тега GitHub не создаст
+        response = yield HTTPRequest('POST', url, headers=self.headers, json=payload,
+                                     idempotent=True)
+        if getattr(response, 'retries', 0) and self._is_already_exists(response):
+            # Релиз создала предыдущая попытка, ответ на которую потерялся
+            release = yield from self._get_release_steps(owner, repo, payload['tag_name'])
+        elif existing_ok and self._is_already_exists(response):
+            return None
+        else:
             response.raise_for_status()
+            release = ReleaseResult.from_github(response.json())
+        
+        print(f"✅ Релиз {payload['tag_name']} создан в {owner}/{repo}")
+        print(f"   URL: {release.url}")
+        return release
+    
+    def _update_release_body_steps(self, owner: str, repo: str, release: ReleaseResult,
+                                   body: str) -> Steps:
+        """Шаги PATCH описания релиза; ошибки запроса пробрасываются наружу."""
+        url = f"{self.base_url}/repos/{owner}/{repo}/releases/{release.id}"
+        response = yield HTTPRequest('PATCH', url, headers=self.headers, json={'body': body},
+                                     idempotent=True)
+        response.raise_for_status()
+    
+    @staticmethod
+    def _is_already_exists(response: requests.Response) -> bool:
+        """422 с кодом already_exists: релиз для тега уже есть."""
+        if response.status_code != 422:
+            return False
+        try:
+            errors = response.json().get('errors') or []
+        except ValueError:
+            return False
+        return any(isinstance(e, dict) and e.get('code') == 'already_exists' for e in errors)
+    
+    def _get_release_steps(self, owner: str, repo: str, tag_name: str) -> Steps:
+        """Шаги получения релиза по тегу; ошибки запроса пробрасываются наружу."""
+        url = f'{self.base_url}/repos/{owner}/{repo}/releases/tags/{tag_name}'
+        response = yield HTTPRequest('GET', url, headers=self.headers)
+        response.raise_for_status()
+        return ReleaseResult.from_github(response.json())
+    
+    @staticmethod
+    def _print_create_error(owner: str, repo: str, e: requests.exceptions.RequestException):
+        print(f"❌ Ошибка при создании релиза в {owner}/{repo}: {e}")
+        if hasattr(e, 'response') and e.response is not None:
+            print(f"   Ответ: {e.response.text}")
+    
+    def create_release_steps(self, owner: str, repo: str, tag_name: str,
+                             name: Optional[str] = None, body: Optional[str] = None,
+                             draft: bool = False, prerelease: bool = False) -> Steps:
+        """Шаги create_release."""
+        if (yield from self.check_release_exists_steps(owner, repo, tag_name)):
+            print(f"⚠️  Релиз для тега {tag_name} уже существует в {owner}/{repo}")
+            return None
+        
+        payload = self._build_release_payload(tag_name, name, body, draft, prerelease)
+        
+        try:
+            return (yield from self._post_release_steps(owner, repo, payload))
+        except requests.exceptions.RequestException as e:
+            self._print_create_error(owner, repo, e)
+            return None
+    
+    def create_release(self, owner: str, repo: str, tag_name: str, 
+                      name: Optional[str] = None, body: Optional[str] = None,
+                      draft: bool = False, prerelease: bool = False) -> Optional[ReleaseResult]:
+        """Создает релиз в репозитории."""
+        return self.http.drive(self.create_release_steps(
+            owner, repo, tag_name, name=name, body=body, draft=draft, prerelease=prerelease))
+    
+    def process_repository_steps(self, owner: str, repo: str,
+                                 auto_notes: bool = True,
+                                 draft: bool = False,
+                                 prerelease: bool = False,
+                                 release_exists: Optional[bool] = None,
+                                 optimistic: bool = False,
+                                 plan: bool = False,
+                                 event_tag: Optional[str] = None) -> Steps:
+        """
+        Шаги process_repository.
+        
+        Этапы идут от дешевых к дорогим и прерываются, как только ясно,
+        что релиз создавать не нужно: теги (и сравнение с прошлым запуском)
+        -> проверка релиза -> заметки (самый тяжелый этап) -> создание.
+        В оптимистичном режиме проверки нет: релиз сразу создается с
+        коротким описанием, "уже существует" означает пропуск, а заметки
+        добавляются только в новый релиз. С plan создания нет: тело
+        запроса возвращается в RepoResult.planned (статус PLANNED).
+        С event_tag (webhook) релиз создается для этого тега, а не для
+        последнего.
+        """
+        print(f"\n📦 Обработка {owner}/{repo}...")
+        result = RepoResult(f'{owner}/{repo}')
+        
+        # Теги, выбранные до сбоя прерванного запуска
+        journaled_tags = None
+        if self.journal and event_tag is None:
+            journaled_tags = self.journal.get(result.repo, 'tags')
+        if event_tag is not None:
+            self.forget_tags(owner, repo)
+        elif journaled_tags:
+            self.seed_tags(owner, repo, journaled_tags)
+        elif self.mirror is not None:
+            with result.timed('tags'):
+                self.seed_tags_from_mirror(owner, repo)
+        
+        try:
+            with result.timed('tags'):
+                try:
+                    if event_tag is not None:
+                        tags = yield from self.event_tags_steps(owner, repo, event_tag)
+                    else:
+                        tags = yield from self.get_release_tags_steps(owner, repo)
+                except requests.exceptions.RequestException as e:
+                    print(f"❌ Ошибка при получении тегов из {owner}/{repo}: {e}")
+                    return result.fail(f'получение тегов: {e}')
+            if self.journal and tags and not journaled_tags:
+                self.journal.record(result.repo, 'tags', [tag.name for tag in tags])
             
-            release = response.json()
-            print(f"✅ Релиз {tag_name} создан в {owner}/{repo}")
-            print(f"   URL: {release['html_url']}")
-            return release
+            if not tags:
+                print(f"⚠️  Нет тегов в репозитории {owner}/{repo}")
+                return result.finish(RepoStatus.NO_TAGS)
             
-        except requests.exceptions.RequestException as e:
-            print(f"❌ Ошибка при создании релиза в {owner}/{repo}: {e}")
-            if hasattr(e, 'response') and e.response is not None:
-                print(f"   Ответ: {e.response.text}")
+            tag_name = tags[0].name
+            result.tag_name = tag_name
+            print(f"✓ Найден тег {tag_name} в {owner}/{repo}")
+            
+            if self.state is not None and self.state.is_unchanged(result.repo, tag_name):
+                print(f"💤 Тег {tag_name} в {owner}/{repo} не изменился с прошлого запуска")
+                return result.finish(RepoStatus.UNCHANGED)
+            
+            if optimistic and not release_exists and not plan:
+                return (yield from self._create_optimistic_steps(
+                    owner, repo, tag_name, auto_notes, draft, prerelease, result))
+            
+            # Наличие релиза могло быть выяснено заранее пакетным GraphQL запросом
+            exists = release_exists
+            if exists is None:
+                with result.timed('check'):
+                    exists = yield from self.check_release_exists_steps(owner, repo, tag_name)
+            if exists:
+                print(f"⚠️  Релиз для тега {tag_name} уже существует в {owner}/{repo}")
+                return result.finish(RepoStatus.ALREADY_EXISTS)
+            
+            body = None
+            if auto_notes:
+                with result.timed('notes'):
+                    body = yield from self._release_notes_steps(owner, repo, tag_name)
+            
+            payload = self._build_release_payload(tag_name, tag_name, body, draft, prerelease)
+            
+            if plan:
+                print(f"📝 Релиз {tag_name} для {owner}/{repo} добавлен в план")
+                return result.finish(RepoStatus.PLANNED, planned={'payload': payload})
+            
+            with result.timed('create'):
+                try:
+                    release = yield from self._post_release_steps(owner, repo, payload)
+                except requests.exceptions.RequestException as e:
+                    self._print_create_error(owner, repo, e)
+                    return result.fail(f'создание релиза: {e}')
+            
+            return result.finish(RepoStatus.CREATED, release_url=release.url)
+        finally:
+            # Кэш тегов нужен только на время обработки репозитория
+            self.forget_tags(owner, repo)
+    
+    def apply_planned_steps(self, owner: str, repo: str, entry: PlanEntry, stale: bool = False,
+                            auto_notes: bool = True, draft: bool = False,
+                            prerelease: bool = False) -> Steps:
+        """
+        Шаги создания релиза по записи плана.
+        
+        Свежая запись создается сразу, без чтения тегов и проверки
+        релиза: "уже существует" означает пропуск. У устаревшей записи
+        сначала перечитывается последний тег; если он изменился,
+        репозиторий обрабатывается полностью (auto_notes, draft и
+        prerelease нужны только для этого случая).
+        """
+        print(f"\n📦 Применение плана для {owner}/{repo}...")
+        result = RepoResult(f'{owner}/{repo}', tag_name=entry.tag_name)
+        
+        try:
+            if stale:
+                with result.timed('tags'):
+                    try:
+                        tags = yield from self.get_release_tags_steps(owner, repo)
+                    except requests.exceptions.RequestException as e:
+                        print(f"❌ Ошибка при получении тегов из {owner}/{repo}: {e}")
+                        return result.fail(f'получение тегов: {e}')
+                if not tags or tags[0].name != entry.tag_name:
+                    print(f"🔄 План для {owner}/{repo} устарел: последний тег уже не {entry.tag_name}")
+                    # Теги остаются в кэше - повторно их не запрашиваем
+                    return (yield from self.process_repository_steps(
+                        owner, repo, auto_notes, draft, prerelease))
+            
+            with result.timed('create'):
+                try:
+                    release = yield from self._post_release_steps(owner, repo, entry.data['payload'],
+                                                                  existing_ok=True)
+                except requests.exceptions.RequestException as e:
+                    self._print_create_error(owner, repo, e)
+                    return result.fail(f'создание релиза: {e}')
+            
+            if release is None:
+                print(f"⚠️  Релиз для тега {entry.tag_name} уже существует в {owner}/{repo}")
+                return result.finish(RepoStatus.ALREADY_EXISTS)
+            return result.finish(RepoStatus.CREATED, release_url=release.url)
+        finally:
+            self.forget_tags(owner, repo)
+    
+    def _release_notes_steps(self, owner: str, repo: str, tag_name: str) -> Steps:
+        """Шаги генерации заметок; при ошибке возвращают None (описание по умолчанию)."""
+        key = f'{owner}/{repo}'
+        if self.journal:
+            body = self.journal.get(key, 'notes')
+            if body is not None:
+                return body
+        try:
+            # Предыдущий тег уже выбран вместе с последним
+            previous_tag = yield from self.get_previous_tag_steps(owner, repo)
+            commits = yield from self.get_commits_since_previous_tag_steps(
+                owner, repo, tag_name, previous_tag)
+            body = self.generate_release_notes(commits, tag_name)
+            if self.journal:
+                self.journal.record(key, 'notes', body)
+            return body
+        except Exception as e:
+            print(f"⚠️  Не удалось сгенерировать автоматические заметки: {e}")
             return None
     
+    def _create_optimistic_steps(self, owner: str, repo: str, tag_name: str,
+                                 auto_notes: bool, draft: bool, prerelease: bool,
+                                 result: RepoResult) -> Steps:
+        """Шаги оптимистичного создания: POST без проверки, заметки - после."""
+        payload = self._build_release_payload(tag_name, tag_name, None, draft, prerelease)
+        
+        with result.timed('create'):
+            try:
+                release = yield from self._post_release_steps(owner, repo, payload,
+                                                              existing_ok=True)
+            except requests.exceptions.RequestException as e:
+                self._print_create_error(owner, repo, e)
+                return result.fail(f'создание релиза: {e}')
+        
+        if release is None:
+            print(f"⚠️  Релиз для тега {tag_name} уже существует в {owner}/{repo}")
+            return result.finish(RepoStatus.ALREADY_EXISTS)
+        
+        if auto_notes:
+            with result.timed('notes'):
+                body = yield from self._release_notes_steps(owner, repo, tag_name)
+                if body:
+                    try:
+                        yield from self._update_release_body_steps(owner, repo, release, body)
+                    except requests.exceptions.RequestException as e:
+                        # Релиз уже создан - остается с описанием по умолчанию
+                        print(f"⚠️  Не удалось добавить заметки к релизу в {owner}/{repo}: {e}")
+        
+        return result.finish(RepoStatus.CREATED, release_url=release.url)
+    
     def process_repository(self, owner: str, repo: str, 
                           auto_notes: bool = True,
                           draft: bool = False,
-                          prerelease: bool = False) -> bool:
-        """Обрабатывает один репозиторий."""
-        print(f"\n📦 Обработка {owner}/{repo}...")
-        
-        latest_tag = self.get_latest_tag(owner, repo)
-        if not latest_tag:
-            return False
+                          prerelease: bool = False,
+                          release_exists: Optional[bool] = None,
+                          optimistic: bool = False,
+                          event_tag: Optional[str] = None) -> RepoResult:
+        """
+        Обрабатывает один репозиторий.
         
-        tag_name = latest_tag['name']
+        Args:
+            release_exists: Уже известное наличие релиза; None - проверить запросом
+            optimistic: Создавать релиз без предварительной проверки
+            event_tag: Тег из webhook события (иначе - последний тег)
         
-        body = None
-        if auto_notes:
-            url = f'{self.base_url}/repos/{owner}/{repo}/tags'
-            try:
-                response = requests.get(url, headers=self.headers)
-                response.raise_for_status()
-                tags = response.json()
-                
-                previous_tag = tags[1]['name'] if len(tags) > 1 else None
-                commits = self.get_commits_since_previous_tag(owner, repo, tag_name, previous_tag)
-                body = self.generate_release_notes(commits, tag_name)
-            except Exception as e:
-                print(f"⚠️  Не удалось сгенерировать автоматические заметки: {e}")
-        
-        release = self.create_release(
-            owner, repo, tag_name,
-            name=tag_name,
-            body=body,
-            draft=draft,
-            prerelease=prerelease
-        )
-        
-        return release is not None
+        Returns:
+            RepoResult; в логическом контексте истинен, если релиз создан
+        """
+        return self.http.drive(
+            self.process_repository_steps(owner, repo, auto_notes, draft, prerelease,
+                                          release_exists, optimistic, event_tag=event_tag))
 
 
 def load_repositories_from_file(file_path: str) -> List[Tuple[str, str]]:
@@ -225,11 +679,27 @@ def parse_arguments():
 
   # Использовать свой токен
   %(prog)s -f repos.txt -t ghp_yourtoken123
+
+  # Найти теги и существующие релизы пакетными GraphQL запросами
+  %(prog)s -f repos.txt --discovery graphql
+
+  # Все репозитории организаций с темой service, кроме архивных
+  %(prog)s --org my-org other-org --topic service
+
+  # Найти теги через git ls-remote (без расхода REST квоты)
+  %(prog)s -f repos.txt --discovery ls-remote --changed-only
+
+  # Создавать релизы по webhook событиям (демон на порту 8080)
+  %(prog)s --serve 8080 --webhook-secret $SECRET
+
+  # Составить план, просмотреть его и создать релизы по плану
+  %(prog)s -f repos.txt --discovery graphql --plan plan.json
+  %(prog)s --apply plan.json -w 64
         """
     )
     
     # Источник репозиториев
-    source_group = parser.add_mutually_exclusive_group(required=True)
+    source_group = parser.add_mutually_exclusive_group()
     source_group.add_argument(
         '-f', '--file',
         help='Путь к файлу со списком репозиториев (формат: owner/repo)'
@@ -239,6 +709,16 @@ def parse_arguments():
         nargs='+',
         help='Список репозиториев (формат: owner/repo owner2/repo2)'
     )
+    source_group.add_argument(
+        '--org',
+        nargs='+',
+        metavar='ORG',
+        help='Обработать репозитории организаций: обработка начинается, пока '
+             'список еще читается'
+    )
+    
+    # Фильтры для --org
+    GitHubRun.add_filter_arguments(parser)
     
     # Настройки токена
     parser.add_argument(
@@ -262,102 +742,260 @@ def parse_arguments():
         action='store_true',
         help='Не генерировать автоматические заметки из коммитов'
     )
+    parser.add_argument(
+        '--optimistic-create',
+        action='store_true',
+        help='Создавать релиз без предварительной проверки: "уже существует" - пропуск, '
+             'заметки добавляются в созданный релиз отдельным запросом'
+    )
+    
+    # Настройки соединений
+    GitHubRun.add_connection_arguments(parser)
     
-    # Дополнительные опции
+    # Выбор тегов
+    parser.add_argument(
+        '--tag-order',
+        choices=['semver', 'api'],
+        default='semver',
+        help='Как выбирать последний тег: по версии semver или первый в ответе API '
+             '(по умолчанию: semver; если semver тегов нет - как api)'
+    )
+    parser.add_argument(
+        '--max-tag-pages',
+        type=int,
+        default=DEFAULT_MAX_TAG_PAGES,
+        help=f'Сколько страниц тегов по {TAGS_PER_PAGE} просматривать при выборе по версии '
+             f'(по умолчанию: {DEFAULT_MAX_TAG_PAGES})'
+    )
     parser.add_argument(
-        '-v', '--verbose',
+        '--minimal-payload',
         action='store_true',
-        help='Подробный вывод'
+        help='Запрашивать как можно меньше данных: с --tag-order api только два тега, '
+             'HEAD вместо GET при проверке релиза; объем ответов - в итогах'
+    )
+    
+    # Обнаружение тегов и релизов
+    parser.add_argument(
+        '--discovery',
+        choices=['rest', 'graphql', 'ls-remote'],
+        default='rest',
+        help='Как искать теги и существующие релизы: REST запрос на репозиторий, '
+             'пакетные GraphQL запросы или теги через git ls-remote без запросов '
+             'к REST API (по умолчанию: rest; ls-remote работает только с --tag-order semver)'
+    )
+    parser.add_argument(
+        '--graphql-batch',
+        type=int,
+        default=DEFAULT_GRAPHQL_BATCH,
+        help=f'Начальный размер пачки репозиториев в GraphQL запросе, '
+             f'дальше подбирается автоматически (по умолчанию: {DEFAULT_GRAPHQL_BATCH})'
+    )
+    parser.add_argument(
+        '--api-url',
+        default=DEFAULT_API_URL,
+        help=f'URL REST API (по умолчанию: {DEFAULT_API_URL})'
+    )
+    parser.add_argument(
+        '--graphql-url',
+        help=f'URL GraphQL API (по умолчанию: по --api-url, для {DEFAULT_API_URL} - '
+             f'{DEFAULT_GRAPHQL_URL}; для GitHub Enterprise - <хост>/api/graphql)'
     )
     
+    # Локальные git зеркала
+    GitHubRun.add_mirror_arguments(parser, 'веб-адрес GitHub/{repo}.git')
+    
+    # Rate limit, повторы, журнал, демон, план, состояние, кэш и метрики
+    GitHubRun.add_run_arguments(parser, 'Секрет webhook для проверки подписи')
+    
     return parser.parse_args()
 
 
-def main():
-    """Основная функция скрипта."""
-    args = parse_arguments()
+class GitHubRun(ReleaseRun):
+    """Запуск GitHub версии: ключ репозитория - пара (owner, repo)."""
     
-    # Получаем токен
-    github_token = args.token or os.getenv('GITHUB_TOKEN')
-    if not github_token:
-        print("❌ Ошибка: Не найден GitHub токен")
-        print("   Укажите токен через -t или установите переменную GITHUB_TOKEN")
-        print("   Создайте токен на https://github.com/settings/tokens")
-        sys.exit(1)
+    provider = 'github'
+    owners_flag = '--org'
+    owners_title = 'репозиториев организаций'
+    secret_env = 'GITHUB_WEBHOOK_SECRET'
+    event_parser = staticmethod(parse_github_event)
+    git_user = 'x-access-token'
     
-    # Получаем список репозиториев
-    repositories = []
+    def __init__(self, args, token: str):
+        super().__init__(args, token)
+        # Наличие релиза, выясненное пакетным GraphQL запросом: (owner, repo) -> bool
+        self.known_releases: Dict[Tuple[str, str], bool] = {}
     
-    if args.file:
-        print(f"📂 Загрузка репозиториев из файла: {args.file}")
-        repositories = load_repositories_from_file(args.file)
-    elif args.repos:
-        for repo_str in args.repos:
-            if '/' in repo_str:
-                parts = repo_str.split('/')
-                if len(parts) == 2:
-                    repositories.append((parts[0].strip(), parts[1].strip()))
-                else:
-                    print(f"⚠️  Пропущен неверный формат: {repo_str}")
+    @property
+    def owners(self) -> Optional[List[str]]:
+        return self.args.org
+    
+    @property
+    def api_url(self) -> str:
+        return self.args.api_url.rstrip('/')
+    
+    def name(self, key: Tuple[str, str]) -> str:
+        return f'{key[0]}/{key[1]}'
+    
+    def key_for(self, name: str) -> Tuple[str, str]:
+        return tuple(name.split('/', 1))
+    
+    def source_given(self) -> bool:
+        return bool(self.args.file or self.args.repos or self.args.org)
+    
+    def sources_hint(self) -> str:
+        return "репозитории через -f/-r, организации через --org"
+    
+    def default_remote(self) -> str:
+        return f'{web_url_for(self.args.api_url)}/{{repo}}.git'
+    
+    def check_arguments(self):
+        super().check_arguments()
+        if self.args.graphql_batch < 1:
+            fail("--graphql-batch должен быть не меньше 1")
+    
+    def load_items(self) -> List[Tuple[str, str]]:
+        args = self.args
+        if args.file:
+            print(f"📂 Загрузка репозиториев из файла: {args.file}")
+            return load_repositories_from_file(args.file)
+        repositories = []
+        for repo_str in args.repos or []:
+            parts = repo_str.split('/')
+            if len(parts) == 2:
+                repositories.append((parts[0].strip(), parts[1].strip()))
             else:
                 print(f"⚠️  Пропущен неверный формат: {repo_str}")
+        return repositories
     
-    if not repositories:
-        print("❌ Ошибка: Не найдено ни одного репозитория для обработки")
-        sys.exit(1)
+    def settings(self) -> List[str]:
+        return [f"Автоматические заметки: {'✓' if not self.args.no_auto_notes else '✗'}",
+                f"Черновики: {'✓' if self.args.draft else '✗'}",
+                f"Пре-релизы: {'✓' if self.args.prerelease else '✗'}"]
+    
+    def build_manager(self) -> GitHubReleaseManager:
+        args = self.args
+        return GitHubReleaseManager(self.token, self.transport, base_url=args.api_url,
+                                    tag_order=args.tag_order, max_tag_pages=args.max_tag_pages,
+                                    graphql_url=args.graphql_url, journal=self.journal,
+                                    state=self.state if args.changed_only else None,
+                                    mirror=self.mirror, minimal_payload=args.minimal_payload)
     
-    print(f"✓ Загружено {len(repositories)} репозитори{'й' if len(repositories) == 1 else 'ев/я'}")
+    def stream_owners(self, journal: Optional[RunJournal]) -> ItemStream:
+        return stream_org_repositories(self.manager, self.args.org, self.repo_filter, journal)
     
-    # Настройки
-    auto_notes = not args.no_auto_notes
-    draft = args.draft
-    prerelease = args.prerelease
+    def seed_tags(self, name: str, tag_names: List[str]):
+        owner, repo = name.split('/', 1)
+        self.manager.seed_tags(owner, repo, tag_names)
     
-    if args.verbose:
-        print(f"\n⚙️  Настройки:")
-        print(f"   - Автоматические заметки: {'✓' if auto_notes else '✗'}")
-        print(f"   - Черновики: {'✓' if draft else '✗'}")
-        print(f"   - Пре-релизы: {'✓' if prerelease else '✗'}")
+    def discover(self, repositories: List[Tuple[str, str]]):
+        if self.args.discovery == 'graphql':
+            started = time.monotonic()
+            self.known_releases = discover_with_graphql(self.manager, self.token, self.transport,
+                                                        repositories, self.args)
+            self.metrics.observe_stage('discovery', time.monotonic() - started)
+        super().discover(repositories)
     
-    # Создаем менеджер релизов
-    manager = GitHubReleaseManager(github_token)
+    def process_steps(self, repository: Tuple[str, str], event_tag: Optional[str] = None) -> Steps:
+        args = self.args
+        owner, repo = repository
+        return self.manager.process_repository_steps(
+            owner, repo, not args.no_auto_notes, args.draft, args.prerelease,
+            release_exists=self.known_releases.get(repository),
+            optimistic=args.optimistic_create, plan=bool(args.plan), event_tag=event_tag)
     
-    # Статистика
-    successful = 0
-    failed = 0
-    skipped = 0
+    def apply_steps(self, repository: Tuple[str, str], entry: PlanEntry, stale: bool) -> Steps:
+        args = self.args
+        owner, repo = repository
+        return self.manager.apply_planned_steps(owner, repo, entry, stale, not args.no_auto_notes,
+                                                args.draft, args.prerelease)
+
+
+def discover_with_graphql(manager: GitHubReleaseManager, token: str, transport: HTTPTransport,
+                          repositories: List[Tuple[str, str]], args) -> Dict[Tuple[str, str], bool]:
+    """
+    Находит теги и существующие релизы пакетными GraphQL запросами.
     
-    print("\n🚀 Начинаем создание релизов...")
-    print("=" * 60)
+    Найденные теги кладутся в кэш менеджера, так что дальше работает
+    обычный путь создания релиза, но без запросов /tags и проверки релиза.
+    Репозитории, для которых GraphQL вернул ошибку, обрабатываются через REST.
     
-    # Обрабатываем каждый репозиторий
-    for owner, repo in repositories:
-        try:
-            result = manager.process_repository(owner, repo, auto_notes, draft, prerelease)
-            if result:
-                successful += 1
-            else:
-                # Проверяем, был ли релиз пропущен (уже существует)
-                tag = manager.get_latest_tag(owner, repo)
-                if tag and manager.check_release_exists(owner, repo, tag['name']):
-                    skipped += 1
-                else:
-                    failed += 1
-        except Exception as e:
-            print(f"❌ Непредвиденная ошибка при обработке {owner}/{repo}: {e}")
-            failed += 1
-    
-    # Выводим итоги
-    print("\n" + "=" * 60)
-    print(f"\n📊 Итоги:")
-    print(f"   ✅ Успешно создано: {successful}")
-    if skipped > 0:
-        print(f"   ⏭️  Пропущено (уже существуют): {skipped}")
-    print(f"   ❌ Ошибок: {failed}")
-    print(f"   📦 Всего репозиториев: {len(repositories)}")
-    
-    # Код возврата
-    sys.exit(0 if failed == 0 else 1)
+    Returns:
+        Словарь (owner, repo) -> существует ли релиз для последнего тега
+    """
+    discovery = GraphQLDiscovery(token, transport, url=args.graphql_url,
+                                 batch_size=args.graphql_batch, tag_order=args.tag_order)
+    print(f"\n🔎 Поиск тегов и релизов через GraphQL...")
+    try:
+        found = discovery.discover(repositories)
+    except requests.exceptions.RequestException as e:
+        print(f"⚠️  GraphQL недоступен, используем REST: {e}")
+        return {}
+    
+    known_releases = {}
+    fallback = 0
+    for repository, item in found.items():
+        if item.error is not None:
+            fallback += 1
+            if args.verbose:
+                print(f"   ⚠️  {item.owner}/{item.repo}: {item.error}, будет использован REST")
+            continue
+        manager.seed_tags(item.owner, item.repo, item.tags)
+        if item.release_exists is not None:
+            known_releases[repository] = item.release_exists
+    
+    print(f"✓ GraphQL: {discovery.queries} запрос(ов), стоимость {discovery.total_cost} очков"
+          + (f", осталось {discovery.remaining}" if discovery.remaining is not None else ""))
+    if fallback:
+        print(f"⚠️  {fallback} репозитори(ев) будут обработаны через REST")
+    return known_releases
+
+
+def stream_org_repositories(manager: GitHubReleaseManager, orgs: List[str],
+                            repo_filter: RepoFilter,
+                            journal: Optional[RunJournal] = None) -> ItemStream:
+    """
+    Репозитории организаций, отданные в обработку по мере чтения страниц.
+    
+    Args:
+        repo_filter: Фильтр по темам, архивности и имени
+        journal: При --resume - журнал, по которому пропускаются уже
+            обработанные репозитории
+    """
+    def produce(emit: Callable[[Tuple[str, str]], None]):
+        def on_repo(repo: Dict):
+            full_name = repo['full_name']
+            if not repo_filter.matches(full_name, repo.get('topics') or [], repo.get('archived', False)):
+                return
+            if journal is not None and journal.is_done(full_name):
+                return
+            owner, name = full_name.split('/', 1)
+            emit((owner, name))
+        
+        for org in orgs:
+            try:
+                manager.http.drive(manager.list_org_repositories_steps(org, on_repo))
+            except requests.exceptions.RequestException as e:
+                print(f"⚠️  Не удалось получить репозитории организации {org}: {e}")
+    
+    return ItemStream(produce)
+
+
+def main():
+    """Основная функция скрипта."""
+    args = parse_arguments()
+    
+    # Получаем токен
+    github_token = args.token or os.getenv('GITHUB_TOKEN')
+    if not github_token:
+        print("❌ Ошибка: Не найден GitHub токен")
+        print("   Укажите токен через -t или установите переменную GITHUB_TOKEN")
+        print("   Создайте токен на https://github.com/settings/tokens")
+        sys.exit(1)
+    
+    # GraphQL - на том же хосте, что и REST: токен GitHub Enterprise не должен уходить на github.com
+    args.graphql_url = args.graphql_url or graphql_url_for(args.api_url)
+    
+    GitHubRun(args, github_token).run()
 
 
 if __name__ == '__main__':
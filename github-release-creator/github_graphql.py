@@ -0,0 +1,295 @@
+"""
+Пакетное обнаружение тегов и релизов через GitHub GraphQL API.
+
+Вместо трех REST запросов на репозиторий (теги, проверка релиза, ...)
+один aliased GraphQL запрос получает два последних тега сразу для пачки
+репозиториев, а второй такой же запрос проверяет, есть ли релиз для
+найденного тега. Размер пачки подбирается автоматически: растет, пока
+запросы быстрые, и уменьшается при таймаутах и ошибках лимитов GitHub.
+
+Для выбора по semver смотрятся SEMVER_WINDOW самых свежих тегов. Если
+тегов больше, лучшая версия может оказаться и среди старых, поэтому
+такой репозиторий обрабатывается через REST, который читает страницы
+тегов до --max-tag-pages.
+
+Здесь же список коммитов между тегами (compare_commits_steps): REST
+/compare отдает вместе с коммитами патчи всех файлов и не больше 250
+коммитов, а GraphQL Ref.compare - только нужные поля коммитов, по 100
+на страницу и без ограничения на их число.
+"""
+
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import requests
+
+from release_common.http_transport import HTTPRequest, HTTPTransport, Steps
+from release_common.records import CommitSummary
+from release_common.tag_selection import TagSelector
+
+
+DEFAULT_GRAPHQL_URL = 'https://api.github.com/graphql'
+DEFAULT_BATCH_SIZE = 25
+MAX_BATCH_SIZE = 100
+# Сколько самых свежих тегов просматривать при выборе по semver
+SEMVER_WINDOW = 100
+# Целевая длительность одного запроса: GitHub обрывает запросы дольше ~10 с
+TARGET_QUERY_SECONDS = 3.0
+
+# Ошибки, после которых пачку нужно повторить меньшего размера
+SHRINK_ERROR_TYPES = {'MAX_NODE_LIMIT_EXCEEDED', 'RESOURCE_LIMITS_EXCEEDED'}
+SHRINK_HTTP_STATUSES = {502, 503, 504}
+
+RATE_LIMIT_FIELDS = 'rateLimit { cost remaining resetAt }'
+
+COMMITS_PER_PAGE = 100
+COMPARE_QUERY = (
+    'query($owner: String!, $name: String!, $base: String!, $head: String!, $after: String) { '
+    'repository(owner: $owner, name: $name) { ref(qualifiedName: $base) { '
+    f'compare(headRef: $head) {{ commits(first: {COMMITS_PER_PAGE}, after: $after) {{ '
+    'pageInfo { hasNextPage endCursor } '
+    'nodes { oid url messageHeadline author { name } } } } } } }'
+)
+
+
+def graphql_url_for(api_url: str) -> str:
+    """GraphQL эндпоинт GitHub для URL REST API (учитывает /api/v3 GitHub Enterprise)."""
+    api_url = api_url.rstrip('/')
+    if api_url.endswith('/api/v3'):
+        return api_url[:-len('/v3')] + '/graphql'
+    return api_url + '/graphql'
+
+
+class GraphQLBatchError(Exception):
+    """Пачка не выполнена целиком и должна быть повторена меньшего размера."""
+
+
+class RepoDiscovery:
+    """Что удалось узнать о репозитории: теги и наличие релиза."""
+
+    __slots__ = ('owner', 'repo', 'tags', 'release_exists', 'error')
+
+    def __init__(self, owner: str, repo: str):
+        self.owner = owner
+        self.repo = repo
+        self.tags: Optional[List[str]] = None
+        self.release_exists: Optional[bool] = None
+        self.error: Optional[str] = None
+
+    @property
+    def latest_tag(self) -> Optional[str]:
+        return self.tags[0] if self.tags else None
+
+    @property
+    def previous_tag(self) -> Optional[str]:
+        return self.tags[1] if self.tags and len(self.tags) > 1 else None
+
+
+class GraphQLDiscovery:
+    def __init__(self, token: str, transport: Optional[HTTPTransport] = None,
+                 url: str = DEFAULT_GRAPHQL_URL,
+                 batch_size: int = DEFAULT_BATCH_SIZE,
+                 max_batch_size: int = MAX_BATCH_SIZE,
+                 auto_batch: bool = True, tag_order: str = 'semver'):
+        """
+        Инициализация GraphQL обнаружения.
+
+        Args:
+            token: GitHub Personal Access Token
+            transport: Общий HTTP транспорт
+            url: GraphQL эндпоинт (для GitHub Enterprise или mock сервера)
+            batch_size: Начальный размер пачки репозиториев
+            max_batch_size: Верхняя граница размера пачки
+            auto_batch: Подстраивать размер пачки под длительность запросов
+            tag_order: semver - лучшая версия среди SEMVER_WINDOW самых свежих
+                тегов, иначе - два тега с самыми свежими коммитами
+        """
+        self.url = url
+        self.headers = {'Authorization': f'bearer {token}'}
+        self.http = transport or HTTPTransport()
+        self.batch_size = max(1, min(batch_size, max_batch_size))
+        self.max_batch_size = max_batch_size
+        self.auto_batch = auto_batch
+        self.tag_order = tag_order
+        self.refs_per_repo = SEMVER_WINDOW if tag_order == 'semver' else 2
+
+        # Учет стоимости запросов (очки GraphQL rate limit)
+        self.queries = 0
+        self.total_cost = 0
+        self.remaining: Optional[int] = None
+        self.reset_at: Optional[str] = None
+
+    # ---- построение запросов ----
+
+    def _tags_query(self, batch: Sequence[RepoDiscovery]) -> Tuple[str, Dict[str, str]]:
+        params, fields, variables = [], [], {}
+        for n, item in enumerate(batch):
+            params.append(f'$o{n}: String!, $n{n}: String!')
+            fields.append(
+                f'r{n}: repository(owner: $o{n}, name: $n{n}) {{ '
+                f'refs(refPrefix: "refs/tags/", first: {self.refs_per_repo}, '
+                f'orderBy: {{field: TAG_COMMIT_DATE, direction: DESC}}) '
+                f'{{ nodes {{ name }} pageInfo {{ hasNextPage }} }} }}'
+            )
+            variables[f'o{n}'] = item.owner
+            variables[f'n{n}'] = item.repo
+        query = f'query({", ".join(params)}) {{ {RATE_LIMIT_FIELDS} {" ".join(fields)} }}'
+        return query, variables
+
+    @staticmethod
+    def _releases_query(batch: Sequence[RepoDiscovery]) -> Tuple[str, Dict[str, str]]:
+        params, fields, variables = [], [], {}
+        for n, item in enumerate(batch):
+            params.append(f'$o{n}: String!, $n{n}: String!, $t{n}: String!')
+            fields.append(
+                f'r{n}: repository(owner: $o{n}, name: $n{n}) {{ '
+                f'release(tagName: $t{n}) {{ id }} }}'
+            )
+            variables[f'o{n}'] = item.owner
+            variables[f'n{n}'] = item.repo
+            variables[f't{n}'] = item.latest_tag
+        query = f'query({", ".join(params)}) {{ {RATE_LIMIT_FIELDS} {" ".join(fields)} }}'
+        return query, variables
+
+    # ---- выполнение ----
+
+    def _query_steps(self, query: str, variables: Dict[str, str]) -> Steps:
+        """Шаги одного GraphQL запроса; возвращают (data, ошибки по алиасам)."""
+        # Запрос только читает данные, так что его можно повторять
+        response = yield HTTPRequest('POST', self.url, headers=self.headers,
+                                     json={'query': query, 'variables': variables},
+                                     idempotent=True)
+        if response.status_code in SHRINK_HTTP_STATUSES:
+            raise GraphQLBatchError(f'HTTP {response.status_code}')
+        response.raise_for_status()
+        payload = response.json()
+        self.queries += 1
+
+        alias_errors: Dict[str, str] = {}
+        for error in payload.get('errors') or []:
+            if error.get('type') in SHRINK_ERROR_TYPES or 'timeout' in error.get('message', '').lower():
+                raise GraphQLBatchError(error.get('message', error.get('type')))
+            path = error.get('path') or []
+            if path:
+                alias_errors[path[0]] = error.get('message', 'ошибка GraphQL')
+            else:
+                raise requests.exceptions.HTTPError(f"GraphQL: {error.get('message')}",
+                                                    response=response)
+
+        data = payload.get('data') or {}
+        rate = data.get('rateLimit') or {}
+        self.total_cost += rate.get('cost') or 0
+        self.remaining = rate.get('remaining', self.remaining)
+        self.reset_at = rate.get('resetAt', self.reset_at)
+        return data, alias_errors
+
+    def _adjust_batch_size(self, elapsed: float):
+        """Аддитивно растим пачку, пока запросы укладываются во время."""
+        if self.auto_batch and elapsed < TARGET_QUERY_SECONDS:
+            self.batch_size = min(self.max_batch_size, self.batch_size + max(1, self.batch_size // 4))
+
+    def _run_batches_steps(self, items: List[RepoDiscovery], build_query, apply_node) -> Steps:
+        pending = list(items)
+        while pending:
+            batch, pending = pending[:self.batch_size], pending[self.batch_size:]
+            query, variables = build_query(batch)
+            started = time.monotonic()
+            try:
+                data, alias_errors = yield from self._query_steps(query, variables)
+            except GraphQLBatchError as e:
+                if len(batch) == 1 or not self.auto_batch:
+                    for item in batch:
+                        item.error = f'GraphQL: {e}'
+                    continue
+                # Мультипликативно уменьшаем пачку и повторяем те же репозитории;
+                # неудачный размер запоминаем как потолок до конца запуска
+                self.max_batch_size = max(1, len(batch) - 1)
+                self.batch_size = max(1, len(batch) // 2)
+                pending = batch + pending
+                continue
+            self._adjust_batch_size(time.monotonic() - started)
+
+            for n, item in enumerate(batch):
+                alias = f'r{n}'
+                if alias in alias_errors or data.get(alias) is None:
+                    item.error = alias_errors.get(alias, 'репозиторий не найден')
+                else:
+                    apply_node(item, data[alias])
+
+    def _apply_tags(self, item: RepoDiscovery, node: Dict):
+        refs = node.get('refs') or {}
+        if self.tag_order == 'semver' and (refs.get('pageInfo') or {}).get('hasNextPage'):
+            # Лучшая версия может быть за пределами окна - пусть теги читает REST
+            item.error = f'тегов больше {SEMVER_WINDOW}'
+            return
+        # Ссылки уже упорядочены по дате коммита - это порядок "api" для выбора
+        selector = TagSelector('semver' if self.tag_order == 'semver' else 'api')
+        selector.feed(refs.get('nodes') or [])
+        item.tags = [tag.name for tag in selector.selected]
+
+    @staticmethod
+    def _apply_release(item: RepoDiscovery, node: Dict):
+        item.release_exists = node.get('release') is not None
+
+    def discover_steps(self, repositories: Sequence[Tuple[str, str]]) -> Steps:
+        """Шаги discover."""
+        items = [RepoDiscovery(owner, repo) for owner, repo in repositories]
+        yield from self._run_batches_steps(items, self._tags_query, self._apply_tags)
+
+        tagged = [item for item in items if item.error is None and item.tags]
+        yield from self._run_batches_steps(tagged, self._releases_query, self._apply_release)
+
+        return {(item.owner, item.repo): item for item in items}
+
+    def discover(self, repositories: Sequence[Tuple[str, str]]) -> Dict[Tuple[str, str], RepoDiscovery]:
+        """
+        Находит два последних тега и наличие релиза для всех репозиториев.
+
+        Args:
+            repositories: Список кортежей (owner, repo)
+
+        Returns:
+            Словарь (owner, repo) -> RepoDiscovery
+        """
+        return self.http.drive(self.discover_steps(repositories))
+
+
+def compare_commits_steps(url: str, headers: Dict[str, str], owner: str, repo: str,
+                          base_tag: str, head_tag: str) -> Steps:
+    """
+    Шаги получения коммитов из base_tag..head_tag через GraphQL.
+
+    Коммиты возвращаются записями CommitSummary, как и из REST /compare,
+    старые первыми.
+
+    Raises:
+        requests.exceptions.RequestException: ошибка запроса или GraphQL
+            (например, тег не найден или сервер не знает Ref.compare)
+    """
+    commits: List[CommitSummary] = []
+    after = None
+    while True:
+        variables = {'owner': owner, 'name': repo, 'base': f'refs/tags/{base_tag}',
+                     'head': f'refs/tags/{head_tag}', 'after': after}
+        response = yield HTTPRequest('POST', url, headers=headers,
+                                     json={'query': COMPARE_QUERY, 'variables': variables},
+                                     idempotent=True)
+        response.raise_for_status()
+        payload = response.json()
+        if payload.get('errors'):
+            raise requests.exceptions.HTTPError(
+                f"GraphQL: {payload['errors'][0].get('message')}", response=response)
+
+        ref = ((payload.get('data') or {}).get('repository') or {}).get('ref')
+        if ref is None or ref.get('compare') is None:
+            raise requests.exceptions.HTTPError(f'GraphQL: тег {base_tag} не найден',
+                                                response=response)
+        connection = ref['compare']['commits']
+        for node in connection.get('nodes') or []:
+            commits.append(CommitSummary(node['oid'], node['messageHeadline'],
+                                         (node.get('author') or {}).get('name') or '', node['url']))
+
+        page_info = connection.get('pageInfo') or {}
+        if not page_info.get('hasNextPage'):
+            return commits
+        after = page_info.get('endCursor')
@@ -0,0 +1,70 @@
+import os
+import sys
+
+import pytest
+
+import create_releases_advanced
+from release_common.run_journal import default_journal_path
+
+
+@pytest.fixture
+def run_cli(mock_api, monkeypatch):
+    """Запускает main() GitHub версии против mock API и возвращает код возврата."""
+    def run(*argv):
+        monkeypatch.setattr(sys, 'argv', ['create_releases_advanced.py', '-t', 'x',
+                                          '--api-url', mock_api.url, '--no-http-cache', *argv])
+        with pytest.raises(SystemExit) as exit_info:
+            create_releases_advanced.main()
+        return exit_info.value.code
+    return run
+
+
+def test_plan_keeps_no_journal(run_cli, tmp_path):
+    assert run_cli('-r', 'org/app', '--plan', str(tmp_path / 'plan.json')) == 0
+
+    assert not os.path.exists(default_journal_path('github'))
+
+
+def test_apply_journal_lives_next_to_plan(run_cli, tmp_path):
+    plan = str(tmp_path / 'plan.json')
+    assert run_cli('-r', 'org/app', '--plan', plan) == 0
+
+    assert run_cli('--apply', plan) == 0
+
+    assert os.path.exists(plan + '.journal.jsonl')
+    assert not os.path.exists(default_journal_path('github'))
+
+
+def test_unfinished_journal_is_not_overwritten(run_cli, mock_api):
+    path = default_journal_path('github')
+    os.makedirs(os.path.dirname(path))
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('{"repo": "org/app", "stage": "tags", "data": ["v1.0.4"]}\n')
+
+    assert run_cli('-r', 'org/app') == 1
+    assert not mock_api.state.releases
+    with open(path, encoding='utf-8') as f:
+        assert 'org/app' in f.read()
+
+    assert run_cli('-r', 'org/app', '--fresh') == 0
+    # Запуск дошел до конца: следующему не нужны ни --resume, ни --fresh
+    assert run_cli('-r', 'org/other') == 0
+
+
+def test_changed_only_second_run_creates_nothing(run_cli, mock_api):
+    assert run_cli('-r', 'org/app', '--changed-only') == 0
+    assert ('github:org/app', 'v1.0.4') in mock_api.state.releases
+    # Релиз удален вручную: без новых тегов повторный запуск его не трогает
+    mock_api.state.releases.clear()
+
+    assert run_cli('-r', 'org/app', '--changed-only') == 0
+
+    assert not mock_api.state.releases
+
+
+def test_graphql_discovery_reads_many_tags_through_rest(run_cli, mock_api):
+    mock_api.state.tags_per_repo = 150
+
+    assert run_cli('-r', 'org/app', '--discovery', 'graphql') == 0
+
+    assert mock_api.state.releases == {('github:org/app', 'v1.0.149')}
@@ -0,0 +1,49 @@
+from github_graphql import SEMVER_WINDOW, GraphQLDiscovery, graphql_url_for
+
+
+def test_discover_finds_tags_and_existing_releases(mock_api, transport):
+    mock_api.state.add_release('github:org/app1', 'v1.0.4')
+    discovery = GraphQLDiscovery('x', transport, url=graphql_url_for(mock_api.url))
+
+    found = discovery.discover([('org', 'app1'), ('org', 'app2')])
+
+    assert found['org', 'app1'].tags == ['v1.0.4', 'v1.0.3']
+    assert found['org', 'app1'].release_exists is True
+    assert found['org', 'app2'].release_exists is False
+    # Одна пачка тегов и одна пачка релизов, стоимость из rateLimit
+    assert discovery.queries == 2
+    assert discovery.total_cost == 2
+    assert {url for _, url in transport.sent} == {f'{mock_api.url}/graphql'}
+
+
+def test_batch_shrinks_when_query_exceeds_limits(mock_api, transport):
+    mock_api.state.graphql_max_batch = 3
+    repositories = [('org', f'app{n}') for n in range(10)]
+    discovery = GraphQLDiscovery('x', transport, url=graphql_url_for(mock_api.url), batch_size=10)
+
+    found = discovery.discover(repositories)
+
+    assert all(item.error is None and item.latest_tag == 'v1.0.4' for item in found.values())
+    assert discovery.max_batch_size <= 3
+
+
+def test_semver_falls_back_to_rest_beyond_refs_window(mock_api, transport):
+    mock_api.state.tags_per_repo = SEMVER_WINDOW + 1
+    discovery = GraphQLDiscovery('x', transport, url=graphql_url_for(mock_api.url))
+
+    found = discovery.discover([('org', 'app')])
+
+    # Тегов больше, чем в окне: ни тегов, ни проверки релиза из GraphQL
+    assert found['org', 'app'].tags is None
+    assert found['org', 'app'].error
+    assert discovery.queries == 1
+
+
+def test_date_order_ignores_refs_beyond_window(mock_api, transport):
+    mock_api.state.tags_per_repo = SEMVER_WINDOW + 1
+    discovery = GraphQLDiscovery('x', transport, url=graphql_url_for(mock_api.url),
+                                 tag_order='date')
+
+    found = discovery.discover([('org', 'app')])
+
+    assert found['org', 'app'].tags == [f'v1.0.{SEMVER_WINDOW}', f'v1.0.{SEMVER_WINDOW - 1}']
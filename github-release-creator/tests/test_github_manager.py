@@ -0,0 +1,135 @@
+import pytest
+
+from create_releases_advanced import GitHubReleaseManager
+from release_common.http_transport import HTTPTransport
+from release_common.release_plan import ReleasePlan
+from release_common.retry_policy import RetryPolicy
+from release_common.run_results import RepoStatus
+from release_common.state_store import StateStore
+
+
+@pytest.mark.parametrize('base_url, graphql_url', [
+    ('https://api.github.com', 'https://api.github.com/graphql'),
+    ('https://github.company.com/api/v3', 'https://github.company.com/api/graphql'),
+    ('https://github.company.com/api/v3/', 'https://github.company.com/api/graphql'),
+])
+def test_graphql_url_follows_api_url(base_url, graphql_url):
+    assert GitHubReleaseManager('x', base_url=base_url).graphql_url == graphql_url
+
+
+def test_explicit_graphql_url_overrides_api_url():
+    manager = GitHubReleaseManager('x', base_url='https://github.company.com/api/v3',
+                                   graphql_url='https://proxy.company.com/graphql')
+    assert manager.graphql_url == 'https://proxy.company.com/graphql'
+
+
+def test_release_notes_commits_stay_on_api_host(mock_api, transport):
+    manager = GitHubReleaseManager('x', transport, base_url=mock_api.url)
+
+    commits = manager.get_commits_since_previous_tag('org', 'app', 'v1.0.4', 'v1.0.3')
+
+    assert [commit.title for commit in commits] == ['Change 0', 'Change 1', 'Change 2']
+    assert transport.sent == [('POST', f'{mock_api.url}/graphql')]
+
+
+def test_event_tag_below_latest_gets_release(mock_api, transport):
+    manager = GitHubReleaseManager('x', transport, base_url=mock_api.url)
+
+    result = manager.process_repository('org', 'app', auto_notes=True, event_tag='v1.0.2')
+
+    assert result.tag_name == 'v1.0.2'
+    assert ('github:org/app', 'v1.0.2') in mock_api.state.releases
+    assert ('github:org/app', 'v1.0.4') not in mock_api.state.releases
+
+
+def test_event_tags_pair_event_tag_with_previous_version(mock_api, transport):
+    manager = GitHubReleaseManager('x', transport, base_url=mock_api.url)
+
+    tags = manager.http.drive(manager.event_tags_steps('org', 'app', 'v1.0.2'))
+
+    assert [tag.name for tag in tags] == ['v1.0.2', 'v1.0.1']
+
+
+def test_plan_then_apply_creates_planned_release(mock_api, transport, tmp_path):
+    path = str(tmp_path / 'plan.json')
+    manager = GitHubReleaseManager('x', transport, base_url=mock_api.url)
+    plan = ReleasePlan('github', mock_api.url)
+
+    result = manager.http.drive(manager.process_repository_steps('org', 'app', plan=True))
+    plan.add(result)
+    plan.save(path)
+
+    assert result.status is RepoStatus.PLANNED
+    assert mock_api.state.releases == set()
+
+    [entry] = ReleasePlan.load(path, 'github', mock_api.url).entries
+    applied = manager.http.drive(manager.apply_planned_steps('org', 'app', entry))
+
+    assert applied.status is RepoStatus.CREATED
+    assert mock_api.state.releases == {('github:org/app', 'v1.0.4')}
+
+
+def test_lost_create_response_is_reported_as_created(mock_api):
+    # Релиз создается, но ответ теряется (504); повтор получает 422 already_exists
+    mock_api.state.lost_post_rate = 1.0
+    retry = RetryPolicy(retries=2, base_delay=0, max_delay=0)
+    with HTTPTransport(retry=retry) as transport:
+        manager = GitHubReleaseManager('x', transport, base_url=mock_api.url)
+        result = manager.process_repository('org', 'app', auto_notes=False)
+
+    assert result.status is RepoStatus.CREATED
+    assert result.tag_name == 'v1.0.4'
+    assert retry.retried == 1
+
+
+def test_changed_only_skips_unchanged_tag(mock_api, transport, tmp_path):
+    state = StateStore(str(tmp_path / 'state.sqlite'))
+    first = GitHubReleaseManager('x', base_url=mock_api.url, transport=transport, state=state)
+    state.update(first.process_repository('org', 'app'))
+    transport.sent.clear()
+
+    manager = GitHubReleaseManager('x', base_url=mock_api.url, transport=transport, state=state)
+    result = manager.process_repository('org', 'app')
+
+    assert result.status is RepoStatus.UNCHANGED
+    assert result.tag_name == 'v1.0.4'
+    # Прочитаны только теги: ни проверки релиза, ни сравнения, ни создания
+    assert transport.sent == [('GET', f'{mock_api.url}/repos/org/app/tags')]
+    state.close()
+
+
+def test_optimistic_create_of_existing_release_costs_one_post(mock_api, transport):
+    mock_api.state.releases.add(('github:org/app', 'v1.0.4'))
+    manager = GitHubReleaseManager('x', base_url=mock_api.url, transport=transport)
+
+    result = manager.process_repository('org', 'app', optimistic=True)
+
+    assert result.status is RepoStatus.ALREADY_EXISTS
+    # 422 already_exists и есть ответ: ни проверки релиза, ни сравнения коммитов
+    assert transport.sent == [('GET', f'{mock_api.url}/repos/org/app/tags'),
+                              ('POST', f'{mock_api.url}/repos/org/app/releases')]
+
+
+def test_optimistic_create_posts_before_notes(mock_api, transport):
+    manager = GitHubReleaseManager('x', base_url=mock_api.url, transport=transport)
+
+    result = manager.process_repository('org', 'app', optimistic=True)
+
+    assert result.status is RepoStatus.CREATED
+    methods = [method for method, _ in transport.sent]
+    assert methods[:2] == ['GET', 'POST']
+    assert methods[-1] == 'PATCH'
+    assert not any('/releases/tags/' in url for _, url in transport.sent)
+
+
+def test_existing_release_is_found_before_notes(mock_api, transport):
+    mock_api.state.releases.add(('github:org/app', 'v1.0.4'))
+    manager = GitHubReleaseManager('x', base_url=mock_api.url, transport=transport,
+                                   minimal_payload=True)
+
+    result = manager.process_repository('org', 'app')
+
+    assert result.status is RepoStatus.ALREADY_EXISTS
+    # Самая дешевая проверка (HEAD) отсекает заметки и создание
+    assert transport.sent == [('GET', f'{mock_api.url}/repos/org/app/tags'),
+                              ('HEAD', f'{mock_api.url}/repos/org/app/releases/tags/v1.0.4')]
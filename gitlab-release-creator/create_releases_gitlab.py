@@ -27,6 +27,13 @@ class GitLabReleaseManager:
             'Content-Type': 'application/json'
         }
         self.api_url = f'{self.gitlab_url}/api/v4'
+        
+        # Одна keep-alive сессия на все запросы к API
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        
+        # Списки тегов, уже скачанные за этот запуск: ID проекта -> теги
+        self._tag_lists: Dict[str, List[Dict]] = {}
     
     def get_project_id(self, project_path: str) -> Optional[str]:
         """
@@ -43,7 +50,7 @@ class GitLabReleaseManager:
         url = f'{self.api_url}/projects/{encoded_path}'
         
         try:
-            response = requests.get(url, headers=self.headers)
+            response = self.session.get(url)
             response.raise_for_status()
             project = response.json()
             return str(project['id'])
@@ -51,6 +58,26 @@ class GitLabReleaseManager:
             print(f"❌ Ошибка при получении ID проекта {project_path}: {e}")
             return None
     
+    def get_tags(self, project_id: str) -> List[Dict]:
+        """
+        Получает список тегов проекта.
+        
+        Список скачивается один раз и запоминается, чтобы поиск последнего
+        и предыдущего тега не запрашивал его повторно.
+        
+        Args:
+            project_id: ID проекта
+            
+        Returns:
+            Список тегов
+        """
+        if project_id not in self._tag_lists:
+            url = f'{self.api_url}/projects/{project_id}/repository/tags'
+            response = self.session.get(url)
+            response.raise_for_status()
+            self._tag_lists[project_id] = response.json()
+        return self._tag_lists[project_id]
+    
     def get_latest_tag(self, project_id: str, project_path: str) -> Optional[Dict]:
         """
         Получает последний тег из проекта.
@@ -62,13 +89,8 @@ class GitLabReleaseManager:
         Returns:
             Словарь с информацией о теге или None
         """
-        url = f'{self.api_url}/projects/{project_id}/repository/tags'
-        
         try:
-            response = requests.get(url, headers=self.headers)
-            response.raise_for_status()
-            
-            tags = response.json()
+            tags = self.get_tags(project_id)
             if not tags:
                 print(f"⚠️  Нет тегов в проекте {project_path}")
                 return None
@@ -96,7 +118,7 @@ class GitLabReleaseManager:
         url = f'{self.api_url}/projects/{project_id}/releases/{tag_name}'
         
         try:
-            response = requests.get(url, headers=self.headers)
+            response = self.session.get(url)
             return response.status_code == 200
         except requests.exceptions.RequestException:
             return False
@@ -125,7 +147,7 @@ class GitLabReleaseManager:
         }
         
         try:
-            response = requests.get(url, headers=self.headers, params=params)
+            response = self.session.get(url, params=params)
             response.raise_for_status()
             data = response.json()
             return data.get('commits', [])
@@ -195,7 +217,7 @@ class GitLabReleaseManager:
             payload['milestones'] = milestones
         
         try:
-            response = requests.post(url, headers=self.headers, json=payload)
+            response = self.session.post(url, json=payload)
             response.raise_for_status()
             
             release = response.json()
@@ -230,8 +252,10 @@ class GitLabReleaseManager:
         if not project_id:
             return False
         
-        # Получаем последний тег
+        # Получаем последний тег; скачанный при этом список тегов забираем
+        # из кэша, он же нужен для поиска предыдущего тега
         latest_tag = self.get_latest_tag(project_id, project_path)
+        tags = self._tag_lists.pop(project_id, [])
         if not latest_tag:
             return False
         
@@ -240,13 +264,7 @@ class GitLabReleaseManager:
         # Генерируем описание релиза если нужно
         description = None
         if auto_notes:
-            # Получаем все теги для поиска предыдущего
-            url = f'{self.api_url}/projects/{project_id}/repository/tags'
             try:
-                response = requests.get(url, headers=self.headers)
-                response.raise_for_status()
-                tags = response.json()
-                
                 previous_tag = tags[1]['name'] if len(tags) > 1 else None
                 commits = self.get_commits_since_previous_tag(project_id, tag_name, previous_tag)
                 description = self.generate_release_notes(commits, tag_name, project_path)
@@ -8,12 +8,48 @@ import os
 import sys
 import argparse
 import requests
-from typing import List, Dict, Optional
+from typing import Callable, List, Dict, Optional
 from urllib.parse import quote
 
+# Общий пакет release_common лежит в корне репозитория, рядом с каталогами инструментов
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from release_common.http_transport import HTTPTransport, HTTPRequest, Steps  # noqa: E402
+from release_common.parallel_runner import ItemStream  # noqa: E402
+from release_common.run_results import RepoResult, RepoStatus  # noqa: E402
+from gitlab_project_cache import DEFAULT_TTL_HOURS, ProjectIDCache  # noqa: E402
+from release_common.run_journal import RunJournal  # noqa: E402
+from release_common.state_store import StateStore  # noqa: E402
+from release_common.webhook_server import parse_gitlab_event  # noqa: E402
+from release_common.tag_selection import (  # noqa: E402
+    DEFAULT_MAX_TAG_PAGES, TAGS_PER_PAGE, paginate_steps, release_tags_steps)
+from release_common.release_plan import PlanEntry  # noqa: E402
+from release_common.git_mirror import GitMirror, GitMirrorError  # noqa: E402
+from release_common.repo_discovery import REPOS_PER_PAGE, RepoFilter  # noqa: E402
+from release_common.records import CommitSummary, ReleaseResult, Tag  # noqa: E402
+from release_common.cli import ReleaseRun, fail  # noqa: E402
+
+
+COMMITS_PER_PAGE = 100
+
+# Сортировка тегов на стороне GitLab для каждого способа выбора тега
+TAG_ORDER_PARAMS = {
+    'semver': {'order_by': 'version', 'sort': 'desc'},
+    'date': {'order_by': 'updated', 'sort': 'desc'},
+    'api': {},
+}
+
 
 class GitLabReleaseManager:
-    def __init__(self, token: str, gitlab_url: str = 'https://gitlab.com'):
+    def __init__(self, token: str, gitlab_url: str = 'https://gitlab.com',
+                 transport: Optional[HTTPTransport] = None,
+                 project_cache: Optional[ProjectIDCache] = None,
+                 tag_order: str = 'semver',
+                 max_tag_pages: Optional[int] = DEFAULT_MAX_TAG_PAGES,
+                 journal: Optional[RunJournal] = None,
+                 state: Optional[StateStore] = None,
+                 mirror: Optional[GitMirror] = None,
+                 minimal_payload: bool = False):
         """Инициализация менеджера релизов GitLab."""
         self.token = token
         self.gitlab_url = gitlab_url.rstrip('/')
@@ -22,75 +58,301 @@ class GitLabReleaseManager:
             'Content-Type': 'application/json'
         }
         self.api_url = f'{self.gitlab_url}/api/v4'
+        self.http = transport or HTTPTransport()
+        # Постоянный кэш путь -> ID проекта (None - запрашивать каждый раз)
+        self.project_cache = project_cache
+        # Как выбирать последний тег: semver, date (дата коммита) или api
+        self.tag_order = tag_order
+        self.max_tag_pages = max_tag_pages
+        # Журнал запуска: выбранные теги и заметки берутся из него и записываются в него
+        self.journal = journal
+        # Состояние прошлых запусков: если последний тег не изменился,
+        # проект дальше не обрабатывается (--changed-only)
+        self.state = state
+        # Локальные git зеркала: теги и коммиты для заметок читаются из них,
+        # а не через API (--git-mirror)
+        self.mirror = mirror
+        # Запрашивать как можно меньше данных: первая страница из двух тегов,
+        # HEAD вместо GET там, где важен только статус (--minimal-payload)
+        self.minimal_payload = minimal_payload
+        
+        # Выбранные за запуск теги: ID проекта -> [последний, предыдущий]
+        self._tag_lists: Dict[str, List[Tag]] = {}
+        # Теги, найденные до обработки (git ls-remote): путь проекта -> теги
+        self._seeded_tags: Dict[str, List[Tag]] = {}
     
-    def get_project_id(self, project_path: str) -> Optional[str]:
-        """Получает ID проекта по его пути."""
+    # Каждый метод ниже - синхронная обертка над генератором *_steps.
+    # Генераторы описывают HTTP запросы и могут выполняться как
+    # HTTPTransport.drive, так и асинхронно через AsyncTransport.drive.
+    
+    def _project_id_steps(self, project_path: str) -> Steps:
+        """Шаги запроса ID проекта; ошибки запроса пробрасываются наружу."""
+        if self.project_cache is not None:
+            project_id = self.project_cache.get(self.gitlab_url, project_path)
+            if project_id is not None:
+                return project_id
+        
         encoded_path = quote(project_path, safe='')
         url = f'{self.api_url}/projects/{encoded_path}'
         
+        response = yield HTTPRequest('GET', url, headers=self.headers)
+        response.raise_for_status()
+        project = response.json()
+        if self.project_cache is not None:
+            self.project_cache.put(self.gitlab_url, project_path, project['id'])
+        return str(project['id'])
+    
+    def _forget_stale_project_id(self, project_path: str,
+                                 e: requests.exceptions.RequestException) -> bool:
+        """
+        Удаляет ID проекта из кэша, если API ответил по нему 404.
+        
+        Returns:
+            True, если запись была в кэше и ID стоит запросить заново
+        """
+        response = getattr(e, 'response', None)
+        if self.project_cache is None or response is None or response.status_code != 404:
+            return False
+        return self.project_cache.invalidate(self.gitlab_url, project_path)
+    
+    def get_project_id_steps(self, project_path: str) -> Steps:
+        """Шаги get_project_id."""
         try:
-            response = requests.get(url, headers=self.headers)
-            response.raise_for_status()
-            project = response.json()
-            return str(project['id'])
+            return (yield from self._project_id_steps(project_path))
         except requests.exceptions.RequestException as e:
             print(f"❌ Ошибка при получении ID проекта {project_path}: {e}")
             return None
     
-    def get_latest_tag(self, project_id: str, project_path: str) -> Optional[Dict]:
-        """Получает последний тег из проекта."""
+    def get_project_id(self, project_path: str) -> Optional[str]:
+        """Получает ID проекта по его пути."""
+        return self.http.drive(self.get_project_id_steps(project_path))
+    
+    def list_group_projects_steps(self, group: str, on_project: Callable[[Dict], None],
+                                  topics: Optional[List[str]] = None,
+                                  archived: Optional[bool] = None) -> Steps:
+        """
+        Шаги обхода проектов группы (включая подгруппы).
+        
+        Проекты каждой страницы сразу передаются в on_project, не дожидаясь
+        следующих страниц. Темы и архивность фильтрует сам GitLab.
+        
+        Args:
+            topics: Только проекты со всеми этими темами
+            archived: Только архивные (True) или только неархивные (False)
+        
+        Returns:
+            Количество полученных проектов
+        """
+        encoded_group = quote(group, safe='')
+        url = f'{self.api_url}/groups/{encoded_group}/projects'
+        params = {'include_subgroups': 'true', 'simple': 'true', 'per_page': REPOS_PER_PAGE}
+        if topics:
+            params['topic'] = ','.join(topics)
+        if archived is not None:
+            params['archived'] = 'true' if archived else 'false'
+        count = 0
+        
+        def on_page(page: List[Dict]) -> bool:
+            nonlocal count
+            for project in page:
+                on_project(project)
+            count += len(page)
+            return True
+        
+        yield from paginate_steps(url, self.headers, params, on_page)
+        return count
+    
+    def warm_group_steps(self, group: str) -> Steps:
+        """Шаги warm_group."""
+        def on_project(project: Dict):
+            self.project_cache.put(self.gitlab_url, project['path_with_namespace'], project['id'])
+        
+        return (yield from self.list_group_projects_steps(group, on_project))
+    
+    def warm_group(self, group: str) -> int:
+        """
+        Заполняет кэш ID всеми проектами группы (включая подгруппы).
+        
+        Проекты запрашиваются страницами по 100, так что группа из тысячи
+        проектов прогревается за ~10 запросов вместо тысячи.
+        
+        Returns:
+            Количество проектов, добавленных в кэш
+        """
+        if self.project_cache is None:
+            raise ValueError('Прогрев невозможен: кэш проектов отключен')
+        return self.http.drive(self.warm_group_steps(group))
+    
+    def get_tags_steps(self, project_id: str) -> Steps:
+        """Шаги get_tags."""
         url = f'{self.api_url}/projects/{project_id}/repository/tags'
+        tags: List[Tag] = []
+        yield from paginate_steps(url, self.headers, {'per_page': TAGS_PER_PAGE},
+                                  lambda page: tags.extend(map(Tag.from_api, page)) or True)
+        return tags
+    
+    def get_tags(self, project_id: str) -> List[Tag]:
+        """Получает полный список тегов (все страницы)."""
+        return self.http.drive(self.get_tags_steps(project_id))
+    
+    def get_release_tags_steps(self, project_id: str) -> Steps:
+        """Шаги get_release_tags."""
+        if project_id not in self._tag_lists:
+            url = f'{self.api_url}/projects/{project_id}/repository/tags'
+            # GitLab сам сортирует теги по версии или дате, поэтому обычно
+            # хватает первой страницы (с --minimal-payload - первых двух тегов)
+            tags, pages, truncated = yield from release_tags_steps(
+                url, self.headers, TAG_ORDER_PARAMS[self.tag_order], self.tag_order,
+                presorted=True, max_pages=self.max_tag_pages, minimal=self.minimal_payload)
+            if truncated:
+                print(f"⚠️  В проекте {project_id} просмотрены только первые {pages} страниц тегов")
+            self._tag_lists[project_id] = tags
+        return self._tag_lists[project_id]
+    
+    def get_release_tags(self, project_id: str) -> List[Tag]:
+        """
+        Выбирает последний и предыдущий теги; хранятся до forget_tags().
+        
+        Returns:
+            Список из не более чем двух тегов, начиная с последнего
+        """
+        return self.http.drive(self.get_release_tags_steps(project_id))
+    
+    def forget_tags(self, project_id: str):
+        """Удаляет список тегов проекта из кэша."""
+        self._tag_lists.pop(project_id, None)
+    
+    def seed_tags(self, project_path: str, tag_names: List[str]):
+        """Кладет в кэш уже известные теги проекта (например, из ls-remote), чтобы не запрашивать /tags."""
+        self._seeded_tags[project_path] = [Tag(name) for name in tag_names]
+    
+    def seed_tags_from_mirror(self, project_id: str, project_path: str):
+        """Берет теги из git зеркала, если они еще не известны (например, из журнала)."""
+        if self.mirror is None or project_id in self._tag_lists:
+            return
+        try:
+            self._tag_lists[project_id] = self.mirror.release_tags(project_path)
+        except GitMirrorError as e:
+            print(f"⚠️  Git зеркало {project_path} недоступно ({e}), теги читаются через API")
+    
+    def event_tags_steps(self, project_id: str, project_path: str, tag_name: str) -> Steps:
+        """
+        Шаги выбора тегов для события о новом теге: сам тег и предыдущий перед ним.
         
+        Релиз создается для тега из события, даже если он младше последнего
+        (исправление v1.4.3 после v2.0.0); предыдущий тег ищется в зеркале
+        или через API среди тегов до него. Теги хранятся до forget_tags().
+        """
+        previous = None
+        if self.mirror is not None:
+            try:
+                previous = self.mirror.release_tags(project_path, below=tag_name)
+            except GitMirrorError as e:
+                print(f"⚠️  Git зеркало {project_path} недоступно ({e}), теги читаются через API")
+        if previous is None:
+            url = f'{self.api_url}/projects/{project_id}/repository/tags'
+            previous, _, _ = yield from release_tags_steps(
+                url, self.headers, TAG_ORDER_PARAMS[self.tag_order], self.tag_order,
+                presorted=True, max_pages=self.max_tag_pages, minimal=self.minimal_payload,
+                below=tag_name)
+        self._tag_lists[project_id] = [Tag(tag_name)] + previous[:1]
+        return self._tag_lists[project_id]
+    
+    def get_latest_tag_steps(self, project_id: str, project_path: str) -> Steps:
+        """Шаги get_latest_tag."""
         try:
-            response = requests.get(url, headers=self.headers)
-            response.raise_for_status()
-            
-            tags = response.json()
+            tags = yield from self.get_release_tags_steps(project_id)
             if not tags:
                 print(f"⚠️  Нет тегов в проекте {project_path}")
                 return None
             
             latest_tag = tags[0]
-            print(f"✓ Найден тег {latest_tag['name']} в {project_path}")
+            print(f"✓ Найден тег {latest_tag.name} в {project_path}")
             return latest_tag
             
         except requests.exceptions.RequestException as e:
             print(f"❌ Ошибка при получении тегов из {project_path}: {e}")
             return None
     
-    def check_release_exists(self, project_id: str, tag_name: str) -> bool:
-        """Проверяет, существует ли релиз для данного тега."""
-        url = f'{self.api_url}/projects/{project_id}/releases/{tag_name}'
+    def get_latest_tag(self, project_id: str, project_path: str) -> Optional[Tag]:
+        """Получает последний тег из проекта."""
+        return self.http.drive(self.get_latest_tag_steps(project_id, project_path))
+    
+    def get_previous_tag_steps(self, project_id: str) -> Steps:
+        """Шаги get_previous_tag."""
+        tags = yield from self.get_release_tags_steps(project_id)
+        return tags[1].name if len(tags) > 1 else None
+    
+    def get_previous_tag(self, project_id: str) -> Optional[str]:
+        """Возвращает имя тега, предшествующего последнему, или None."""
+        return self.http.drive(self.get_previous_tag_steps(project_id))
+    
+    def check_release_exists_steps(self, project_id: str, tag_name: str) -> Steps:
+        """Шаги check_release_exists."""
+        url = f'{self.api_url}/projects/{project_id}/releases/{quote(tag_name, safe="")}'
+        # Важен только статус: HEAD обходится без тела релиза
+        method = 'HEAD' if self.minimal_payload else 'GET'
         
         try:
-            response = requests.get(url, headers=self.headers)
+            response = yield HTTPRequest(method, url, headers=self.headers)
             return response.status_code == 200
         except requests.exceptions.RequestException:
             return False
     
-    def get_commits_since_previous_tag(self, project_id: str, 
-                                       current_tag: str, 
-                                       previous_tag: Optional[str]) -> List[Dict]:
-        """Получает список коммитов между двумя тегами."""
+    def check_release_exists(self, project_id: str, tag_name: str) -> bool:
+        """Проверяет, существует ли релиз для данного тега."""
+        return self.http.drive(self.check_release_exists_steps(project_id, tag_name))
+    
+    def get_commits_since_previous_tag_steps(self, project_id: str,
+                                             current_tag: str,
+                                             previous_tag: Optional[str],
+                                             project_path: Optional[str] = None) -> Steps:
+        """Шаги get_commits_since_previous_tag (с project_path - из git зеркала, если есть)."""
         if not previous_tag:
             return []
         
-        url = f'{self.api_url}/projects/{project_id}/repository/compare'
+        if self.mirror is not None and project_path:
+            try:
+                commits = self.mirror.commits(project_path, previous_tag, current_tag)
+                return [self._mirror_commit(commit) for commit in commits]
+            except GitMirrorError as e:
+                print(f"⚠️  Git зеркало {project_path} недоступно ({e}), коммиты читаются через API")
+        
+        # Список коммитов диапазона вместо /repository/compare: compare
+        # отдает еще и диффы всех файлов, которые здесь не нужны
+        url = f'{self.api_url}/projects/{project_id}/repository/commits'
         params = {
-            'from': previous_tag,
-            'to': current_tag
+            'ref_name': f'{previous_tag}..{current_tag}',
+            'per_page': COMMITS_PER_PAGE
         }
+        commits: List[CommitSummary] = []
         
         try:
-            response = requests.get(url, headers=self.headers, params=params)
-            response.raise_for_status()
-            data = response.json()
-            return data.get('commits', [])
+            # От каждой страницы остаются только записи для заметок
+            yield from paginate_steps(
+                url, self.headers, params,
+                lambda page: commits.extend(map(CommitSummary.from_gitlab, page)) or True)
+            # API отдает новые коммиты первыми, compare - старые первыми
+            commits.reverse()
+            return commits
         except requests.exceptions.RequestException as e:
             print(f"⚠️  Не удалось получить коммиты: {e}")
             return []
     
-    def generate_release_notes(self, commits: List[Dict], tag_name: str, 
+    @staticmethod
+    def _mirror_commit(commit: Dict) -> CommitSummary:
+        """Коммит из git зеркала в том же виде, что и из /repository/commits."""
+        return CommitSummary(commit['sha'], commit['message'].split('\n', 1)[0],
+                             commit['author_name'])
+    
+    def get_commits_since_previous_tag(self, project_id: str, 
+                                       current_tag: str, 
+                                       previous_tag: Optional[str]) -> List[CommitSummary]:
+        """Получает список коммитов между двумя тегами."""
+        return self.http.drive(
+            self.get_commits_since_previous_tag_steps(project_id, current_tag, previous_tag))
+    
+    def generate_release_notes(self, commits: List[CommitSummary], tag_name: str, 
                               project_path: str) -> str:
         """Генерирует описание релиза на основе коммитов."""
         if not commits:
@@ -99,25 +361,16 @@ class GitLabReleaseManager:
         notes = [f"## What's Changed in {tag_name}\n"]
         
         for commit in commits:
-            message = commit['message'].split('\n')[0]
-            author = commit['author_name']
-            short_id = commit['short_id']
-            notes.append(f"- {message} ({short_id}) by {author}")
+            notes.append(f"- {commit.title} ({commit.sha[:8]}) by {commit.author}")
         
         notes.append(f"\n**Full Changelog**: {self.gitlab_url}/{project_path}/-/compare/{tag_name}?from=&to={tag_name}")
         
         return '\n'.join(notes)
     
-    def create_release(self, project_id: str, project_path: str, tag_name: str, 
-                      name: Optional[str] = None, description: Optional[str] = None,
-                      milestones: Optional[List[str]] = None) -> Optional[Dict]:
-        """Создает релиз в проекте GitLab."""
-        url = f'{self.api_url}/projects/{project_id}/releases'
-        
-        if self.check_release_exists(project_id, tag_name):
-            print(f"⚠️  Релиз для тега {tag_name} уже существует в {project_path}")
-            return None
-        
+    @staticmethod
+    def _build_release_payload(tag_name: str, name: Optional[str],
+                               description: Optional[str],
+                               milestones: Optional[List[str]]) -> Dict:
         payload = {
             'tag_name': tag_name,
             'name': name or tag_name,
@@ -127,60 +380,303 @@ class GitLabReleaseManager:
         if milestones:
             payload['milestones'] = milestones
         
-        try:
-            response = requests.post(url, headers=self.headers, json=payload)
+        return payload
+    
+    def _post_release_steps(self, project_id: str, project_path: str, payload: Dict,
+                            existing_ok: bool = False) -> Steps:
+        """
+        Шаги POST /releases; ошибки запроса пробрасываются наружу.
+        
+        Args:
+            existing_ok: Вернуть None, если релиз для тега уже существовал
+                (для оптимистичного создания без предварительной проверки)
+        """
+        url = f'{self.api_url}/projects/{project_id}/releases'
+        tag_name = payload['tag_name']
+        
+        # Повтор POST безопасен: второй релиз для того же тега GitLab не создаст
+        response = yield HTTPRequest('POST', url, headers=self.headers, json=payload,
+                                     idempotent=True)
+        if getattr(response, 'retries', 0) and response.status_code == 409:
+            # Релиз создала предыдущая попытка, ответ на которую потерялся
+            pass
+        elif existing_ok and response.status_code == 409:
+            return None
+        else:
             response.raise_for_status()
-            
-            release = response.json()
-            print(f"✅ Релиз {tag_name} создан в {project_path}")
-            release_url = f"{self.gitlab_url}/{project_path}/-/releases/{tag_name}"
-            print(f"   URL: {release_url}")
-            return release
-            
+        
+        # Из ответа ничего не нужно: ссылка на релиз строится по пути и тегу
+        release = ReleaseResult(tag_name, f"{self.gitlab_url}/{project_path}/-/releases/{tag_name}")
+        print(f"✅ Релиз {tag_name} создан в {project_path}")
+        print(f"   URL: {release.url}")
+        return release
+    
+    def _update_release_description_steps(self, project_id: str, tag_name: str,
+                                          description: str) -> Steps:
+        """Шаги PUT описания релиза; ошибки запроса пробрасываются наружу."""
+        url = f'{self.api_url}/projects/{project_id}/releases/{quote(tag_name, safe="")}'
+        response = yield HTTPRequest('PUT', url, headers=self.headers,
+                                     json={'description': description})
+        response.raise_for_status()
+    
+    @staticmethod
+    def _print_create_error(project_path: str, e: requests.exceptions.RequestException):
+        print(f"❌ Ошибка при создании релиза в {project_path}: {e}")
+        if hasattr(e, 'response') and e.response is not None:
+            print(f"   Ответ: {e.response.text}")
+    
+    def create_release_steps(self, project_id: str, project_path: str, tag_name: str,
+                             name: Optional[str] = None, description: Optional[str] = None,
+                             milestones: Optional[List[str]] = None) -> Steps:
+        """Шаги create_release."""
+        if (yield from self.check_release_exists_steps(project_id, tag_name)):
+            print(f"⚠️  Релиз для тега {tag_name} уже существует в {project_path}")
+            return None
+        
+        payload = self._build_release_payload(tag_name, name, description, milestones)
+        
+        try:
+            return (yield from self._post_release_steps(project_id, project_path, payload))
         except requests.exceptions.RequestException as e:
-            print(f"❌ Ошибка при создании релиза в {project_path}: {e}")
-            if hasattr(e, 'response') and e.response is not None:
-                print(f"   Ответ: {e.response.text}")
+            self._print_create_error(project_path, e)
             return None
     
-    def process_repository(self, project_path: str, 
-                          auto_notes: bool = True,
-                          milestones: Optional[List[str]] = None) -> bool:
-        """Обрабатывает один проект."""
+    def create_release(self, project_id: str, project_path: str, tag_name: str, 
+                      name: Optional[str] = None, description: Optional[str] = None,
+                      milestones: Optional[List[str]] = None) -> Optional[ReleaseResult]:
+        """Создает релиз в проекте GitLab."""
+        return self.http.drive(self.create_release_steps(
+            project_id, project_path, tag_name,
+            name=name, description=description, milestones=milestones))
+    
+    def _release_tags_steps(self, project_id: str, project_path: str,
+                            event_tag: Optional[str]) -> Steps:
+        """Шаги выбора тегов: для тега из события или последнего и предыдущего."""
+        if event_tag is not None:
+            return (yield from self.event_tags_steps(project_id, project_path, event_tag))
+        return (yield from self.get_release_tags_steps(project_id))
+    
+    def process_repository_steps(self, project_path: str,
+                                 auto_notes: bool = True,
+                                 milestones: Optional[List[str]] = None,
+                                 optimistic: bool = False,
+                                 plan: bool = False,
+                                 event_tag: Optional[str] = None) -> Steps:
+        """
+        Шаги process_repository.
+        
+        Этапы идут от дешевых к дорогим и прерываются, как только ясно,
+        что релиз создавать не нужно: ID проекта -> теги (и сравнение с
+        прошлым запуском) -> проверка релиза -> заметки (самый тяжелый
+        этап) -> создание. В оптимистичном режиме проверки нет: релиз сразу
+        создается с коротким описанием, 409 означает пропуск, а заметки
+        добавляются только в новый релиз. С plan создания нет: тело
+        запроса и ID проекта возвращаются в RepoResult.planned (статус PLANNED).
+        С event_tag (webhook) релиз создается для этого тега, а не для
+        последнего.
+        """
         print(f"\n📦 Обработка {project_path}...")
+        result = RepoResult(project_path)
         
-        project_id = self.get_project_id(project_path)
-        if not project_id:
-            return False
+        with result.timed('project_id'):
+            try:
+                project_id = yield from self._project_id_steps(project_path)
+            except requests.exceptions.RequestException as e:
+                print(f"❌ Ошибка при получении ID проекта {project_path}: {e}")
+                return result.fail(f'получение ID проекта: {e}')
         
-        latest_tag = self.get_latest_tag(project_id, project_path)
-        if not latest_tag:
-            return False
+        # Теги, выбранные до сбоя прерванного запуска
+        journaled_tags = None
+        if self.journal and event_tag is None:
+            journaled_tags = self.journal.get(project_path, 'tags')
+        seeded_tags = self._seeded_tags.pop(project_path, None)
+        if event_tag is not None:
+            self.forget_tags(project_id)
+        elif journaled_tags:
+            self._tag_lists[project_id] = [Tag(name) for name in journaled_tags]
+        elif seeded_tags is not None:
+            self._tag_lists[project_id] = seeded_tags
+        elif self.mirror is not None:
+            with result.timed('tags'):
+                self.seed_tags_from_mirror(project_id, project_path)
+        
+        try:
+            with result.timed('tags'):
+                try:
+                    try:
+                        tags = yield from self._release_tags_steps(project_id, project_path, event_tag)
+                    except requests.exceptions.RequestException as e:
+                        # ID из кэша устарел (проект пересоздан) - запрашиваем заново
+                        if not self._forget_stale_project_id(project_path, e):
+                            raise
+                        project_id = yield from self._project_id_steps(project_path)
+                        tags = yield from self._release_tags_steps(project_id, project_path, event_tag)
+                except requests.exceptions.RequestException as e:
+                    print(f"❌ Ошибка при получении тегов из {project_path}: {e}")
+                    return result.fail(f'получение тегов: {e}')
+            if self.journal and tags and not journaled_tags:
+                self.journal.record(project_path, 'tags', [tag.name for tag in tags])
+            
+            if not tags:
+                print(f"⚠️  Нет тегов в проекте {project_path}")
+                return result.finish(RepoStatus.NO_TAGS)
+            
+            tag_name = tags[0].name
+            result.tag_name = tag_name
+            print(f"✓ Найден тег {tag_name} в {project_path}")
+            
+            if self.state is not None and self.state.is_unchanged(project_path, tag_name):
+                print(f"💤 Тег {tag_name} в {project_path} не изменился с прошлого запуска")
+                return result.finish(RepoStatus.UNCHANGED)
+            
+            if optimistic and not plan:
+                return (yield from self._create_optimistic_steps(
+                    project_id, project_path, tag_name, auto_notes, milestones, result))
+            
+            with result.timed('check'):
+                exists = yield from self.check_release_exists_steps(project_id, tag_name)
+            if exists:
+                print(f"⚠️  Релиз для тега {tag_name} уже существует в {project_path}")
+                return result.finish(RepoStatus.ALREADY_EXISTS)
+            
+            description = None
+            if auto_notes:
+                with result.timed('notes'):
+                    description = yield from self._release_notes_steps(
+                        project_id, project_path, tag_name)
+            
+            payload = self._build_release_payload(tag_name, tag_name, description, milestones)
+            
+            if plan:
+                print(f"📝 Релиз {tag_name} для {project_path} добавлен в план")
+                return result.finish(RepoStatus.PLANNED,
+                                     planned={'project_id': project_id, 'payload': payload})
+            
+            with result.timed('create'):
+                try:
+                    release = yield from self._post_release_steps(project_id, project_path, payload)
+                except requests.exceptions.RequestException as e:
+                    self._print_create_error(project_path, e)
+                    return result.fail(f'создание релиза: {e}')
+            
+            return result.finish(RepoStatus.CREATED, release_url=release.url)
+        finally:
+            # Кэш тегов нужен только на время обработки проекта
+            self.forget_tags(project_id)
+    
+    def apply_planned_steps(self, project_path: str, entry: PlanEntry, stale: bool = False,
+                            auto_notes: bool = True,
+                            milestones: Optional[List[str]] = None) -> Steps:
+        """
+        Шаги создания релиза по записи плана.
         
-        tag_name = latest_tag['name']
+        Свежая запись создается сразу, без запроса ID проекта, тегов и
+        проверки релиза: 409 означает пропуск. У устаревшей записи сначала
+        перечитывается последний тег; если он изменился, проект
+        обрабатывается полностью (auto_notes и milestones нужны только
+        для этого случая).
+        """
+        print(f"\n📦 Применение плана для {project_path}...")
+        result = RepoResult(project_path, tag_name=entry.tag_name)
+        project_id = entry.data['project_id']
         
-        description = None
-        if auto_notes:
-            url = f'{self.api_url}/projects/{project_id}/repository/tags'
+        try:
+            if stale:
+                with result.timed('tags'):
+                    try:
+                        tags = yield from self.get_release_tags_steps(project_id)
+                    except requests.exceptions.RequestException as e:
+                        print(f"❌ Ошибка при получении тегов из {project_path}: {e}")
+                        return result.fail(f'получение тегов: {e}')
+                if not tags or tags[0].name != entry.tag_name:
+                    print(f"🔄 План для {project_path} устарел: последний тег уже не {entry.tag_name}")
+                    # Теги остаются в кэше - повторно их не запрашиваем
+                    return (yield from self.process_repository_steps(
+                        project_path, auto_notes, milestones))
+            
+            with result.timed('create'):
+                try:
+                    release = yield from self._post_release_steps(
+                        project_id, project_path, entry.data['payload'], existing_ok=True)
+                except requests.exceptions.RequestException as e:
+                    self._print_create_error(project_path, e)
+                    return result.fail(f'создание релиза: {e}')
+            
+            if release is None:
+                print(f"⚠️  Релиз для тега {entry.tag_name} уже существует в {project_path}")
+                return result.finish(RepoStatus.ALREADY_EXISTS)
+            return result.finish(RepoStatus.CREATED, release_url=release.url)
+        finally:
+            self.forget_tags(project_id)
+    
+    def _release_notes_steps(self, project_id: str, project_path: str, tag_name: str) -> Steps:
+        """Шаги генерации заметок; при ошибке возвращают None (описание по умолчанию)."""
+        if self.journal:
+            description = self.journal.get(project_path, 'notes')
+            if description is not None:
+                return description
+        try:
+            # Предыдущий тег уже выбран вместе с последним
+            previous_tag = yield from self.get_previous_tag_steps(project_id)
+            commits = yield from self.get_commits_since_previous_tag_steps(
+                project_id, tag_name, previous_tag, project_path)
+            description = self.generate_release_notes(commits, tag_name, project_path)
+            if self.journal:
+                self.journal.record(project_path, 'notes', description)
+            return description
+        except Exception as e:
+            print(f"⚠️  Не удалось сгенерировать автоматические заметки: {e}")
+            return None
+    
+    def _create_optimistic_steps(self, project_id: str, project_path: str, tag_name: str,
+                                 auto_notes: bool, milestones: Optional[List[str]],
+                                 result: RepoResult) -> Steps:
+        """Шаги оптимистичного создания: POST без проверки, заметки - после."""
+        payload = self._build_release_payload(tag_name, tag_name, None, milestones)
+        
+        with result.timed('create'):
             try:
-                response = requests.get(url, headers=self.headers)
-                response.raise_for_status()
-                tags = response.json()
-                
-                previous_tag = tags[1]['name'] if len(tags) > 1 else None
-                commits = self.get_commits_since_previous_tag(project_id, tag_name, previous_tag)
-                description = self.generate_release_notes(commits, tag_name, project_path)
-            except Exception as e:
-                print(f"⚠️  Не удалось сгенерировать автоматические заметки: {e}")
-        
-        release = self.create_release(
-            project_id, project_path, tag_name,
-            name=tag_name,
-            description=description,
-            milestones=milestones
-        )
+                release = yield from self._post_release_steps(project_id, project_path, payload,
+                                                              existing_ok=True)
+            except requests.exceptions.RequestException as e:
+                self._print_create_error(project_path, e)
+                return result.fail(f'создание релиза: {e}')
+        
+        if release is None:
+            print(f"⚠️  Релиз для тега {tag_name} уже существует в {project_path}")
+            return result.finish(RepoStatus.ALREADY_EXISTS)
+        
+        if auto_notes:
+            with result.timed('notes'):
+                description = yield from self._release_notes_steps(project_id, project_path, tag_name)
+                if description:
+                    try:
+                        yield from self._update_release_description_steps(
+                            project_id, tag_name, description)
+                    except requests.exceptions.RequestException as e:
+                        # Релиз уже создан - остается с описанием по умолчанию
+                        print(f"⚠️  Не удалось добавить заметки к релизу в {project_path}: {e}")
+        
+        return result.finish(RepoStatus.CREATED, release_url=release.url)
+    
+    def process_repository(self, project_path: str, 
+                          auto_notes: bool = True,
+                          milestones: Optional[List[str]] = None,
+                          optimistic: bool = False,
+                          event_tag: Optional[str] = None) -> RepoResult:
+        """
+        Обрабатывает один проект.
         
-        return release is not None
+        Args:
+            optimistic: Создавать релиз без предварительной проверки
+            event_tag: Тег из webhook события (иначе - последний тег)
+        
+        Returns:
+            RepoResult; в логическом контексте истинен, если релиз создан
+        """
+        return self.http.drive(
+            self.process_repository_steps(project_path, auto_notes, milestones, optimistic,
+                                          event_tag=event_tag))
 
 
 def load_projects_from_file(file_path: str) -> List[str]:
@@ -241,11 +737,27 @@ def parse_arguments():
 
   # Связать релизы с milestone
   %(prog)s -f projects.txt -m "v1.0" "MVP"
+
+  # Заранее заполнить кэш ID всеми проектами группы
+  %(prog)s --warm-group my-group -f projects.txt
+
+  # Все проекты группы и подгрупп с темой service, кроме архивных
+  %(prog)s --group my-group --topic service
+
+  # Найти теги через git ls-remote (без расхода квоты API)
+  %(prog)s -f projects.txt --discovery ls-remote --changed-only
+
+  # Создавать релизы по Tag Push Hook событиям (демон на порту 8080)
+  %(prog)s --serve 8080 --webhook-secret $TOKEN
+
+  # Составить план, просмотреть его и создать релизы по плану
+  %(prog)s -f projects.txt --plan plan.json
+  %(prog)s --apply plan.json -w 64
         """
     )
     
-    # Источник проектов
-    source_group = parser.add_mutually_exclusive_group(required=True)
+    # Источник проектов (без него допустим только прогрев кэша --warm-group)
+    source_group = parser.add_mutually_exclusive_group()
     source_group.add_argument(
         '-f', '--file',
         help='Путь к файлу со списком проектов (формат: namespace/project)'
@@ -255,6 +767,16 @@ def parse_arguments():
         nargs='+',
         help='Список проектов (формат: namespace/project group/project)'
     )
+    source_group.add_argument(
+        '--group',
+        nargs='+',
+        metavar='GROUP',
+        help='Обработать проекты групп (включая подгруппы): обработка начинается, '
+             'пока список еще читается'
+    )
+    
+    # Фильтры для --group
+    GitLabRun.add_filter_arguments(parser)
     
     # Настройки GitLab
     parser.add_argument(
@@ -273,22 +795,245 @@ def parse_arguments():
         action='store_true',
         help='Не генерировать автоматические заметки из коммитов'
     )
+    parser.add_argument(
+        '--optimistic-create',
+        action='store_true',
+        help='Создавать релиз без предварительной проверки: 409 - пропуск, '
+             'заметки добавляются в созданный релиз отдельным запросом'
+    )
     parser.add_argument(
         '-m', '--milestones',
         nargs='+',
         help='Список milestone для связи с релизом'
     )
     
-    # Дополнительные опции
+    # Выбор тегов
+    parser.add_argument(
+        '--tag-order',
+        choices=['semver', 'date', 'api'],
+        default='semver',
+        help='Как выбирать последний тег: по версии, по дате коммита или первый в ответе API '
+             '(по умолчанию: semver; если semver тегов нет - как api)'
+    )
+    parser.add_argument(
+        '--max-tag-pages',
+        type=int,
+        default=DEFAULT_MAX_TAG_PAGES,
+        help=f'Максимум страниц тегов по {TAGS_PER_PAGE} при выборе тега '
+             f'(по умолчанию: {DEFAULT_MAX_TAG_PAGES})'
+    )
+    parser.add_argument(
+        '--minimal-payload',
+        action='store_true',
+        help='Запрашивать как можно меньше данных: сначала только два тега, '
+             'HEAD вместо GET при проверке релиза; объем ответов - в итогах'
+    )
+    parser.add_argument(
+        '--discovery',
+        choices=['rest', 'ls-remote'],
+        default='rest',
+        help='Как искать теги: запросы к API или git ls-remote без расхода квоты API '
+             '(по умолчанию: rest; ls-remote работает только с --tag-order semver)'
+    )
+    
+    # Настройки соединений
+    GitLabRun.add_connection_arguments(parser)
+    
+    # Кэш ID проектов
+    parser.add_argument(
+        '--project-cache',
+        metavar='PATH',
+        help='Файл кэша путь -> ID проекта (по умолчанию: ~/.cache/release-creator/gitlab_projects.json)'
+    )
+    parser.add_argument(
+        '--project-cache-ttl',
+        type=float,
+        default=DEFAULT_TTL_HOURS,
+        metavar='HOURS',
+        help=f'Срок жизни записи кэша в часах (по умолчанию: {DEFAULT_TTL_HOURS})'
+    )
     parser.add_argument(
-        '-v', '--verbose',
+        '--no-project-cache',
         action='store_true',
-        help='Подробный вывод'
+        help='Не использовать кэш ID проектов'
+    )
+    parser.add_argument(
+        '--warm-group',
+        nargs='+',
+        metavar='GROUP',
+        help='Заполнить кэш ID всеми проектами групп (включая подгруппы) перед обработкой'
     )
     
+    # Локальные git зеркала
+    GitLabRun.add_mirror_arguments(parser, 'URL GitLab/{repo}.git')
+    
+    # Rate limit, повторы, журнал, демон, план, состояние, кэш и метрики
+    GitLabRun.add_run_arguments(parser, 'Секретный токен webhook (X-Gitlab-Token)')
+    
     return parser.parse_args()
 
 
+class GitLabRun(ReleaseRun):
+    """Запуск GitLab версии: ключ проекта - его полный путь."""
+    
+    provider = 'gitlab'
+    items = 'проекты'
+    items_of = 'проектов'
+    counted = 'проект(ов)'
+    source_flags = '-f/-p'
+    owners_flag = '--group'
+    owners_title = 'проектов групп'
+    secret_env = 'GITLAB_WEBHOOK_TOKEN'
+    event_parser = staticmethod(parse_gitlab_event)
+    git_user = 'oauth2'
+    
+    def __init__(self, args, token: str, gitlab_url: str):
+        super().__init__(args, token)
+        self.gitlab_url = gitlab_url
+        self.project_cache: Optional[ProjectIDCache] = None
+    
+    @property
+    def owners(self) -> Optional[List[str]]:
+        return self.args.group
+    
+    @property
+    def api_url(self) -> str:
+        return self.gitlab_url.rstrip('/')
+    
+    @property
+    def target(self) -> str:
+        return f' в GitLab ({self.gitlab_url})'
+    
+    def source_given(self) -> bool:
+        return bool(self.args.file or self.args.projects or self.args.group or self.args.warm_group)
+    
+    def sources_hint(self) -> str:
+        return "проекты через -f/-p, группы через --group, группу для кэша через --warm-group"
+    
+    def default_remote(self) -> str:
+        return f"{self.api_url}/{{repo}}.git"
+    
+    def check_arguments(self):
+        if self.args.no_project_cache and self.args.warm_group:
+            fail("--warm-group нельзя использовать вместе с --no-project-cache")
+        super().check_arguments()
+    
+    def load_items(self) -> List[str]:
+        args = self.args
+        projects = []
+        if args.file:
+            print(f"📂 Загрузка проектов из файла: {args.file}")
+            projects = load_projects_from_file(args.file)
+        elif args.projects:
+            projects = [p.strip() for p in args.projects]
+        
+        # Кэш ID проектов и его прогрев
+        if not args.no_project_cache:
+            self.project_cache = ProjectIDCache(args.project_cache, args.project_cache_ttl)
+        if args.warm_group:
+            # Прогрев идет через транспорт запуска: с его лимитером, повторами и метриками
+            warm_project_cache(GitLabReleaseManager(self.token, self.gitlab_url, self.transport,
+                                                    self.project_cache), args.warm_group)
+            if not (args.file or args.projects or args.group or args.serve or args.apply):
+                self.close()
+                sys.exit(0)
+        return projects
+    
+    def settings(self) -> List[str]:
+        lines = [f"GitLab URL: {self.gitlab_url}",
+                 f"Автоматические заметки: {'✓' if not self.args.no_auto_notes else '✗'}"]
+        if self.args.milestones:
+            lines.append(f"Milestones: {', '.join(self.args.milestones)}")
+        return lines
+    
+    def build_manager(self) -> GitLabReleaseManager:
+        args = self.args
+        return GitLabReleaseManager(self.token, self.gitlab_url, self.transport, self.project_cache,
+                                    tag_order=args.tag_order, max_tag_pages=args.max_tag_pages,
+                                    journal=self.journal,
+                                    state=self.state if args.changed_only else None,
+                                    mirror=self.mirror, minimal_payload=args.minimal_payload)
+    
+    def stream_owners(self, journal: Optional[RunJournal]) -> ItemStream:
+        return stream_group_projects(self.manager, self.args.group, self.repo_filter, journal)
+    
+    def seed_tags(self, name: str, tag_names: List[str]):
+        self.manager.seed_tags(name, tag_names)
+    
+    def process_steps(self, project_path: str, event_tag: Optional[str] = None) -> Steps:
+        args = self.args
+        return self.manager.process_repository_steps(
+            project_path, not args.no_auto_notes, args.milestones,
+            optimistic=args.optimistic_create, plan=bool(args.plan), event_tag=event_tag)
+    
+    def apply_steps(self, project_path: str, entry: PlanEntry, stale: bool) -> Steps:
+        return self.manager.apply_planned_steps(project_path, entry, stale,
+                                                not self.args.no_auto_notes, self.args.milestones)
+    
+    def close(self):
+        super().close()
+        if self.project_cache is not None:
+            self.project_cache.save()
+    
+    def summary_lines(self) -> List[str]:
+        cache = self.project_cache
+        if cache is not None and (cache.hits or cache.misses):
+            return [f"🗂️  Кэш ID проектов: {cache.hits} попаданий, {cache.misses} промахов"]
+        return []
+
+
+def warm_project_cache(manager: GitLabReleaseManager, groups: List[str]):
+    """Заполняет кэш ID менеджера проектами перечисленных групп и сохраняет его."""
+    for group in groups:
+        try:
+            count = manager.warm_group(group)
+            print(f"🗂️  Группа {group}: в кэш добавлено {count} проект(ов)")
+        except requests.exceptions.RequestException as e:
+            print(f"⚠️  Не удалось прогреть кэш для группы {group}: {e}")
+    manager.project_cache.save()
+
+
+def stream_group_projects(manager: GitLabReleaseManager, groups: List[str],
+                          repo_filter: RepoFilter,
+                          journal: Optional[RunJournal] = None) -> ItemStream:
+    """
+    Проекты групп, отданные в обработку по мере чтения страниц.
+    
+    Темы и архивность фильтрует GitLab, шаблоны имени - repo_filter
+    (он же повторно проверяет темы и архивность каждого проекта).
+    ID проектов из списка попадают в кэш, так что отдельные запросы
+    /projects/:path для них не нужны.
+    
+    Args:
+        journal: При --resume - журнал, по которому пропускаются уже
+            обработанные проекты
+    """
+    archived = None if repo_filter.include_archived else False
+    
+    def produce(emit: Callable[[str], None]):
+        def on_project(project: Dict):
+            project_path = project['path_with_namespace']
+            if manager.project_cache is not None:
+                manager.project_cache.put(manager.gitlab_url, project_path, project['id'])
+            # GitLab уже отфильтровал список, но старые версии не знают
+            # параметра topic: темы проверяются еще раз по самому проекту
+            topics = project.get('topics') or project.get('tag_list') or []
+            if not repo_filter.matches(project_path, topics, project.get('archived', False)):
+                return
+            if journal is not None and journal.is_done(project_path):
+                return
+            emit(project_path)
+        
+        for group in groups:
+            try:
+                manager.http.drive(manager.list_group_projects_steps(
+                    group, on_project, repo_filter.topics, archived))
+            except requests.exceptions.RequestException as e:
+                print(f"⚠️  Не удалось получить проекты группы {group}: {e}")
+    
+    return ItemStream(produce)
+
+
 def main():
     """Основная функция скрипта."""
     args = parse_arguments()
@@ -305,74 +1050,7 @@ def main():
     # Получаем URL GitLab
     gitlab_url = args.url or os.getenv('GITLAB_URL', 'https://gitlab.com')
     
-    # Получаем список проектов
-    projects = []
-    
-    if args.file:
-        print(f"📂 Загрузка проектов из файла: {args.file}")
-        projects = load_projects_from_file(args.file)
-    elif args.projects:
-        projects = [p.strip() for p in args.projects]
-    
-    if not projects:
-        print("❌ Ошибка: Не найдено ни одного проекта для обработки")
-        sys.exit(1)
-    
-    print(f"✓ Загружено {len(projects)} проект{'ов' if len(projects) != 1 else ''}")
-    
-    # Настройки
-    auto_notes = not args.no_auto_notes
-    milestones = args.milestones
-    
-    if args.verbose:
-        print(f"\n⚙️  Настройки:")
-        print(f"   - GitLab URL: {gitlab_url}")
-        print(f"   - Автоматические заметки: {'✓' if auto_notes else '✗'}")
-        if milestones:
-            print(f"   - Milestones: {', '.join(milestones)}")
-    
-    # Создаем менеджер релизов
-    manager = GitLabReleaseManager(gitlab_token, gitlab_url)
-    
-    # Статистика
-    successful = 0
-    failed = 0
-    skipped = 0
-    
-    print(f"\n🚀 Начинаем создание релизов в GitLab ({gitlab_url})...")
-    print("=" * 60)
-    
-    # Обрабатываем каждый проект
-    for project_path in projects:
-        try:
-            result = manager.process_repository(project_path, auto_notes, milestones)
-            if result:
-                successful += 1
-            else:
-                # Проверяем, был ли релиз пропущен
-                project_id = manager.get_project_id(project_path)
-                if project_id:
-                    tag = manager.get_latest_tag(project_id, project_path)
-                    if tag and manager.check_release_exists(project_id, tag['name']):
-                        skipped += 1
-                    else:
-                        failed += 1
-                else:
-                    failed += 1
-        except Exception as e:
-            print(f"❌ Непредвиденная ошибка при обработке {project_path}: {e}")
-            failed += 1
-    
-    # Выводим итоги
-    print("\n" + "=" * 60)
-    print(f"\n📊 Итоги:")
-    print(f"   ✅ Успешно создано: {successful}")
-    if skipped > 0:
-        print(f"   ⏭️  Пропущено (уже существуют): {skipped}")
-    print(f"   ❌ Ошибок: {failed}")
-    print(f"   📦 Всего проектов: {len(projects)}")
-    
-    sys.exit(0 if failed == 0 else 1)
+    GitLabRun(args, gitlab_token, gitlab_url).run()
 
 
 if __name__ == '__main__':
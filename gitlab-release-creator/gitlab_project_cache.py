@@ -0,0 +1,99 @@
+"""
+Постоянный кэш соответствия путь проекта GitLab -> ID.
+
+ID проекта почти никогда не меняется, поэтому запрос /projects/:path
+на каждый проект и каждый запуск не нужен. Кэш хранится в JSON файле,
+записи старше TTL считаются устаревшими, а запись, по ID из которой
+API ответил 404, удаляется. Кэш можно заранее заполнить целой группой
+несколькими постраничными запросами (см. GitLabReleaseManager.warm_group).
+"""
+
+import json
+import os
+import tempfile
+import threading
+import time
+from typing import Dict, Optional
+
+
+DEFAULT_TTL_HOURS = 24 * 7
+
+
+def default_cache_path() -> str:
+    """~/.cache/release-creator/gitlab_projects.json (с учетом XDG_CACHE_HOME)."""
+    base = os.getenv('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'release-creator', 'gitlab_projects.json')
+
+
+class ProjectIDCache:
+    def __init__(self, path: Optional[str] = None, ttl_hours: float = DEFAULT_TTL_HOURS):
+        """
+        Инициализация кэша.
+
+        Args:
+            path: Путь к JSON файлу кэша (по умолчанию default_cache_path())
+            ttl_hours: Сколько часов запись считается актуальной
+        """
+        self.path = path or default_cache_path()
+        self.ttl = ttl_hours * 3600
+        self.hits = 0
+        self.misses = 0
+        self._dirty = False
+        self._lock = threading.Lock()
+        # URL GitLab -> путь проекта -> {'id': ..., 'fetched_at': ...}
+        self._entries: Dict[str, Dict[str, Dict]] = self._load()
+
+    def _load(self) -> Dict[str, Dict[str, Dict]]:
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            print(f"⚠️  Не удалось прочитать кэш проектов {self.path}: {e}")
+            return {}
+        return data if isinstance(data, dict) else {}
+
+    def get(self, gitlab_url: str, project_path: str) -> Optional[str]:
+        """Возвращает ID проекта из кэша или None, если записи нет или она устарела."""
+        with self._lock:
+            entry = self._entries.get(gitlab_url, {}).get(project_path)
+            if entry is None or time.time() - entry.get('fetched_at', 0) > self.ttl:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return str(entry['id'])
+
+    def put(self, gitlab_url: str, project_path: str, project_id: str):
+        with self._lock:
+            self._entries.setdefault(gitlab_url, {})[project_path] = {
+                'id': str(project_id),
+                'fetched_at': time.time(),
+            }
+            self._dirty = True
+
+    def invalidate(self, gitlab_url: str, project_path: str) -> bool:
+        """Удаляет запись; возвращает True, если она была."""
+        with self._lock:
+            removed = self._entries.get(gitlab_url, {}).pop(project_path, None) is not None
+            self._dirty = self._dirty or removed
+            return removed
+
+    def __len__(self) -> int:
+        return sum(len(projects) for projects in self._entries.values())
+
+    def save(self):
+        """Атомарно записывает кэш на диск, если он изменился."""
+        with self._lock:
+            if not self._dirty:
+                return
+            directory = os.path.dirname(self.path) or '.'
+            try:
+                os.makedirs(directory, exist_ok=True)
+                fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.gitlab_projects.')
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    json.dump(self._entries, f)
+                os.replace(tmp_path, self.path)
+                self._dirty = False
+            except OSError as e:
+                print(f"⚠️  Не удалось сохранить кэш проектов {self.path}: {e}")
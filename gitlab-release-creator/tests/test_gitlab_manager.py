@@ -0,0 +1,83 @@
+from create_releases_gitlab_advanced import GitLabReleaseManager, stream_group_projects
+from release_common.http_transport import HTTPTransport
+from release_common.repo_discovery import RepoFilter
+from release_common.retry_policy import RetryPolicy
+from release_common.run_journal import RunJournal
+from release_common.run_results import RepoStatus
+
+
+def test_resume_uses_journaled_tags(mock_api, tmp_path):
+    path = str(tmp_path / 'journal.jsonl')
+    journal = RunJournal(path)
+    journal.record('grp/project1', 'tags', ['v1.0.2', 'v1.0.1'])
+    journal.close()
+
+    manager = GitLabReleaseManager('x', mock_api.url, journal=RunJournal(path, resume=True))
+    result = manager.process_repository('grp/project1', auto_notes=True)
+
+    assert result.status is RepoStatus.CREATED
+    assert result.tag_name == 'v1.0.2'
+    assert ('gitlab:grp/project1', 'v1.0.2') in mock_api.state.releases
+
+
+def test_event_tag_below_latest_gets_release(mock_api):
+    manager = GitLabReleaseManager('x', mock_api.url)
+
+    result = manager.process_repository('grp/project1', auto_notes=True, event_tag='v1.0.2')
+
+    assert result.status is RepoStatus.CREATED
+    assert result.tag_name == 'v1.0.2'
+    assert ('gitlab:grp/project1', 'v1.0.2') in mock_api.state.releases
+    assert ('gitlab:grp/project1', 'v1.0.4') not in mock_api.state.releases
+
+
+def test_lost_create_response_is_reported_as_created(mock_api):
+    # Релиз создается, но ответ теряется (504); повтор получает 409
+    mock_api.state.lost_post_rate = 1.0
+    retry = RetryPolicy(retries=2, base_delay=0, max_delay=0)
+    with HTTPTransport(retry=retry) as transport:
+        manager = GitLabReleaseManager('x', mock_api.url, transport)
+        result = manager.process_repository('grp/project1', auto_notes=False)
+
+    assert result.status is RepoStatus.CREATED
+    assert result.tag_name == 'v1.0.4'
+    assert retry.retried == 1
+
+
+def test_release_check_quotes_slash_in_tag(mock_api, transport):
+    mock_api.state.releases.add(('gitlab:grp/project1', 'release/1.0'))
+    manager = GitLabReleaseManager('x', mock_api.url, transport)
+    project_id = manager.get_project_id('grp/project1')
+
+    assert manager.check_release_exists(project_id, 'release/1.0')
+    assert transport.sent[-1] == (
+        'GET', f'{mock_api.url}/api/v4/projects/{project_id}/releases/release%2F1.0')
+
+
+def test_group_stream_checks_topics_of_each_project(mock_api, monkeypatch):
+    mock_api.state.projects_per_group = 6
+    manager = GitLabReleaseManager('x', mock_api.url)
+    list_projects = manager.list_group_projects_steps
+    # GitLab без поддержки параметра topic возвращает все проекты
+    monkeypatch.setattr(manager, 'list_group_projects_steps',
+                        lambda group, on_project, topics=None, archived=None:
+                        list_projects(group, on_project, None, archived))
+    repo_filter = RepoFilter(topics=['service'])
+
+    projects = list(stream_group_projects(manager, ['grp'], repo_filter))
+
+    assert projects == ['grp/project0', 'grp/project2', 'grp/project4']
+    assert (repo_filter.listed, repo_filter.matched) == (6, 3)
+
+
+def test_optimistic_create_of_existing_release_costs_one_post(mock_api, transport):
+    mock_api.state.releases.add(('gitlab:grp/project1', 'v1.0.4'))
+    manager = GitLabReleaseManager('x', mock_api.url, transport)
+
+    result = manager.process_repository('grp/project1', auto_notes=True, optimistic=True)
+
+    assert result.status is RepoStatus.ALREADY_EXISTS
+    # 409 и есть ответ: ни проверки релиза, ни сравнения коммитов
+    base = f'{mock_api.url}/api/v4/projects/{mock_api.state.project_id("grp/project1")}'
+    assert transport.sent == [('GET', f'{mock_api.url}/api/v4/projects/grp%2Fproject1'),
+                              ('GET', f'{base}/repository/tags'), ('POST', f'{base}/releases')]
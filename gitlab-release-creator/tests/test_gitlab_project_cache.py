@@ -0,0 +1,63 @@
+import json
+import time
+
+from create_releases_gitlab_advanced import GitLabReleaseManager, warm_project_cache
+from gitlab_project_cache import ProjectIDCache
+from release_common.run_results import RepoStatus
+
+
+GITLAB = 'https://gitlab.example.com'
+
+
+def write_cache(path, fetched_at):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({GITLAB: {'grp/app': {'id': '42', 'fetched_at': fetched_at}}}, f)
+
+
+def test_entry_expires_after_ttl(tmp_path):
+    path = str(tmp_path / 'projects.json')
+    write_cache(path, time.time() - 2 * 3600)
+    assert ProjectIDCache(path, ttl_hours=1).get(GITLAB, 'grp/app') is None
+
+    write_cache(path, time.time() - 1800)
+    cache = ProjectIDCache(path, ttl_hours=1)
+    assert cache.get(GITLAB, 'grp/app') == '42'
+    assert (cache.hits, cache.misses) == (1, 0)
+
+
+def test_cache_survives_save_and_load(tmp_path):
+    path = str(tmp_path / 'projects.json')
+    cache = ProjectIDCache(path)
+    cache.put(GITLAB, 'grp/app', 42)
+    cache.save()
+
+    assert ProjectIDCache(path).get(GITLAB, 'grp/app') == '42'
+
+
+def test_stale_id_is_invalidated_on_404(mock_api, transport, tmp_path):
+    cache = ProjectIDCache(str(tmp_path / 'projects.json'))
+    # Проект пересоздан: в кэше ID, которого больше нет
+    cache.put(mock_api.url, 'grp/project1', '999999')
+    manager = GitLabReleaseManager('x', mock_api.url, transport, cache)
+
+    result = manager.process_repository('grp/project1', auto_notes=True)
+
+    assert result.status is RepoStatus.CREATED
+    project_id = cache.get(mock_api.url, 'grp/project1')
+    assert project_id not in (None, '999999')
+    assert ('GET', f'{mock_api.url}/api/v4/projects/grp%2Fproject1') in transport.sent
+
+
+def test_warm_group_fills_cache_with_pages(mock_api, transport, tmp_path):
+    path = str(tmp_path / 'projects.json')
+    manager = GitLabReleaseManager('x', mock_api.url, transport, ProjectIDCache(path))
+
+    warm_project_cache(manager, ['grp'])
+
+    # 250 проектов - три страницы по 100
+    assert len(transport.sent) == 3
+    cache = ProjectIDCache(path)
+    assert len(cache) == 250
+    manager = GitLabReleaseManager('x', mock_api.url, transport, cache)
+    assert manager.get_project_id('grp/project7') == cache.get(mock_api.url, 'grp/project7')
+    assert len(transport.sent) == 3
@@ -0,0 +1,414 @@
+#!/usr/bin/env python3
+"""
+Создание релизов для смешанного списка репозиториев GitHub и GitLab.
+Все платформы и хосты обрабатываются одновременно в одном процессе.
+"""
+
+import os
+import sys
+import argparse
+from typing import Dict, List, Tuple
+
+from release_engine import (DEFAULT_GITLAB_URL, InventoryItem, ReleaseBackend, build_backend,
+                            group_by_host, load_inventory, parse_inventory_line,
+                            unfinished_journals)
+from release_common.http_transport import HTTPTransport, Steps
+from release_common.parallel_runner import run_in_lanes
+from release_common.async_engine import AsyncTransport, run_lanes_in_event_loop
+from release_common.run_results import RepoResult, RepoStatus
+from release_common.cli import (add_http_cache_arguments, add_retry_arguments, build_http_parts,
+                                check_http_arguments)
+from gitlab_project_cache import ProjectIDCache
+from release_common.tag_selection import DEFAULT_MAX_TAG_PAGES
+from release_common.metrics import RunMetrics
+
+
+DEFAULT_PER_HOST = 8
+PROVIDER_ICONS = {'github': '🐙', 'gitlab': '🦊'}
+
+
+def parse_arguments():
+    """Парсинг аргументов командной строки."""
+    parser = argparse.ArgumentParser(
+        description='Создание релизов для смешанного списка репозиториев GitHub и GitLab',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Примеры использования:
+  # Инвентарь из файла
+  %(prog)s -f inventory.txt
+
+  # Репозитории в командной строке
+  %(prog)s -r github:owner/repo gitlab:group/sub/project
+
+  # Self-hosted GitLab и GitHub Enterprise
+  %(prog)s -r gitlab@https://gitlab.company.com:team/app \\
+              github@https://github.company.com/api/v3:team/app
+
+  # 16 репозиториев одновременно на каждый хост
+  %(prog)s -f inventory.txt --per-host 16
+
+Формат инвентаря (по одному репозиторию в строке):
+  github:owner/repo
+  github@https://github.company.com/api/v3:owner/repo
+  gitlab:group/sub/project
+  gitlab@https://gitlab.company.com:group/project
+        """
+    )
+
+    # Источник репозиториев
+    source_group = parser.add_mutually_exclusive_group(required=True)
+    source_group.add_argument(
+        '-f', '--file',
+        help='Путь к файлу инвентаря (формат: github:owner/repo, gitlab[@URL]:group/project)'
+    )
+    source_group.add_argument(
+        '-r', '--repos',
+        nargs='+',
+        help='Список репозиториев в формате инвентаря'
+    )
+
+    # Токены
+    parser.add_argument(
+        '--github-token',
+        help='GitHub Personal Access Token (по умолчанию из GITHUB_TOKEN)'
+    )
+    parser.add_argument(
+        '--gitlab-token',
+        help='GitLab Personal Access Token (по умолчанию из GITLAB_TOKEN)'
+    )
+    parser.add_argument(
+        '--gitlab-url',
+        help=f'URL GitLab для строк без @URL (по умолчанию из GITLAB_URL или {DEFAULT_GITLAB_URL})'
+    )
+
+    # Настройки релиза
+    parser.add_argument(
+        '--draft',
+        action='store_true',
+        help='Создать релизы GitHub как черновики'
+    )
+    parser.add_argument(
+        '--prerelease',
+        action='store_true',
+        help='Отметить релизы GitHub как пре-релизы'
+    )
+    parser.add_argument(
+        '-m', '--milestones',
+        nargs='+',
+        help='Milestones для релизов GitLab'
+    )
+    parser.add_argument(
+        '--no-auto-notes',
+        action='store_true',
+        help='Не генерировать автоматические заметки из коммитов'
+    )
+    parser.add_argument(
+        '--optimistic-create',
+        action='store_true',
+        help='Создавать релиз без предварительной проверки: "уже существует" - пропуск'
+    )
+    parser.add_argument(
+        '--tag-order',
+        choices=['semver', 'date', 'api'],
+        default='semver',
+        help='Как выбирать последний тег (по умолчанию: semver; date - только GitLab, '
+             'для GitHub как api)'
+    )
+    parser.add_argument(
+        '--max-tag-pages',
+        type=int,
+        default=DEFAULT_MAX_TAG_PAGES,
+        help=f'Максимум страниц тегов по 100 при выборе по версии (по умолчанию: {DEFAULT_MAX_TAG_PAGES})'
+    )
+    parser.add_argument(
+        '--minimal-payload',
+        action='store_true',
+        help='Запрашивать как можно меньше данных: маленькие страницы упорядоченных тегов, '
+             'HEAD вместо GET при проверке релиза; объем ответов - в итогах'
+    )
+
+    # Планировщик
+    parser.add_argument(
+        '--per-host',
+        type=int,
+        default=DEFAULT_PER_HOST,
+        help=f'Сколько репозиториев каждого хоста обрабатывать одновременно; столько же '
+             f'соединений в пуле хоста (по умолчанию: {DEFAULT_PER_HOST})'
+    )
+    parser.add_argument(
+        '--engine',
+        choices=['threads', 'asyncio'],
+        default='threads',
+        help='Движок выполнения: пул потоков или asyncio (нужен aiohttp)'
+    )
+
+    # Rate limit и повторы
+    parser.add_argument(
+        '--max-rps',
+        type=float,
+        help='Потолок запросов в секунду на каждый хост и токен (по умолчанию: по заголовкам rate limit)'
+    )
+    parser.add_argument(
+        '--no-rate-limit',
+        action='store_true',
+        help='Не следить за rate limit (403/429 сразу считаются ошибкой)'
+    )
+    add_retry_arguments(parser)
+
+    # Журнал и состояние (свои файлы для каждой платформы и хоста)
+    parser.add_argument(
+        '--resume',
+        action='store_true',
+        help='Продолжить прерванный запуск: пропустить обработанные репозитории'
+    )
+    parser.add_argument(
+        '--no-journal',
+        action='store_true',
+        help='Не вести журнал запуска'
+    )
+    parser.add_argument(
+        '--fresh',
+        action='store_true',
+        help='Начать журналы заново, даже если они остались от прерванного запуска'
+    )
+    parser.add_argument(
+        '--changed-only',
+        action='store_true',
+        help='Обрабатывать дальше только репозитории, у которых последний тег '
+             'изменился с прошлого запуска'
+    )
+    parser.add_argument(
+        '--no-state',
+        action='store_true',
+        help='Не сохранять состояние между запусками'
+    )
+
+    # Кэши
+    add_http_cache_arguments(parser)
+    parser.add_argument(
+        '--no-project-cache',
+        action='store_true',
+        help='Не использовать кэш ID проектов GitLab'
+    )
+
+    # Метрики
+    parser.add_argument(
+        '--metrics-file',
+        metavar='PATH',
+        help='Записать метрики запросов и этапов в формате Prometheus'
+    )
+    parser.add_argument(
+        '--metrics-json',
+        metavar='PATH',
+        help='Записать метрики запросов и этапов в JSON отчет'
+    )
+
+    parser.add_argument(
+        '-v', '--verbose',
+        action='store_true',
+        help='Подробный вывод'
+    )
+
+    return parser.parse_args()
+
+
+def main():
+    """Основная функция."""
+    args = parse_arguments()
+
+    gitlab_url = args.gitlab_url or os.getenv('GITLAB_URL', DEFAULT_GITLAB_URL)
+
+    # Получаем инвентарь
+    items: List[InventoryItem] = []
+    if args.file:
+        print(f"📂 Загрузка инвентаря из файла: {args.file}")
+        items = load_inventory(args.file, gitlab_url)
+    else:
+        for line in args.repos:
+            try:
+                items.append(parse_inventory_line(line, gitlab_url))
+            except ValueError as e:
+                print(f"⚠️  Пропущен неверный формат: {e}")
+
+    if not items:
+        print("❌ Ошибка: Не найдено ни одного репозитория для обработки")
+        sys.exit(1)
+
+    tokens = {
+        'github': args.github_token or os.getenv('GITHUB_TOKEN'),
+        'gitlab': args.gitlab_token or os.getenv('GITLAB_TOKEN'),
+    }
+    providers = {item.provider for item in items}
+    for provider in sorted(providers):
+        if not tokens[provider]:
+            env = 'GITHUB_TOKEN' if provider == 'github' else 'GITLAB_TOKEN'
+            print(f"❌ Ошибка: в инвентаре есть репозитории {provider}, но не найден токен")
+            print(f"   Укажите токен через --{provider}-token или установите переменную {env}")
+            sys.exit(1)
+
+    if args.per_host < 1 or args.max_tag_pages < 1:
+        print("❌ Ошибка: --per-host и --max-tag-pages должны быть не меньше 1")
+        sys.exit(1)
+
+    if args.changed_only and args.no_state:
+        print("❌ Ошибка: --changed-only нельзя использовать вместе с --no-state")
+        sys.exit(1)
+
+    if args.resume and args.no_journal:
+        print("❌ Ошибка: --resume нельзя использовать вместе с --no-journal")
+        sys.exit(1)
+
+    if args.fresh and (args.resume or args.no_journal):
+        print("❌ Ошибка: --fresh нельзя использовать вместе с --resume и --no-journal")
+        sys.exit(1)
+
+    check_http_arguments(args)
+
+    if not (args.no_journal or args.resume or args.fresh):
+        unfinished = unfinished_journals(sorted({item.backend_key for item in items}))
+        if unfinished:
+            print(f"❌ Ошибка: журналы остались от прерванного запуска: {', '.join(unfinished)}")
+            print("   Продолжите запуск через --resume или начните заново через --fresh")
+            sys.exit(1)
+
+    # Общий транспорт: у каждого хоста свой пул из --per-host соединений
+    # и свой бюджет rate limit (ключ - хост и токен)
+    http_cache, limiter, retry = build_http_parts(args)
+    # Метрики собираются всегда (итоги показывают объем ответов), а
+    # записываются, только если их есть куда записать
+    metrics = RunMetrics('multi')
+    write_metrics = bool(args.metrics_file or args.metrics_json)
+    transport = HTTPTransport(pool_size=args.per_host, cache=http_cache, limiter=limiter,
+                              retry=retry, metrics=metrics)
+    project_cache = None if args.no_project_cache else ProjectIDCache()
+
+    # Бэкенд на каждую пару (платформа, URL)
+    backends: Dict[Tuple[str, str], ReleaseBackend] = {}
+    for item in items:
+        if item.backend_key not in backends:
+            backends[item.backend_key] = build_backend(
+                item.provider, item.url, tokens[item.provider], transport,
+                tag_order=args.tag_order, max_tag_pages=args.max_tag_pages,
+                project_cache=project_cache, journal=not args.no_journal, resume=args.resume,
+                state=not args.no_state, changed_only=args.changed_only,
+                minimal_payload=args.minimal_payload)
+
+    resumed = 0
+    if args.resume:
+        remaining = [item for item in items
+                     if not backends[item.backend_key].journal.is_done(item.path)]
+        resumed = len(items) - len(remaining)
+        items = remaining
+        print(f"↩️  Продолжение запуска: {resumed} репозитори(ев) уже обработано, "
+              f"осталось {len(items)}")
+
+    lanes = group_by_host(items)
+    print(f"✓ Загружено {len(items)} репозитори(ев) на {len(lanes)} хост(ах):")
+    for host, lane in lanes.items():
+        counts = {}
+        for item in lane:
+            counts[item.provider] = counts.get(item.provider, 0) + 1
+        described = ', '.join(f'{PROVIDER_ICONS[provider]} {provider}: {count}'
+                              for provider, count in sorted(counts.items()))
+        print(f"   - {host}: {described}")
+
+    options = {
+        'auto_notes': not args.no_auto_notes,
+        'draft': args.draft,
+        'prerelease': args.prerelease,
+        'milestones': args.milestones,
+        'optimistic': args.optimistic_create,
+    }
+
+    def handle_item(item: InventoryItem) -> Steps:
+        """Шаги обработки репозитория; непредвиденные ошибки превращаются в RepoResult."""
+        backend = backends[item.backend_key]
+        try:
+            result = yield from backend.process_steps(item.path, options)
+        except Exception as e:
+            print(f"❌ Непредвиденная ошибка при обработке {item}: {e}")
+            result = RepoResult(item.path).fail(f'непредвиденная ошибка: {e}')
+        backend.finish(result)
+        metrics.observe_result(result)
+        return result
+
+    print("\n🚀 Начинаем создание релизов...")
+    print("=" * 60)
+
+    # Полосы по хостам работают одновременно: медленный хост не задерживает остальные
+    if args.engine == 'asyncio':
+        results = run_lanes_in_event_loop(handle_item, lanes,
+                                          AsyncTransport(per_host=args.per_host,
+                                                         cache=http_cache, limiter=limiter,
+                                                         retry=retry, metrics=metrics))
+    else:
+        results = run_in_lanes(lambda item: transport.drive(handle_item(item)),
+                               lanes, args.per_host)
+
+    # Статистика по статусам для каждого бэкенда
+    stats: Dict[Tuple[str, str], Dict[RepoStatus, int]] = {key: {} for key in backends}
+    errors: List[Tuple[InventoryItem, RepoResult]] = []
+    for item, result, output in results:
+        sys.stdout.write(output)
+        backend_stats = stats[item.backend_key]
+        backend_stats[result.status] = backend_stats.get(result.status, 0) + 1
+        if result.failed:
+            errors.append((item, result))
+
+    transport.close()
+    if http_cache is not None:
+        http_cache.close()
+    if project_cache is not None:
+        project_cache.save()
+    for backend in backends.values():
+        backend.complete()
+        backend.close()
+
+    # Выводим итоги
+    def total(status: RepoStatus) -> int:
+        return sum(backend_stats.get(status, 0) for backend_stats in stats.values())
+
+    print("\n" + "=" * 60)
+    print(f"\n📊 Итоги:")
+    for key, backend in backends.items():
+        backend_stats = stats[key]
+        print(f"   {PROVIDER_ICONS[backend.provider]} {backend.name}: "
+              f"создано {backend_stats.get(RepoStatus.CREATED, 0)}, "
+              f"уже существуют {backend_stats.get(RepoStatus.ALREADY_EXISTS, 0)}, "
+              f"ошибок {backend_stats.get(RepoStatus.ERROR, 0)}")
+    print(f"   ✅ Успешно создано: {total(RepoStatus.CREATED)}")
+    if total(RepoStatus.ALREADY_EXISTS):
+        print(f"   ⏭️  Пропущено (уже существуют): {total(RepoStatus.ALREADY_EXISTS)}")
+    if total(RepoStatus.NO_TAGS):
+        print(f"   🏷️  Без тегов: {total(RepoStatus.NO_TAGS)}")
+    if total(RepoStatus.UNCHANGED):
+        print(f"   💤 Без изменений с прошлого запуска: {total(RepoStatus.UNCHANGED)}")
+    print(f"   ❌ Ошибок: {total(RepoStatus.ERROR)}")
+    print(f"   📦 Всего репозиториев: {len(items)}")
+    if resumed:
+        print(f"   ↩️  Обработано до прерывания: {resumed}")
+    if http_cache is not None:
+        print(f"   🗄️  {http_cache.report()}")
+    if limiter is not None and (limiter.waited >= 0.1 or limiter.throttled):
+        print(f"   ⏳ {limiter.report()}")
+    if retry is not None and retry.retried:
+        print(f"   🔁 {retry.report()}")
+    print(f"   📶 {metrics.traffic_report()}")
+    if write_metrics:
+        print(f"   📈 {metrics.report()}")
+        try:
+            metrics.write(args.metrics_file, args.metrics_json)
+        except OSError as e:
+            print(f"   ⚠️  Не удалось записать метрики: {e}")
+
+    if args.verbose and errors:
+        print(f"\n❌ Причины ошибок:")
+        for item, result in errors:
+            print(f"   - {item}: {result.error}")
+
+    # Код возврата: как у отдельных скриптов, репозитории без тегов - неудача
+    sys.exit(1 if errors else 0)
+
+
+if __name__ == '__main__':
+    main()
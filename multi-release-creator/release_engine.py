@@ -0,0 +1,226 @@
+"""
+Общий движок для смешанного списка репозиториев GitHub и GitLab.
+
+Один список (инвентарь) может содержать репозитории обеих платформ и
+нескольких хостов:
+
+    github:owner/repo
+    github@https://github.company.com/api/v3:owner/repo
+    gitlab:group/sub/project
+    gitlab@https://gitlab.company.com:group/project
+
+Для каждой пары (платформа, URL) создается бэкенд поверх существующего
+менеджера (GitHubReleaseManager или GitLabReleaseManager), а все
+бэкенды работают через один HTTP транспорт: у каждого хоста свой пул
+соединений и свой бюджет rate limit. Репозитории раскладываются по
+полосам по хосту API, и полосы обрабатываются одновременно.
+"""
+
+import os
+import sys
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'gitlab-release-creator'))
+sys.path.insert(0, os.path.join(ROOT, 'github-release-creator'))
+
+from create_releases_advanced import DEFAULT_API_URL, GitHubReleaseManager  # noqa: E402
+from create_releases_gitlab_advanced import GitLabReleaseManager  # noqa: E402
+from release_common.http_transport import Steps  # noqa: E402
+from release_common.run_journal import RunJournal, default_journal_path, is_unfinished  # noqa: E402
+from release_common.run_results import RepoResult  # noqa: E402
+from release_common.state_store import StateStore, default_state_path  # noqa: E402
+
+
+PROVIDERS = ('github', 'gitlab')
+DEFAULT_GITLAB_URL = 'https://gitlab.com'
+
+
+class InventoryItem:
+    """Репозиторий из инвентаря: платформа, URL API и путь."""
+
+    __slots__ = ('provider', 'url', 'path')
+
+    def __init__(self, provider: str, url: str, path: str):
+        self.provider = provider
+        self.url = url
+        self.path = path
+
+    @property
+    def backend_key(self) -> Tuple[str, str]:
+        return self.provider, self.url
+
+    @property
+    def host(self) -> str:
+        return urlsplit(self.url).netloc
+
+    def __str__(self) -> str:
+        return f'{self.provider}:{self.path}'
+
+    def __repr__(self) -> str:
+        return f'InventoryItem({self.provider}@{self.url}:{self.path})'
+
+
+def parse_inventory_line(line: str, gitlab_url: str = DEFAULT_GITLAB_URL) -> InventoryItem:
+    """
+    Разбирает строку инвентаря.
+
+    Формат: платформа[@URL]:путь. Без URL для GitHub берется
+    api.github.com, для GitLab - gitlab_url.
+
+    Raises:
+        ValueError: неизвестная платформа или неверный путь
+    """
+    head, sep, path = line.partition(':')
+    if '@' in head:
+        # В URL есть свои двоеточия (схема, порт), а в пути их не бывает
+        provider, _, rest = line.partition('@')
+        url, sep, path = rest.rpartition(':')
+    else:
+        provider = head
+        url = DEFAULT_API_URL if provider == 'github' else gitlab_url
+    provider, path, url = provider.strip().lower(), path.strip().strip('/'), url.strip().rstrip('/')
+
+    if not sep or provider not in PROVIDERS:
+        raise ValueError(f"ожидается 'github:owner/repo' или 'gitlab[@URL]:group/project' - '{line}'")
+    if not url.startswith(('http://', 'https://')):
+        raise ValueError(f"неверный URL '{url}'")
+    parts = path.split('/')
+    if any(not part for part in parts) or len(parts) < 2 or (provider == 'github' and len(parts) != 2):
+        raise ValueError(f"неверный путь репозитория '{path}'")
+    return InventoryItem(provider, url, path)
+
+
+def load_inventory(file_path: str, gitlab_url: str = DEFAULT_GITLAB_URL) -> List[InventoryItem]:
+    """
+    Загружает инвентарь из файла (пустые строки и # комментарии пропускаются).
+
+    Повторы одного и того же репозитория отбрасываются.
+    """
+    items, seen = [], set()
+    try:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            for line_num, line in enumerate(f, 1):
+                line = line.strip()
+                if not line or line.startswith('#'):
+                    continue
+                try:
+                    item = parse_inventory_line(line, gitlab_url)
+                except ValueError as e:
+                    print(f"⚠️  Строка {line_num}: {e}")
+                    continue
+                key = (item.provider, item.url, item.path)
+                if key not in seen:
+                    seen.add(key)
+                    items.append(item)
+    except FileNotFoundError:
+        print(f"⚠️  Файл {file_path} не найден")
+    return items
+
+
+class ReleaseBackend:
+    """Платформа и хост: менеджер релизов, журнал и состояние."""
+
+    def __init__(self, provider: str, url: str, manager,
+                 journal: Optional[RunJournal] = None, state: Optional[StateStore] = None):
+        self.provider = provider
+        self.url = url
+        self.manager = manager
+        self.journal = journal
+        self.state = state
+
+    @property
+    def name(self) -> str:
+        return f'{self.provider} {urlsplit(self.url).netloc}'
+
+    def process_steps(self, path: str, options: Dict) -> Steps:
+        raise NotImplementedError
+
+    def finish(self, result: RepoResult):
+        """Записывает итог в журнал и состояние бэкенда."""
+        if self.journal is not None:
+            self.journal.finish(result)
+        if self.state is not None:
+            self.state.update(result)
+
+    def complete(self):
+        """Отмечает в журнале, что запуск дошел до конца."""
+        if self.journal is not None:
+            self.journal.complete()
+
+    def close(self):
+        if self.journal is not None:
+            self.journal.close()
+        if self.state is not None:
+            self.state.close()
+
+
+class GitHubBackend(ReleaseBackend):
+    def process_steps(self, path: str, options: Dict) -> Steps:
+        owner, repo = path.split('/')
+        return self.manager.process_repository_steps(
+            owner, repo, options['auto_notes'], options['draft'], options['prerelease'],
+            optimistic=options['optimistic'])
+
+
+class GitLabBackend(ReleaseBackend):
+    def process_steps(self, path: str, options: Dict) -> Steps:
+        return self.manager.process_repository_steps(
+            path, options['auto_notes'], options['milestones'], optimistic=options['optimistic'])
+
+
+def storage_name(provider: str, url: str) -> str:
+    """Имя журнала и состояния бэкенда: у каждого хоста свои файлы."""
+    host = urlsplit(url).netloc.replace(':', '_')
+    return f'multi_{provider}_{host}'
+
+
+def unfinished_journals(keys: List[Tuple[str, str]]) -> List[str]:
+    """Журналы бэкендов (платформа, URL), оставшиеся от прерванного запуска."""
+    paths = [default_journal_path(storage_name(provider, url)) for provider, url in keys]
+    return [path for path in paths if is_unfinished(path)]
+
+
+def build_backend(provider: str, url: str, token: str, transport, *,
+                  tag_order: str, max_tag_pages: int, project_cache=None,
+                  journal: bool = True, resume: bool = False,
+                  state: bool = True, changed_only: bool = False,
+                  minimal_payload: bool = False) -> ReleaseBackend:
+    """
+    Создает бэкенд для платформы и URL поверх общего транспорта.
+
+    Args:
+        journal: Вести журнал запуска (свой файл на бэкенд)
+        resume: Продолжить прерванный запуск по журналу
+        state: Сохранять состояние между запусками (свой файл на бэкенд)
+        changed_only: Пропускать репозитории, у которых тег не изменился
+        minimal_payload: Запрашивать как можно меньше данных (--minimal-payload)
+    """
+    name = storage_name(provider, url)
+    run_journal = RunJournal(default_journal_path(name), resume=resume) if journal else None
+    state_store = StateStore(default_state_path(name)) if state else None
+    manager_state = state_store if changed_only else None
+
+    if provider == 'github':
+        # У тегов GitHub в REST нет даты коммита: date работает только для GitLab
+        tag_order = 'api' if tag_order == 'date' else tag_order
+        manager = GitHubReleaseManager(token, transport, base_url=url, tag_order=tag_order,
+                                       max_tag_pages=max_tag_pages,
+                                       journal=run_journal, state=manager_state,
+                                       minimal_payload=minimal_payload)
+        return GitHubBackend(provider, url, manager, run_journal, state_store)
+    manager = GitLabReleaseManager(token, url, transport, project_cache,
+                                   tag_order=tag_order, max_tag_pages=max_tag_pages,
+                                   journal=run_journal, state=manager_state,
+                                   minimal_payload=minimal_payload)
+    return GitLabBackend(provider, url, manager, run_journal, state_store)
+
+
+def group_by_host(items: List[InventoryItem]) -> Dict[str, List[InventoryItem]]:
+    """Полосы для планировщика: хост API -> репозитории (в порядке инвентаря)."""
+    lanes: Dict[str, List[InventoryItem]] = {}
+    for item in items:
+        lanes.setdefault(item.host, []).append(item)
+    return lanes
@@ -0,0 +1,8 @@
+"""
+Общий код GitHub и GitLab версий.
+
+Модули, которые нужны обоим инструментам (HTTP транспорт и то, что на
+нем построено), живут здесь в одном экземпляре. Скрипты инструментов
+добавляют корень репозитория в sys.path и импортируют модули как
+release_common.<модуль>.
+"""
@@ -0,0 +1,360 @@
+"""
+asyncio движок для менеджеров релизов.
+
+Выполняет те же генераторы шагов (*_steps), что и синхронные методы
+менеджеров, но через неблокирующий HTTP клиент aiohttp. Глобальный
+семафор ограничивает число одновременных запросов, так что в работе
+могут находиться тысячи репозиториев при небольшом числе соединений
+и одном потоке.
+
+aiohttp - необязательная зависимость, нужна только для --engine asyncio.
+"""
+
+import asyncio
+import contextvars
+import queue
+import threading
+import time
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+import requests
+from requests.structures import CaseInsensitiveDict
+from urllib3.exceptions import NewConnectionError
+
+from .http_transport import DEFAULT_TIMEOUT, RATE_LIMIT_RETRIES, USER_AGENT, HTTPRequest, Steps
+from .parallel_runner import captured_output, routed_stdout
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+
+ASYNC_AVAILABLE = aiohttp is not None
+DEFAULT_CONCURRENCY = 100
+# Сколько репозиториев держать в работе на каждый разрешенный запрос
+REPOS_PER_REQUEST_SLOT = 10
+# Потоков для блокирующего кода шагов между запросами (журнал, состояние, git)
+STEP_THREADS = 16
+
+
+def build_response(request: HTTPRequest, status: int, reason: str,
+                   headers: Dict[str, str], body: bytes, url: str) -> requests.Response:
+    """
+    Собирает requests.Response из ответа aiohttp.
+
+    Шаги менеджеров написаны под requests (raise_for_status, json(),
+    исключения requests.exceptions), поэтому асинхронный движок отдает
+    им ответы того же типа.
+    """
+    response = requests.Response()
+    response.status_code = status
+    response.reason = reason
+    response.headers = CaseInsensitiveDict(headers)
+    response._content = body
+    response.url = url
+    response.request = requests.Request(request.method, url).prepare()
+    return response
+
+
+async def in_thread(func: Callable, *args, executor: Optional[Executor] = None) -> Any:
+    """
+    Выполняет блокирующий вызов в пуле потоков, не останавливая event loop.
+
+    Контекст (буфер вывода задачи из captured_output) переходит в поток,
+    так что напечатанное там попадает в вывод своего репозитория.
+
+    Args:
+        executor: Пул потоков (None - пул event loop по умолчанию)
+    """
+    context = contextvars.copy_context()
+    return await asyncio.get_running_loop().run_in_executor(executor, context.run, func, *args)
+
+
+def _advance(step: Callable, *args) -> Tuple[bool, Any]:
+    """Продвигает генератор шагов: (False, следующий запрос) или (True, результат)."""
+    try:
+        return False, step(*args)
+    except StopIteration as stop:
+        # StopIteration нельзя передать через Future - отдаем результат значением
+        return True, stop.value
+
+
+class AsyncTransport:
+    def __init__(self, concurrency: int = DEFAULT_CONCURRENCY,
+                 timeout: float = DEFAULT_TIMEOUT,
+                 headers: Optional[Dict[str, str]] = None,
+                 cache=None, limiter=None, retry=None, metrics=None,
+                 per_host: Optional[int] = None):
+        """
+        Инициализация асинхронного транспорта.
+
+        Args:
+            concurrency: Максимум одновременных HTTP запросов
+            timeout: Таймаут запроса в секундах
+            headers: Заголовки по умолчанию для всех запросов
+            cache: HTTPCache для условных GET запросов (None - без кэша)
+            limiter: RateLimiter, через который проходят все запросы (None - без него)
+            retry: RetryPolicy для временных сбоев (None - без повторов)
+            metrics: RunMetrics, куда записывается каждый запрос (None - без метрик)
+            per_host: Максимум одновременных запросов к одному хосту вместо
+                общего concurrency (None - общий лимит на все хосты)
+        """
+        if aiohttp is None:
+            raise RuntimeError('Для asyncio движка нужен aiohttp: pip install aiohttp')
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.headers = {'User-Agent': USER_AGENT}
+        if headers:
+            self.headers.update(headers)
+        self.cache = cache
+        self.limiter = limiter
+        self.retry = retry
+        self.metrics = metrics
+        self.per_host = per_host
+        self._session = None
+        self._semaphore = None
+        # Свой пул для кода шагов: ожидание потокового источника в пуле
+        # по умолчанию не задерживает шаги уже взятых в работу репозиториев
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._host_semaphores: Dict[str, asyncio.Semaphore] = {}
+
+    async def open(self):
+        """Создает сессию aiohttp; вызывать внутри работающего event loop."""
+        if self.per_host:
+            # Свой лимит на каждый хост: медленный хост не занимает чужие слоты
+            connector = aiohttp.TCPConnector(limit=0, limit_per_host=self.per_host)
+        else:
+            connector = aiohttp.TCPConnector(limit=self.concurrency)
+        self._session = aiohttp.ClientSession(
+            connector=connector,
+            headers=self.headers,
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+        )
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        self._executor = ThreadPoolExecutor(max_workers=STEP_THREADS, thread_name_prefix='release-steps')
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    async def __aenter__(self):
+        await self.open()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def send(self, request: HTTPRequest) -> requests.Response:
+        """Выполняет запрос, ошибки aiohttp превращаются в исключения requests."""
+        if self.metrics is None:
+            return await self._send_retried(request)
+        started = time.monotonic()
+        try:
+            response = await self._send_retried(request)
+        except Exception as e:
+            self.metrics.observe_request(request, time.monotonic() - started, error=e)
+            raise
+        self.metrics.observe_request(request, time.monotonic() - started, response)
+        return response
+
+    async def _send_retried(self, request: HTTPRequest) -> requests.Response:
+        if self.retry is None:
+            return await self._send_limited(request)
+
+        delay = 0.0
+        for attempt in range(self.retry.retries + 1):
+            last = attempt == self.retry.retries
+            try:
+                response = await self._send_limited(request)
+            except requests.exceptions.RequestException as e:
+                if last or not self.retry.should_retry(request, error=e):
+                    # Для метрик: сколько повторов было до окончательной ошибки
+                    e.retries = attempt
+                    raise
+                delay = self.retry.backoff(delay)
+            else:
+                if last or not self.retry.should_retry(request, response=response,
+                                                       rate_limited=self.limiter is not None):
+                    response.retries = attempt
+                    return response
+                delay = self.retry.backoff(delay, response)
+            await asyncio.sleep(delay)
+
+    async def _send_limited(self, request: HTTPRequest) -> requests.Response:
+        if self.limiter is None:
+            return await self._send_cached(request)
+
+        # Ожидание бюджета не занимает слот семафора: другие хосты работают
+        key = self.limiter.key_for(request.url, request.headers)
+        for _ in range(RATE_LIMIT_RETRIES + 1):
+            delay = self.limiter.reserve(key)
+            while delay > 0:
+                notice = self.limiter.sleep_notice(key, delay)
+                if notice:
+                    print(notice)
+                await asyncio.sleep(delay)
+                delay = self.limiter.reserve(key)
+            try:
+                response = await self._send_cached(request)
+            except Exception:
+                self.limiter.release(key)
+                raise
+            if not self.limiter.observe(key, response):
+                break
+        return response
+
+    async def _send_cached(self, request: HTTPRequest) -> requests.Response:
+        if self.cache is None:
+            return await self._send(request, request.headers)
+
+        # Чтение и запись SQLite блокируют - они идут в пуле потоков
+        entry, key, url, headers = await in_thread(self.cache.prepare, request.method, request.url,
+                                                   request.headers, request.params,
+                                                   executor=self._executor)
+        response = await self._send(request, headers)
+        return await in_thread(self.cache.complete, entry, key, url, response,
+                               executor=self._executor)
+
+    def _semaphore_for(self, url: str) -> asyncio.Semaphore:
+        if not self.per_host:
+            return self._semaphore
+        host = urlsplit(url).netloc
+        semaphore = self._host_semaphores.get(host)
+        if semaphore is None:
+            semaphore = self._host_semaphores[host] = asyncio.Semaphore(self.per_host)
+        return semaphore
+
+    async def _send(self, request: HTTPRequest, headers: Optional[Dict[str, str]]) -> requests.Response:
+        async with self._semaphore_for(request.url):
+            try:
+                async with self._session.request(request.method, request.url,
+                                                 headers=headers,
+                                                 params=request.params,
+                                                 json=request.json) as response:
+                    body = await response.read()
+            except asyncio.TimeoutError as e:
+                raise requests.exceptions.Timeout(f'Таймаут запроса {request.url}') from e
+            except aiohttp.ClientConnectorError as e:
+                # Соединение не установлено: как у requests, причина - NewConnectionError,
+                # и RetryPolicy знает, что запрос до сервера не дошел
+                raise requests.exceptions.ConnectionError(NewConnectionError(None, str(e))) from e
+            except aiohttp.ClientError as e:
+                raise requests.exceptions.ConnectionError(str(e)) from e
+        return build_response(request, response.status, response.reason or '',
+                              dict(response.headers), body, str(response.url))
+
+    async def drive(self, steps: Steps) -> Any:
+        """
+        Асинхронный аналог HTTPTransport.drive.
+
+        Код шагов между запросами блокирующий (журнал и состояние пишутся
+        на диск, теги и коммиты читаются из git зеркала), поэтому генератор
+        продвигается в пуле потоков, а event loop тем временем обслуживает
+        запросы остальных репозиториев.
+        """
+        done, request = await in_thread(_advance, next, steps, executor=self._executor)
+        while not done:
+            try:
+                response = await self.send(request)
+            except Exception as e:
+                done, request = await in_thread(_advance, steps.throw, e, executor=self._executor)
+            else:
+                done, request = await in_thread(_advance, steps.send, response,
+                                                executor=self._executor)
+        return request
+
+
+async def _drive_all(make_steps: Callable[[Any], Steps], sources: List[Tuple[Iterator, int]],
+                     transport: AsyncTransport, results: queue.Queue):
+    done = object()
+
+    async def next_item(iterator: Iterator):
+        # Потоковый источник (ItemStream) может ждать следующей страницы:
+        # это ожидание уходит в поток, чтобы не останавливать event loop
+        if getattr(iterator, 'blocking', False):
+            return await in_thread(next, iterator, done)
+        return next(iterator, done)
+
+    async def worker(iterator: Iterator):
+        # Итератор общий: каждый воркер берет следующий элемент, как только
+        # освободился, так что одновременно обрабатывается in_flight элементов
+        while True:
+            item = await next_item(iterator)
+            if item is done:
+                return
+            with captured_output() as buffer:
+                result = await transport.drive(make_steps(item))
+            results.put((item, result, buffer.getvalue()))
+
+    async with transport:
+        await asyncio.gather(*(worker(iterator) for iterator, in_flight in sources
+                               for _ in range(in_flight)))
+
+
+def _run_sources(make_steps: Callable[[Any], Steps], sources: List[Tuple[Iterator, int]],
+                 transport: AsyncTransport) -> Iterator[Tuple[Any, Any, str]]:
+    results: queue.Queue = queue.Queue()
+    finished = object()
+    errors = []
+
+    def run_loop():
+        try:
+            asyncio.run(_drive_all(make_steps, sources, transport, results))
+        except BaseException as e:
+            errors.append(e)
+        finally:
+            results.put(finished)
+
+    with routed_stdout():
+        thread = threading.Thread(target=run_loop, name='release-event-loop', daemon=True)
+        thread.start()
+        while True:
+            entry = results.get()
+            if entry is finished:
+                break
+            yield entry
+        thread.join()
+
+    if errors:
+        raise errors[0]
+
+
+def run_in_event_loop(make_steps: Callable[[Any], Steps], items: Iterable,
+                      transport: AsyncTransport,
+                      in_flight: Optional[int] = None) -> Iterator[Tuple[Any, Any, str]]:
+    """
+    Выполняет генераторы шагов для всех items в одном asyncio event loop.
+
+    Event loop работает в фоновом потоке, а результаты отдаются по мере
+    готовности, так что вызывающий код выглядит так же, как с run_in_threads.
+
+    Args:
+        make_steps: Фабрика генератора шагов для одного элемента
+        items: Элементы для обработки
+        transport: Асинхронный транспорт (открывается и закрывается здесь)
+        in_flight: Сколько элементов обрабатывать одновременно
+
+    Yields:
+        Кортежи (элемент, результат, напечатанный текст) в порядке завершения
+    """
+    in_flight = in_flight or transport.concurrency * REPOS_PER_REQUEST_SLOT
+    return _run_sources(make_steps, [(iter(items), in_flight)], transport)
+
+
+def run_lanes_in_event_loop(make_steps: Callable[[Any], Steps], lanes: Dict[Any, Iterable],
+                            transport: AsyncTransport,
+                            in_flight: Optional[int] = None) -> Iterator[Tuple[Any, Any, str]]:
+    """
+    Как run_in_event_loop, но у каждой полосы (например, хоста API) свои
+    in_flight элементов в работе, как у run_in_lanes.
+    """
+    in_flight = in_flight or (transport.per_host or transport.concurrency) * REPOS_PER_REQUEST_SLOT
+    return _run_sources(make_steps, [(iter(items), in_flight) for items in lanes.values()],
+                        transport)
@@ -0,0 +1,771 @@
+"""
+Общая часть командной строки GitHub и GitLab версий.
+
+Флаги, одинаковые у обоих инструментов, и ход запуска - обычный запуск,
+составление плана (--plan), создание релизов по плану (--apply) и демон
+(--serve) - описаны здесь один раз. Инструмент наследует ReleaseRun и
+реализует только то, что зависит от платформы: загрузку списка,
+менеджер релизов, обход организаций или групп и шаги обработки.
+"""
+
+import argparse
+import os
+import shutil
+import sys
+from typing import Callable, Dict, Hashable, List, Optional, Tuple
+
+from .async_engine import ASYNC_AVAILABLE, DEFAULT_CONCURRENCY, AsyncTransport, run_in_event_loop
+from .git_mirror import DEFAULT_FETCH_JOBS, GitMirror, default_mirror_dir
+from .http_cache import DEFAULT_MAX_MB as DEFAULT_HTTP_CACHE_MB, HTTPCache
+from .http_transport import DEFAULT_POOL_SIZE, HTTPTransport, Steps
+from .ls_remote import TagProbe
+from .metrics import RunMetrics
+from .parallel_runner import ItemStream, run_in_threads
+from .rate_limiter import RateLimiter
+from .release_plan import DEFAULT_PLAN_MAX_AGE_HOURS, PlanEntry, ReleasePlan
+from .repo_discovery import RepoFilter
+from .retry_policy import DEFAULT_BASE_DELAY, DEFAULT_MAX_DELAY, DEFAULT_RETRIES, RetryPolicy
+from .run_journal import RunJournal, default_journal_path, is_unfinished
+from .run_results import RepoResult, RepoStatus
+from .state_store import StateStore, default_state_path
+from .webhook_server import DEFAULT_PORT as DEFAULT_WEBHOOK_PORT, DEFAULT_QUEUE_SIZE, TagEvent, WebhookServer
+
+
+def fail(message: str, *hints: str):
+    """Печатает ошибку аргументов с подсказками и завершает процесс с кодом 1."""
+    print(f"❌ Ошибка: {message}")
+    for hint in hints:
+        print(f"   {hint}")
+    sys.exit(1)
+
+
+def add_retry_arguments(parser: argparse.ArgumentParser):
+    """Флаги повторов при временных сбоях."""
+    parser.add_argument(
+        '--retries',
+        type=int,
+        default=DEFAULT_RETRIES,
+        help=f'Сколько раз повторять запрос после 5xx/обрыва соединения (429 - с --no-rate-limit) (по умолчанию: {DEFAULT_RETRIES})'
+    )
+    parser.add_argument(
+        '--retry-base-delay',
+        type=float,
+        default=DEFAULT_BASE_DELAY,
+        metavar='SECONDS',
+        help=f'Минимальная пауза перед повтором (по умолчанию: {DEFAULT_BASE_DELAY})'
+    )
+    parser.add_argument(
+        '--retry-max-delay',
+        type=float,
+        default=DEFAULT_MAX_DELAY,
+        metavar='SECONDS',
+        help=f'Максимальная пауза перед повтором (по умолчанию: {DEFAULT_MAX_DELAY})'
+    )
+
+
+def add_http_cache_arguments(parser: argparse.ArgumentParser):
+    """Флаги HTTP кэша GET ответов."""
+    parser.add_argument(
+        '--http-cache',
+        metavar='PATH',
+        help='Файл кэша GET ответов (по умолчанию: ~/.cache/release-creator/http_cache.sqlite)'
+    )
+    parser.add_argument(
+        '--http-cache-size',
+        type=int,
+        default=DEFAULT_HTTP_CACHE_MB,
+        metavar='MB',
+        help=f'Максимальный размер HTTP кэша в МБ (по умолчанию: {DEFAULT_HTTP_CACHE_MB})'
+    )
+    parser.add_argument(
+        '--no-http-cache',
+        action='store_true',
+        help='Не использовать HTTP кэш и условные запросы'
+    )
+
+
+def check_http_arguments(args):
+    """Проверяет флаги повторов и rate limit; при ошибке завершает процесс."""
+    if args.retries < 0 or args.retry_base_delay < 0 or args.retry_max_delay < args.retry_base_delay:
+        fail("неверные параметры повторов (--retries, --retry-base-delay, --retry-max-delay)")
+    if args.max_rps is not None and args.max_rps <= 0:
+        fail("--max-rps должен быть больше 0")
+    if args.engine == 'asyncio' and not ASYNC_AVAILABLE:
+        fail("для --engine asyncio нужен пакет aiohttp", "Установите его: pip install aiohttp")
+
+
+def build_http_parts(args) -> Tuple[Optional[HTTPCache], Optional[RateLimiter], Optional[RetryPolicy]]:
+    """HTTP кэш, rate limiter и политика повторов по флагам (None - выключено)."""
+    http_cache = None
+    if not args.no_http_cache:
+        http_cache = HTTPCache(args.http_cache, args.http_cache_size * 1024 * 1024)
+    limiter = None if args.no_rate_limit else RateLimiter(max_rps=args.max_rps)
+    retry = None
+    if args.retries > 0:
+        retry = RetryPolicy(args.retries, args.retry_base_delay, args.retry_max_delay)
+    return http_cache, limiter, retry
+
+
+def parse_listen_address(value: str) -> Tuple[str, int]:
+    """'[HOST:]PORT' -> (хост, порт); по умолчанию слушаются все интерфейсы."""
+    host, _, port = value.rpartition(':')
+    return host or '0.0.0.0', int(port)
+
+
+class ReleaseRun:
+    """
+    Один запуск инструмента: проверка аргументов, общие ресурсы (транспорт,
+    кэши, журнал, состояние, метрики) и обработка списка.
+
+    Ключ репозитория - то, что возвращает load_items: для GitHub пара
+    (owner, repo), для GitLab путь проекта. name() превращает ключ в полное
+    имя, под которым репозиторий записан в журнал, состояние и план,
+    key_for() - обратно.
+    """
+
+    provider = ''
+    # Слова для сообщений и справки
+    items = 'репозитории'
+    items_of = 'репозиториев'
+    counted = 'репозитори(ев)'
+    source_flags = '-f/-r'
+    # Флаг обхода организаций или групп и что он обходит
+    owners_flag = '--org'
+    owners_title = 'репозиториев организаций'
+    # Переменная с секретом webhook, разбор события и пользователь для git
+    secret_env = ''
+    event_parser: Callable[[Dict, Dict[str, str]], Optional[TagEvent]] = None
+    git_user = ''
+
+    def __init__(self, args, token: str):
+        self.args = args
+        self.token = token
+        self.manager = None
+        self.transport: Optional[HTTPTransport] = None
+        self.http_cache: Optional[HTTPCache] = None
+        self.limiter: Optional[RateLimiter] = None
+        self.retry: Optional[RetryPolicy] = None
+        self.journal: Optional[RunJournal] = None
+        self.state: Optional[StateStore] = None
+        self.mirror: Optional[GitMirror] = None
+        self.probe: Optional[TagProbe] = None
+        self.repo_filter: Optional[RepoFilter] = None
+        # Метрики собираются всегда (итоги показывают объем ответов), а
+        # записываются, только если их есть куда записать
+        self.metrics = RunMetrics(self.provider)
+        self.write_metrics = bool(args.metrics_file or args.metrics_json)
+        # Записи плана (--apply) и план, который составляет запуск (--plan)
+        self.planned: Dict[Hashable, PlanEntry] = {}
+        self.new_plan: Optional[ReleasePlan] = None
+        self.max_age = args.plan_max_age * 3600
+        self.resumed = 0
+
+    # Флаги командной строки
+
+    @classmethod
+    def add_filter_arguments(cls, parser: argparse.ArgumentParser):
+        """Фильтры обхода организаций или групп."""
+        parser.add_argument(
+            '--topic',
+            action='append',
+            metavar='TOPIC',
+            help=f'Только {cls.items} с этой темой (можно указать несколько раз - нужны все)'
+        )
+        parser.add_argument(
+            '--include-archived',
+            action='store_true',
+            help=f'Не пропускать архивные {cls.items}'
+        )
+        parser.add_argument(
+            '--name-pattern',
+            action='append',
+            metavar='GLOB',
+            help=f'Только {cls.items}, имя или полный путь которых подходит под шаблон '
+                 '(например, "*-service"; можно указать несколько раз)'
+        )
+
+    @classmethod
+    def add_connection_arguments(cls, parser: argparse.ArgumentParser):
+        """Соединения и параллельность."""
+        parser.add_argument(
+            '--pool-size',
+            type=int,
+            default=DEFAULT_POOL_SIZE,
+            help=f'Максимум keep-alive соединений к API (по умолчанию: {DEFAULT_POOL_SIZE})'
+        )
+        parser.add_argument(
+            '-w', '--workers',
+            type=int,
+            default=1,
+            help=f'Количество {cls.items_of}, обрабатываемых параллельно (по умолчанию: 1)'
+        )
+        parser.add_argument(
+            '--engine',
+            choices=['threads', 'asyncio'],
+            default='threads',
+            help='Движок выполнения: пул потоков (--workers) или asyncio (--concurrency, нужен aiohttp)'
+        )
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=DEFAULT_CONCURRENCY,
+            help=f'Максимум одновременных запросов для --engine asyncio (по умолчанию: {DEFAULT_CONCURRENCY})'
+        )
+
+    @classmethod
+    def add_mirror_arguments(cls, parser: argparse.ArgumentParser, default_remote: str):
+        """Локальные git зеркала и git ls-remote."""
+        parser.add_argument(
+            '--git-mirror',
+            metavar='DIR',
+            nargs='?',
+            const=default_mirror_dir(),
+            help='Читать теги и коммиты для заметок из локальных git зеркал, обновляемых '
+                 'перед запуском (по умолчанию: ~/.cache/release-creator/mirrors); '
+                 'через API идут только проверка и создание релиза'
+        )
+        parser.add_argument(
+            '--mirror-url',
+            metavar='TEMPLATE',
+            help='Адрес репозитория для git с {repo}, например file:///srv/git/{repo}.git '
+                 f'(для --git-mirror и --discovery ls-remote; по умолчанию: {default_remote})'
+        )
+        parser.add_argument(
+            '--mirror-jobs',
+            type=int,
+            default=DEFAULT_FETCH_JOBS,
+            help=f'Одновременных процессов git: fetch зеркал и ls-remote (по умолчанию: {DEFAULT_FETCH_JOBS})'
+        )
+
+    @classmethod
+    def add_run_arguments(cls, parser: argparse.ArgumentParser, secret_help: str):
+        """Rate limit, повторы, журнал, демон, план, состояние, кэш и метрики."""
+        # Rate limit
+        parser.add_argument(
+            '--max-rps',
+            type=float,
+            help='Потолок запросов в секунду к API (по умолчанию: по заголовкам rate limit)'
+        )
+        parser.add_argument(
+            '--no-rate-limit',
+            action='store_true',
+            help='Не следить за rate limit (403/429 сразу считаются ошибкой)'
+        )
+
+        # Повторы при временных сбоях
+        add_retry_arguments(parser)
+
+        # Журнал запуска
+        parser.add_argument(
+            '--journal',
+            help=f'Файл журнала запуска (по умолчанию: ~/.cache/release-creator/{cls.provider}_journal.jsonl, '
+                 'для --apply - <план>.journal.jsonl; --plan журнал не ведет)'
+        )
+        parser.add_argument(
+            '--resume',
+            action='store_true',
+            help=f'Продолжить прерванный запуск: пропустить обработанные {cls.items}, '
+                 'взять теги и заметки из журнала'
+        )
+        parser.add_argument(
+            '--no-journal',
+            action='store_true',
+            help='Не вести журнал запуска'
+        )
+        parser.add_argument(
+            '--fresh',
+            action='store_true',
+            help='Начать журнал заново, даже если он остался от прерванного запуска '
+                 '(без --fresh и --resume такой журнал не перезаписывается)'
+        )
+
+        # Демон приема webhook событий
+        parser.add_argument(
+            '--serve',
+            metavar='[HOST:]PORT',
+            nargs='?',
+            const=str(DEFAULT_WEBHOOK_PORT),
+            help=f'Работать демоном: создавать релизы по webhook событиям о новых тегах '
+                 f'(по умолчанию порт {DEFAULT_WEBHOOK_PORT}); {cls.source_flags} ограничивают '
+                 f'список {cls.items_of}'
+        )
+        parser.add_argument(
+            '--webhook-secret',
+            help=f'{secret_help} (или переменная {cls.secret_env})'
+        )
+        parser.add_argument(
+            '--queue-size',
+            type=int,
+            default=DEFAULT_QUEUE_SIZE,
+            help=f'Максимум событий в очереди; при переполнении - 503 '
+                 f'(по умолчанию: {DEFAULT_QUEUE_SIZE})'
+        )
+
+        # План и применение
+        parser.add_argument(
+            '--plan',
+            metavar='PATH',
+            help='Только обнаружение (теги, проверка релиза, заметки): вместо создания '
+                 'записать релизы к созданию в файл плана'
+        )
+        parser.add_argument(
+            '--apply',
+            metavar='PATH',
+            help=f'Создать релизы по файлу плана; {cls.source_flags} ограничивают список {cls.items_of}'
+        )
+        parser.add_argument(
+            '--plan-max-age',
+            type=float,
+            default=DEFAULT_PLAN_MAX_AGE_HOURS,
+            metavar='HOURS',
+            help=f'Записи плана старше этого возраста перед созданием перепроверяются '
+                 f'(по умолчанию: {DEFAULT_PLAN_MAX_AGE_HOURS:g} ч; 0 - перепроверять все)'
+        )
+
+        # Состояние между запусками
+        parser.add_argument(
+            '--changed-only',
+            action='store_true',
+            help=f'Обрабатывать дальше только {cls.items}, у которых последний тег '
+                 'изменился с прошлого запуска'
+        )
+        parser.add_argument(
+            '--state',
+            help='Файл состояния между запусками (по умолчанию: '
+                 f'~/.cache/release-creator/{cls.provider}_state.sqlite)'
+        )
+        parser.add_argument(
+            '--no-state',
+            action='store_true',
+            help='Не сохранять состояние между запусками'
+        )
+
+        # HTTP кэш
+        add_http_cache_arguments(parser)
+
+        # Метрики
+        parser.add_argument(
+            '--metrics-file',
+            metavar='PATH',
+            help='Записать метрики запросов и этапов в формате Prometheus (например, в каталог '
+                 f'textfile collector node_exporter: .../release_creator_{cls.provider}.prom)'
+        )
+        parser.add_argument(
+            '--metrics-json',
+            metavar='PATH',
+            help='Записать метрики запросов и этапов в JSON отчет'
+        )
+
+        # Дополнительные опции
+        parser.add_argument(
+            '-v', '--verbose',
+            action='store_true',
+            help='Подробный вывод'
+        )
+
+    # Что зависит от платформы
+
+    @property
+    def owners(self) -> Optional[List[str]]:
+        """Организации или группы для обхода (--org/--group)."""
+        raise NotImplementedError
+
+    @property
+    def api_url(self) -> str:
+        """URL API без завершающего /, как он записывается в план."""
+        raise NotImplementedError
+
+    def name(self, key: Hashable) -> str:
+        return key
+
+    def key_for(self, name: str) -> Hashable:
+        return name
+
+    def source_given(self) -> bool:
+        """Указан ли список для обработки (кроме --serve и --apply)."""
+        raise NotImplementedError
+
+    def sources_hint(self) -> str:
+        """Чем можно указать список - для сообщения об ошибке."""
+        raise NotImplementedError
+
+    def default_remote(self) -> str:
+        """Шаблон адреса git репозитория с {repo}, если --mirror-url не указан."""
+        raise NotImplementedError
+
+    def load_items(self) -> List[Hashable]:
+        """Список из -f и других флагов источника."""
+        raise NotImplementedError
+
+    def build_manager(self):
+        raise NotImplementedError
+
+    def stream_owners(self, journal: Optional[RunJournal]) -> ItemStream:
+        """Репозитории организаций или групп, отданные в обработку по мере чтения."""
+        raise NotImplementedError
+
+    def seed_tags(self, name: str, tag_names: List[str]):
+        raise NotImplementedError
+
+    def process_steps(self, key: Hashable, event_tag: Optional[str] = None) -> Steps:
+        raise NotImplementedError
+
+    def apply_steps(self, key: Hashable, entry: PlanEntry, stale: bool) -> Steps:
+        raise NotImplementedError
+
+    def settings(self) -> List[str]:
+        """Строки настроек для подробного вывода."""
+        return []
+
+    def summary_lines(self) -> List[str]:
+        """Дополнительные строки итогов."""
+        return []
+
+    @property
+    def target(self) -> str:
+        """Куда создаются релизы - для заголовка обработки."""
+        return ''
+
+    # Ход запуска
+
+    def check_arguments(self):
+        """Проверяет аргументы; при ошибке завершает процесс."""
+        args = self.args
+        if sum(bool(mode) for mode in (args.plan, args.apply, args.serve)) > 1:
+            fail("--plan, --apply и --serve нельзя использовать вместе")
+        if not (self.source_given() or args.serve or args.apply):
+            fail(f"укажите {self.sources_hint()}, план через --apply или запустите демон через --serve")
+        if self.owners and (args.serve or args.apply):
+            fail(f"{self.owners_flag} нельзя использовать вместе с --serve и --apply")
+        if args.serve and not (args.webhook_secret or os.getenv(self.secret_env)):
+            fail("для --serve нужен секрет webhook",
+                 f"Укажите его через --webhook-secret или переменную {self.secret_env}")
+        if args.queue_size < 1:
+            fail("--queue-size должен быть не меньше 1")
+        check_http_arguments(args)
+        if min(args.workers, args.concurrency, args.max_tag_pages, args.mirror_jobs) < 1:
+            fail("--workers, --concurrency, --max-tag-pages и --mirror-jobs должны быть не меньше 1")
+        if args.mirror_url and '{repo}' not in args.mirror_url:
+            fail("в --mirror-url должен быть {repo}")
+        if (args.git_mirror or args.discovery == 'ls-remote') and not shutil.which('git'):
+            fail("для --git-mirror и --discovery ls-remote нужен git")
+        if args.discovery == 'ls-remote' and args.tag_order != 'semver':
+            fail("git ls-remote отдает теги по имени и без дат, с ним работает только --tag-order semver")
+        if args.plan_max_age < 0:
+            fail("--plan-max-age не может быть отрицательным")
+        if args.changed_only and args.no_state:
+            fail("--changed-only нельзя использовать вместе с --no-state")
+        if args.resume and args.no_journal:
+            fail("--resume нельзя использовать вместе с --no-journal")
+        if args.fresh and (args.resume or args.no_journal):
+            fail("--fresh нельзя использовать вместе с --resume и --no-journal")
+
+    def load_plan(self, items: List[Hashable]) -> List[Hashable]:
+        """Записи плана --apply; -f и флаги источника ограничивают, какие из них применять."""
+        args = self.args
+        try:
+            plan = ReleasePlan.load(args.apply, self.provider, self.api_url)
+        except (OSError, ValueError) as e:
+            fail(f"не удалось прочитать план {args.apply}: {e}")
+        print(f"📝 {plan.report()}")
+        selected = set(items)
+        for entry in plan.entries:
+            key = self.key_for(entry.repo)
+            if not selected or key in selected:
+                self.planned[key] = entry
+        return list(self.planned)
+
+    def print_settings(self):
+        args = self.args
+        print(f"\n⚙️  Настройки:")
+        for line in self.settings():
+            print(f"   - {line}")
+        if args.engine == 'asyncio':
+            print(f"   - Движок: asyncio, одновременных запросов: {args.concurrency}")
+        else:
+            print(f"   - Параллельных потоков: {args.workers}")
+        print(f"   - Обнаружение тегов: {args.discovery}, выбор тега: {args.tag_order}")
+
+    def journal_path(self) -> str:
+        """Журнал --apply лежит рядом с планом, у обычного запуска - общий для платформы."""
+        if self.args.journal:
+            return self.args.journal
+        if self.args.apply:
+            return f'{self.args.apply}.journal.jsonl'
+        return default_journal_path(self.provider)
+
+    def open_journal(self, items: List[Hashable]) -> List[Hashable]:
+        """Открывает журнал запуска; при --resume убирает из списка уже обработанное."""
+        args = self.args
+        # Демон работает по событиям, а --plan ничего не создает: продолжать нечего
+        if args.no_journal or args.serve or args.plan:
+            return items
+        path = self.journal_path()
+        if not (args.resume or args.fresh) and is_unfinished(path):
+            fail(f"журнал {path} остался от прерванного запуска",
+                 "Продолжите запуск через --resume или начните заново через --fresh")
+        self.journal = RunJournal(path, resume=args.resume)
+        if args.resume and self.owners:
+            print(f"↩️  Продолжение запуска: уже обработанные {self.items} будут пропущены")
+        elif args.resume:
+            remaining = [key for key in items if not self.journal.is_done(self.name(key))]
+            self.resumed = len(items) - len(remaining)
+            print(f"↩️  Продолжение запуска: {self.resumed} {self.counted} уже обработано, "
+                  f"осталось {len(remaining)}")
+            return remaining
+        return items
+
+    def discover(self, items: List[Hashable]):
+        """Пакетное обнаружение тегов до обработки (--discovery)."""
+        args = self.args
+        if args.discovery == 'ls-remote':
+            # Теги через git ls-remote: запросы тегов к API не нужны, а
+            # репозитории, для которых ls-remote не удался, идут через API
+            self.probe = TagProbe(args.mirror_url or self.default_remote(),
+                                  auth=(self.git_user, self.token), tag_order=args.tag_order)
+            print(f"\n🔎 Поиск тегов через git ls-remote ({len(items)})...")
+            found = self.probe.probe_all([self.name(key) for key in items], args.mirror_jobs)
+            for name, tags in found.items():
+                self.seed_tags(name, [tag.name for tag in tags])
+            print(f"✓ {self.probe.report()}")
+            if args.verbose:
+                for name, error in self.probe.failed.items():
+                    print(f"   ⚠️  {name}: {error}, будет использован API")
+            self.metrics.observe_stage('discovery', self.probe.probe_time)
+
+    def handle_steps(self, key: Hashable, event_tag: Optional[str] = None) -> Steps:
+        """Шаги обработки репозитория; непредвиденные ошибки превращаются в RepoResult."""
+        try:
+            if self.args.apply:
+                entry = self.planned[key]
+                result = yield from self.apply_steps(key, entry, entry.is_stale(self.max_age))
+            else:
+                result = yield from self.process_steps(key, event_tag)
+        except Exception as e:
+            print(f"❌ Непредвиденная ошибка при обработке {self.name(key)}: {e}")
+            result = RepoResult(self.name(key)).fail(f'непредвиденная ошибка: {e}')
+        if self.journal is not None:
+            self.journal.finish(result)
+        if self.state is not None:
+            self.state.update(result)
+        self.metrics.observe_result(result)
+        if self.new_plan is not None:
+            self.new_plan.add(result)
+        return result
+
+    def close(self):
+        """Закрывает соединения и сохраняет кэши, журнал и состояние."""
+        if self.transport is not None:
+            self.transport.close()
+        if self.http_cache is not None:
+            self.http_cache.close()
+        if self.journal is not None:
+            self.journal.close()
+        if self.state is not None:
+            self.state.close()
+
+    def write_metrics_file(self, indent: str = ''):
+        try:
+            self.metrics.write(self.args.metrics_file, self.args.metrics_json)
+        except OSError as e:
+            print(f"{indent}⚠️  Не удалось записать метрики: {e}")
+
+    def run(self):
+        """Выполняет запуск целиком и завершает процесс с кодом возврата."""
+        args = self.args
+        self.check_arguments()
+
+        # Транспорт; соединений в пуле не меньше, чем потоков. Он нужен уже
+        # load_items (прогрев кэшей), так что создается до списка
+        self.http_cache, self.limiter, self.retry = build_http_parts(args)
+        self.transport = HTTPTransport(pool_size=max(args.pool_size, args.workers),
+                                       cache=self.http_cache, limiter=self.limiter,
+                                       retry=self.retry, metrics=self.metrics)
+
+        items = self.load_items()
+        if args.apply:
+            items = self.load_plan(items)
+            if not items:
+                print("✅ По плану создавать нечего")
+                sys.exit(0)
+        if not items and not (args.serve or self.owners):
+            fail(f"список {self.items_of} для обработки пуст")
+        if items:
+            print(f"✓ Загружено {len(items)} {self.counted}")
+
+        if args.verbose:
+            self.print_settings()
+
+        # Журнал запуска: при --resume уже обработанное пропускается
+        items = self.open_journal(items)
+
+        # Теги, для которых релиз уже был, по итогам прошлых запусков
+        if not args.no_state:
+            self.state = StateStore(args.state or default_state_path(self.provider))
+
+        # Git зеркала; --apply теги не читает, и зеркала ему не нужны
+        if args.git_mirror and not args.apply:
+            self.mirror = GitMirror(args.git_mirror, args.mirror_url or self.default_remote(),
+                                    auth=(self.git_user, self.token), tag_order=args.tag_order)
+        self.manager = self.build_manager()
+
+        # Репозитории организаций или групп приходят в обработку по мере чтения списка
+        if self.owners:
+            self.repo_filter = RepoFilter(args.topic, args.include_archived, args.name_pattern)
+            print(f"\n🏢 Обход {self.owners_title}: {', '.join(self.owners)}")
+            items = self.stream_owners(self.journal if args.resume else None)
+            if args.discovery != 'rest' or self.mirror is not None:
+                # Пакетным этапам обнаружения нужен весь список сразу
+                items = list(items)
+                print(f"✓ {self.repo_filter.report()}")
+
+        if self.mirror is not None and items and not args.serve:
+            print(f"\n🪞 Обновление git зеркал ({len(items)}) в {args.git_mirror}...")
+            self.mirror.sync_all([self.name(key) for key in items], args.mirror_jobs)
+            print(f"✓ {self.mirror.report()}")
+            if args.verbose:
+                for name, error in self.mirror.failed.items():
+                    print(f"   ⚠️  {name}: {error}")
+            self.metrics.observe_stage('mirror', self.mirror.sync_time)
+
+        # Демону тег сообщает само событие, а --apply берет его из плана
+        if not (args.serve or args.apply):
+            self.discover(items)
+
+        if args.plan:
+            self.new_plan = ReleasePlan(self.provider, self.api_url)
+
+        if args.serve:
+            self.serve(items)
+        self.process_all(items)
+
+    def serve(self, items: List[Hashable]):
+        """
+        Демон: релиз создается по событию о новом теге через тот же транспорт,
+        так что соединения с API остаются прогретыми. Работает до Ctrl+C.
+        """
+        args = self.args
+
+        def process_event(event: TagEvent) -> RepoResult:
+            print(f"\n🔔 Новый тег {event.tag} в {event.repo}")
+            if self.mirror is not None:
+                # Событие означает новый тег: зеркало обновляется перед обработкой
+                self.mirror.sync_all([event.repo], 1)
+            # Релиз - для тега из события, даже если он младше последнего
+            result = self.transport.drive(self.handle_steps(self.key_for(event.repo), event.tag))
+            if self.write_metrics:
+                # Демон работает долго: метрики обновляются после каждого события;
+                # ошибка записи не должна превращать созданный релиз в ошибку события
+                self.write_metrics_file()
+            return result
+
+        allowed = {self.name(key) for key in items}
+        address = parse_listen_address(args.serve)
+        server = WebhookServer(address, self.event_parser,
+                               args.webhook_secret or os.getenv(self.secret_env), process_event,
+                               workers=args.workers, queue_size=args.queue_size,
+                               accept=(lambda repo: repo in allowed) if allowed else None)
+        print(f"🔔 Прием webhook событий на http://{address[0]}:{address[1]}/ "
+              f"(обработчиков: {args.workers}, очередь: {args.queue_size})")
+        if allowed:
+            print(f"   Принимаются события только для {len(allowed)} {self.counted} из списка")
+        server.serve()
+
+        self.close()
+        print(f"📊 {server.report()}")
+        print(f"📶 {self.metrics.traffic_report()}")
+        if self.write_metrics:
+            print(f"📈 {self.metrics.report()}")
+            self.write_metrics_file()
+        sys.exit(0)
+
+    def process_all(self, items):
+        """Обрабатывает список, печатает итоги и завершает процесс."""
+        args = self.args
+        if args.plan:
+            print(f"\n📝 Составляем план релизов{self.target}...")
+        else:
+            print(f"\n🚀 Начинаем создание релизов{self.target}...")
+        print("=" * 60)
+
+        # Обрабатываем список; вывод каждого репозитория печатается одним блоком
+        if args.engine == 'asyncio':
+            results = run_in_event_loop(self.handle_steps, items,
+                                        AsyncTransport(concurrency=args.concurrency,
+                                                       cache=self.http_cache, limiter=self.limiter,
+                                                       retry=self.retry, metrics=self.metrics))
+        else:
+            results = run_in_threads(lambda key: self.transport.drive(self.handle_steps(key)),
+                                     items, args.workers)
+
+        # Статус уже известен из результата - повторные запросы к API не нужны
+        counts: Dict[RepoStatus, int] = {}
+        errors = []
+        for _, result, output in results:
+            sys.stdout.write(output)
+            counts[result.status] = counts.get(result.status, 0) + 1
+            if result.status is RepoStatus.ERROR:
+                errors.append(result)
+        if self.journal is not None:
+            self.journal.complete()
+        total = sum(counts.values())
+        failed = len(errors)
+        no_tags = counts.get(RepoStatus.NO_TAGS, 0)
+
+        self.close()
+
+        # Выводим итоги
+        print("\n" + "=" * 60)
+        print(f"\n📊 Итоги:")
+        if args.plan:
+            print(f"   📝 Запланировано: {counts.get(RepoStatus.PLANNED, 0)}")
+        else:
+            print(f"   ✅ Успешно создано: {counts.get(RepoStatus.CREATED, 0)}")
+        if counts.get(RepoStatus.ALREADY_EXISTS):
+            print(f"   ⏭️  Пропущено (уже существуют): {counts[RepoStatus.ALREADY_EXISTS]}")
+        if no_tags:
+            print(f"   🏷️  Без тегов: {no_tags}")
+        if counts.get(RepoStatus.UNCHANGED):
+            print(f"   💤 Без изменений с прошлого запуска: {counts[RepoStatus.UNCHANGED]}")
+        print(f"   ❌ Ошибок: {failed}")
+        print(f"   📦 Всего {self.items_of}: {total}")
+        if self.repo_filter is not None:
+            print(f"   🏢 {self.repo_filter.report()}")
+            if isinstance(items, ItemStream):
+                # Подошедшие под фильтр, но не отданные в обработку, обработаны до прерывания
+                self.resumed = self.repo_filter.matched - items.count
+        if self.resumed:
+            print(f"   ↩️  Обработано до прерывания: {self.resumed}")
+        if self.journal is not None and self.journal.reused:
+            print(f"   📓 {self.journal.report()}")
+        if self.http_cache is not None:
+            print(f"   🗄️  {self.http_cache.report()}")
+        if self.limiter is not None and (self.limiter.waited >= 0.1 or self.limiter.throttled):
+            print(f"   ⏳ {self.limiter.report()}")
+        if self.retry is not None and self.retry.retried:
+            print(f"   🔁 {self.retry.report()}")
+        if self.mirror is not None:
+            print(f"   🪞 {self.mirror.report()}")
+        if self.probe is not None:
+            print(f"   🔎 {self.probe.report()}")
+        for line in self.summary_lines():
+            print(f"   {line}")
+        print(f"   📶 {self.metrics.traffic_report()}")
+        if self.write_metrics:
+            print(f"   📈 {self.metrics.report()}")
+            self.write_metrics_file('   ')
+        if self.new_plan is not None:
+            try:
+                self.new_plan.save(args.plan)
+                print(f"   📝 {self.new_plan.report()}, сохранен в {args.plan}")
+            except OSError as e:
+                print(f"   ❌ Не удалось записать план {args.plan}: {e}")
+                failed += 1
+
+        if args.verbose and errors:
+            print(f"\n❌ Причины ошибок:")
+            for result in errors:
+                print(f"   - {result.repo}: {result.error}")
+
+        # Код возврата: репозитории без тегов, как и раньше, считаются неудачей
+        sys.exit(0 if failed + no_tags == 0 else 1)
@@ -0,0 +1,250 @@
+"""
+Локальные git зеркала: теги и коммиты без запросов к API.
+
+Для автоматических заметок дороже всего (и больше всего расходует
+rate limit) чтение тегов и списка коммитов между ними через API. С
+зеркалами каждый репозиторий хранится как bare репозиторий в локальном
+кэше; перед обработкой все зеркала параллельно обновляются
+инкрементальным git fetch тегов, а последний и предыдущий теги и
+коммиты между ними вычисляются локально. Через API идут только проверка
+и создание релиза.
+
+Первый раз зеркало клонируется без содержимого файлов (--filter=blob:none),
+если сервер это поддерживает: для тегов и журнала коммитов нужны только
+сами коммиты. Адрес клонирования задается шаблоном с {repo}, так что
+зеркала работают и с локальными file:// репозиториями.
+"""
+
+import base64
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from .parallel_runner import run_in_threads
+from .records import Tag
+from .tag_selection import TagSelector
+
+
+DEFAULT_FETCH_JOBS = 8
+# Потолок на один git clone/fetch, секунды
+DEFAULT_FETCH_TIMEOUT = 600.0
+
+TAG_FORMAT = '%(refname:strip=2)%00%(objectname)%00%(*objectname)%00' \
+             '%(committerdate:iso-strict)%00%(*committerdate:iso-strict)'
+LOG_FORMAT = '%H%x00%an%x00%ae%x00%aI%x00%B%x1e'
+
+
+def default_mirror_dir() -> str:
+    """~/.cache/release-creator/mirrors (с учетом XDG_CACHE_HOME)."""
+    base = os.getenv('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'release-creator', 'mirrors')
+
+
+class GitMirrorError(Exception):
+    """Зеркало не удалось обновить или прочитать."""
+
+
+def git_env(auth: Optional[Tuple[str, str]] = None) -> Dict[str, str]:
+    """
+    Окружение для git без интерактивных запросов пароля.
+
+    Args:
+        auth: (пользователь, токен) для HTTP Basic; токен передается
+            через окружение, а не в командной строке
+    """
+    env = dict(os.environ, GIT_TERMINAL_PROMPT='0')
+    if auth is not None:
+        credentials = base64.b64encode(f'{auth[0]}:{auth[1]}'.encode()).decode()
+        env.update(GIT_CONFIG_COUNT='1', GIT_CONFIG_KEY_0='http.extraHeader',
+                   GIT_CONFIG_VALUE_0=f'Authorization: Basic {credentials}')
+    return env
+
+
+def run_git(args: List[str], env: Dict[str, str], timeout: float,
+            cwd: Optional[str] = None) -> str:
+    """
+    Выполняет git и возвращает его вывод.
+
+    Raises:
+        GitMirrorError: git не запустился, не уложился в timeout или завершился с ошибкой
+    """
+    try:
+        completed = subprocess.run(['git', *args], cwd=cwd, env=env, stdin=subprocess.DEVNULL,
+                                   capture_output=True, timeout=timeout)
+    except (OSError, subprocess.TimeoutExpired) as e:
+        raise GitMirrorError(f'git {args[0]}: {e}') from e
+    if completed.returncode != 0:
+        lines = completed.stderr.decode('utf-8', 'replace').strip().splitlines()
+        # Причину git пишет в строке fatal:, за ней бывают подсказки
+        reason = next((line for line in lines if line.startswith('fatal:')),
+                      lines[-1] if lines else f'код {completed.returncode}')
+        raise GitMirrorError(f'git {args[0]}: {reason}')
+    return completed.stdout.decode('utf-8', 'replace')
+
+
+class GitMirror:
+    def __init__(self, root: str, url_template: str, auth: Optional[Tuple[str, str]] = None,
+                 tag_order: str = 'semver', timeout: float = DEFAULT_FETCH_TIMEOUT):
+        """
+        Инициализация зеркал.
+
+        Args:
+            root: Каталог зеркал (внутри - подкаталог на хост)
+            url_template: Адрес клонирования с {repo}, например
+                https://github.com/{repo}.git или file:///srv/git/{repo}
+            auth: (пользователь, токен) для HTTP Basic; токен передается
+                git через окружение, а не в командной строке
+            tag_order: Как выбирать последний тег (как в TagSelector)
+            timeout: Потолок на один git clone/fetch, секунды
+        """
+        self.root = root
+        self.url_template = url_template
+        self.tag_order = tag_order
+        self.timeout = timeout
+        self.env = git_env(auth)
+        # Репозиторий -> путь зеркала; только успешно обновленные за запуск
+        self.synced: Dict[str, str] = {}
+        # Репозиторий -> причина, по которой зеркало не обновилось
+        self.failed: Dict[str, str] = {}
+        self.cloned = 0
+        self.sync_time = 0.0
+        # Демон --serve обновляет зеркала из нескольких обработчиков сразу
+        self._lock = threading.Lock()
+
+    def url_for(self, repo: str) -> str:
+        return self.url_template.format(repo=repo)
+
+    def path_for(self, repo: str) -> str:
+        """Каталог зеркала: <root>/<хост>/<owner>/<repo>.git."""
+        host = urlsplit(self.url_for(repo)).netloc.replace(':', '_') or 'local'
+        return os.path.join(self.root, host, *repo.split('/')) + '.git'
+
+    def _git(self, *args: str, cwd: Optional[str] = None) -> str:
+        return run_git(list(args), self.env, self.timeout, cwd=cwd)
+
+    def sync(self, repo: str) -> bool:
+        """
+        Создает или инкрементально обновляет зеркало репозитория.
+
+        Returns:
+            True, если зеркало клонировано впервые
+
+        Raises:
+            GitMirrorError: git завершился с ошибкой
+        """
+        path = self.path_for(repo)
+        cloned = not os.path.isdir(path)
+        if cloned:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Клонирование во временный каталог: прерванный clone не
+            # оставит полупустое зеркало, которое потом сочтется готовым.
+            # Каталог свой у каждого вызова - тот же репозиторий могут
+            # клонировать одновременно другой поток или процесс
+            tmp = tempfile.mkdtemp(dir=os.path.dirname(path),
+                                   prefix=f'.{os.path.basename(path)}.', suffix='.tmp')
+            try:
+                self._git('clone', '--bare', '--quiet', '--filter=blob:none',
+                          self.url_for(repo), tmp)
+                os.replace(tmp, path)
+            except GitMirrorError:
+                shutil.rmtree(tmp, ignore_errors=True)
+                raise
+            except OSError:
+                shutil.rmtree(tmp, ignore_errors=True)
+                # Зеркало успел создать параллельный clone - им и пользуемся
+                if not os.path.isdir(path):
+                    raise
+                cloned = False
+        # Удаленные на сервере теги удаляются и из зеркала, перемещенные - обновляются
+        self._git('fetch', '--quiet', '--prune', '--force', 'origin',
+                  '+refs/tags/*:refs/tags/*', cwd=path)
+        return cloned
+
+    def _sync_one(self, repo: str) -> Tuple[Optional[bool], Optional[str]]:
+        """sync для пула потоков: ошибка возвращается, а не пробрасывается."""
+        try:
+            return self.sync(repo), None
+        except (GitMirrorError, OSError) as e:
+            return None, str(e)
+
+    def sync_all(self, repos: Iterable[str], jobs: int = DEFAULT_FETCH_JOBS):
+        """Параллельно обновляет зеркала; неудачи попадают в failed."""
+        started = time.monotonic()
+        for repo, (cloned, error), _ in run_in_threads(self._sync_one, repos, jobs):
+            with self._lock:
+                if error is not None:
+                    # Устаревшее зеркало хуже API: оно не знает о новых тегах
+                    self.synced.pop(repo, None)
+                    self.failed[repo] = error
+                    continue
+                self.failed.pop(repo, None)
+                self.synced[repo] = self.path_for(repo)
+                self.cloned += cloned
+        with self._lock:
+            self.sync_time += time.monotonic() - started
+
+    def _path(self, repo: str) -> str:
+        path = self.synced.get(repo)
+        if path is None:
+            raise GitMirrorError(self.failed.get(repo, 'зеркало не обновлялось в этом запуске'))
+        return path
+
+    def release_tags(self, repo: str, below: Optional[str] = None) -> List[Tag]:
+        """
+        Последний и предыдущий теги из зеркала.
+
+        Теги передаются в TagSelector в том же виде, что и из API: имя
+        и коммит с датой, так что выбор по semver или дате работает как
+        обычно, а api означает "сначала самые новые". С below выбираются
+        теги до указанного (см. TagSelector).
+
+        Raises:
+            GitMirrorError: зеркала нет или git завершился с ошибкой
+        """
+        output = self._git('for-each-ref', '--sort=-creatordate', f'--format={TAG_FORMAT}',
+                           'refs/tags', cwd=self._path(repo))
+        tags = []
+        for line in output.splitlines():
+            name, sha, peeled_sha, date, peeled_date = line.split('\0')
+            # У аннотированного тега коммит и дата - у объекта, на который он указывает
+            tags.append({'name': name, 'commit': {'id': peeled_sha or sha,
+                                                  'created_at': peeled_date or date}})
+        selector = TagSelector(self.tag_order, below=below)
+        selector.feed(tags)
+        return selector.selected
+
+    def commits(self, repo: str, previous_tag: str, current_tag: str) -> List[Dict]:
+        """
+        Коммиты между тегами (старые первыми, как в compare).
+
+        Returns:
+            Словари sha, author_name, author_email, authored_date, message
+
+        Raises:
+            GitMirrorError: зеркала нет или git завершился с ошибкой
+        """
+        output = self._git('log', '--reverse', f'--format={LOG_FORMAT}',
+                           f'refs/tags/{previous_tag}..refs/tags/{current_tag}', '--',
+                           cwd=self._path(repo))
+        commits = []
+        for record in output.split('\x1e'):
+            record = record.strip('\n')
+            if not record:
+                continue
+            sha, author_name, author_email, authored_date, message = record.split('\0', 4)
+            commits.append({'sha': sha, 'author_name': author_name, 'author_email': author_email,
+                            'authored_date': authored_date, 'message': message.strip()})
+        return commits
+
+    def report(self) -> str:
+        """Строка для итогов запуска."""
+        line = (f'Git зеркала: обновлено {len(self.synced)} (новых {self.cloned}) '
+                f'за {self.sync_time:.1f} с')
+        if self.failed:
+            line += f', не удалось {len(self.failed)} (используется API)'
+        return line
@@ -0,0 +1,226 @@
+"""
+Постоянный кэш GET ответов с условными запросами.
+
+Ответы с ETag или Last-Modified сохраняются в SQLite. При следующем
+запросе того же URL транспорт отправляет If-None-Match/If-Modified-Since,
+и если сервер ответил 304, тело берется из кэша. GitHub не учитывает
+304 ответы в rate limit, так что ночной прогон, в котором ничего не
+изменилось, почти не тратит ни трафик, ни квоту.
+
+Размер кэша ограничен: при превышении удаляются записи, к которым
+дольше всего не обращались (LRU).
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+
+DEFAULT_MAX_MB = 100
+
+# Заголовки, от которых зависит содержимое ответа (разные токены видят разное)
+KEY_HEADERS = ('Authorization', 'PRIVATE-TOKEN', 'Accept')
+# Заголовки ответа, которые хранятся вместе с телом: без ссылок на следующую
+# страницу постраничный обход остановился бы на первой же странице из кэша
+STORED_HEADERS = ('Content-Type', 'Link', 'X-Next-Page')
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    url TEXT NOT NULL,
+    etag TEXT,
+    last_modified TEXT,
+    headers TEXT NOT NULL,
+    body BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    accessed REAL NOT NULL
+)
+'''
+
+
+def default_cache_path() -> str:
+    """~/.cache/release-creator/http_cache.sqlite (с учетом XDG_CACHE_HOME)."""
+    base = os.getenv('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'release-creator', 'http_cache.sqlite')
+
+
+class CacheEntry:
+    """Сохраненный ответ: валидаторы, заголовки и тело."""
+
+    __slots__ = ('key', 'etag', 'last_modified', 'headers', 'body')
+
+    def __init__(self, key: str, etag: Optional[str], last_modified: Optional[str],
+                 headers: Dict[str, str], body: bytes):
+        self.key = key
+        self.etag = etag
+        self.last_modified = last_modified
+        self.headers = headers
+        self.body = body
+
+
+class HTTPCache:
+    def __init__(self, path: Optional[str] = None, max_bytes: int = DEFAULT_MAX_MB * 1024 * 1024):
+        """
+        Инициализация кэша.
+
+        Args:
+            path: Путь к файлу SQLite (по умолчанию default_cache_path())
+            max_bytes: Максимальный суммарный размер сохраненных тел
+        """
+        self.path = path or default_cache_path()
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.bytes_saved = 0
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        # Одно соединение на все потоки; доступ сериализуется self._lock
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('PRAGMA synchronous=NORMAL')
+        self._db.execute(SCHEMA)
+        self._db.commit()
+        self._total = self._db.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+        # Лимит мог уменьшиться с прошлого запуска
+        self._evict()
+        self._db.commit()
+
+    @staticmethod
+    def cache_key(method: str, url: str, params: Optional[Dict],
+                  headers: Optional[Dict[str, str]]) -> Tuple[str, str]:
+        """Возвращает (ключ, полный URL) запроса."""
+        full_url = requests.Request(method, url, params=params).prepare().url
+        headers = CaseInsensitiveDict(headers or {})
+        vary = '\n'.join(f'{name}:{headers.get(name, "")}' for name in KEY_HEADERS)
+        digest = hashlib.sha256(f'{method} {full_url}\n{vary}'.encode('utf-8')).hexdigest()
+        return digest, full_url
+
+    def lookup(self, key: str) -> Optional[CacheEntry]:
+        with self._lock:
+            row = self._db.execute(
+                'SELECT etag, last_modified, headers, body FROM responses WHERE key = ?',
+                (key,)).fetchone()
+        if row is None:
+            return None
+        etag, last_modified, headers, body = row
+        return CacheEntry(key, etag, last_modified, json.loads(headers), body)
+
+    @staticmethod
+    def conditional_headers(entry: CacheEntry) -> Dict[str, str]:
+        """Заголовки условного запроса для сохраненного ответа."""
+        headers = {}
+        if entry.etag:
+            headers['If-None-Match'] = entry.etag
+        if entry.last_modified:
+            headers['If-Modified-Since'] = entry.last_modified
+        return headers
+
+    def store(self, key: str, url: str, response: requests.Response):
+        """Сохраняет 200 ответ, если у него есть ETag или Last-Modified."""
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        if response.status_code != 200 or not (etag or last_modified):
+            return
+        body = response.content
+        size = len(body)
+        if size > self.max_bytes:
+            return
+        headers = json.dumps({name: response.headers[name] for name in STORED_HEADERS
+                              if name in response.headers})
+
+        with self._lock:
+            old = self._db.execute('SELECT size FROM responses WHERE key = ?', (key,)).fetchone()
+            self._db.execute(
+                'INSERT OR REPLACE INTO responses '
+                '(key, url, etag, last_modified, headers, body, size, accessed) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                (key, url, etag, last_modified, headers, body, size, time.time()))
+            self._total += size - (old[0] if old else 0)
+            self._evict()
+            self._db.commit()
+
+    def _evict(self):
+        """Удаляет самые давно использованные записи, пока кэш больше лимита."""
+        while self._total > self.max_bytes:
+            row = self._db.execute(
+                'SELECT key, size FROM responses ORDER BY accessed LIMIT 1').fetchone()
+            if row is None:
+                self._total = 0
+                return
+            self._db.execute('DELETE FROM responses WHERE key = ?', (row[0],))
+            self._total -= row[1]
+            self.evictions += 1
+
+    def revalidated(self, entry: CacheEntry, response: requests.Response) -> requests.Response:
+        """Превращает 304 ответ в 200 с телом из кэша."""
+        with self._lock:
+            self._db.execute('UPDATE responses SET accessed = ? WHERE key = ?',
+                             (time.time(), entry.key))
+            self._db.commit()
+            self.hits += 1
+            self.bytes_saved += len(entry.body)
+
+        cached = requests.Response()
+        cached.status_code = 200
+        cached.reason = 'OK'
+        cached.headers = CaseInsensitiveDict(response.headers)
+        cached.headers.update(entry.headers)
+        cached._content = entry.body
+        cached.url = response.url
+        cached.request = response.request
+        cached.from_cache = True
+        return cached
+
+    # ---- обертка вокруг отправки запроса (для HTTPTransport и AsyncTransport) ----
+
+    def prepare(self, method: str, url: str, headers: Optional[Dict[str, str]],
+                params: Optional[Dict]) -> Tuple[Optional[CacheEntry], Optional[str], Optional[str], Optional[Dict[str, str]]]:
+        """
+        Готовит запрос к отправке.
+
+        Returns:
+            (запись кэша или None, ключ, полный URL, заголовки с условиями);
+            для не-GET запросов ключ равен None и заголовки не меняются
+        """
+        if method != 'GET':
+            return None, None, None, headers
+        key, full_url = self.cache_key(method, url, params, headers)
+        entry = self.lookup(key)
+        if entry is None:
+            return None, key, full_url, headers
+        return entry, key, full_url, {**(headers or {}), **self.conditional_headers(entry)}
+
+    def complete(self, entry: Optional[CacheEntry], key: Optional[str], url: Optional[str],
+                 response: requests.Response) -> requests.Response:
+        """Обрабатывает ответ: 304 - тело из кэша, 200 - сохранить."""
+        if key is None:
+            return response
+        if entry is not None and response.status_code == 304:
+            return self.revalidated(entry, response)
+        with self._lock:
+            self.misses += 1
+        self.store(key, url, response)
+        return response
+
+    def report(self) -> str:
+        """Строка для итогов запуска."""
+        total = self.hits + self.misses
+        ratio = f'{100 * self.hits / total:.0f}%' if total else '-'
+        line = (f'HTTP кэш: {self.hits} попаданий (304), {self.misses} промахов ({ratio}), '
+                f'сэкономлено {self.bytes_saved / 1024:.0f} КБ')
+        if self.evictions:
+            line += f', вытеснено {self.evictions}'
+        return line
+
+    def close(self):
+        with self._lock:
+            self._db.close()
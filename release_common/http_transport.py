@@ -0,0 +1,234 @@
+"""
+HTTP транспорт для менеджеров релизов.
+
+Держит по одной keep-alive сессии requests.Session на каждый хост API,
+так что все запросы к одному хосту переиспользуют уже открытые TCP/TLS
+соединения вместо нового рукопожатия на каждый вызов.
+
+Методы менеджеров описаны как генераторы шагов: генератор отдает
+HTTPRequest и получает обратно ответ. HTTPTransport.drive выполняет такие
+шаги синхронно, а AsyncTransport из async_engine.py - в asyncio.
+
+Если транспорту передан HTTPCache (http_cache.py), GET запросы
+отправляются условными и 304 ответы подменяются телом из кэша. Если
+передан RateLimiter (rate_limiter.py), каждый запрос ждет бюджета
+rate limit, а отклоненные из-за лимита запросы повторяются. RetryPolicy
+(retry_policy.py) повторяет запросы после временных сбоев. Если передан
+RunMetrics (metrics.py), каждый запрос после всех повторов записывается
+в метрики.
+"""
+
+import threading
+import time
+from typing import Any, Dict, Generator, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+DEFAULT_POOL_SIZE = 10
+DEFAULT_TIMEOUT = 30
+USER_AGENT = 'release-creator'
+# Сколько раз повторять запрос, отклоненный из-за rate limit
+RATE_LIMIT_RETRIES = 5
+
+
+class HTTPRequest:
+    """Описание одного HTTP запроса, который отдает генератор шагов."""
+
+    __slots__ = ('method', 'url', 'headers', 'params', 'json', 'idempotent')
+
+    def __init__(self, method: str, url: str, headers: Optional[Dict[str, str]] = None,
+                 params: Optional[Dict] = None, json: Any = None, idempotent: bool = False):
+        self.method = method
+        self.url = url
+        self.headers = headers
+        self.params = params
+        self.json = json
+        # POST, который безопасно повторять (сервер сам отклонит дубликат)
+        self.idempotent = idempotent
+
+    def __repr__(self):
+        return f'HTTPRequest({self.method} {self.url})'
+
+
+# Генератор шагов: отдает HTTPRequest, получает ответ, возвращает результат
+Steps = Generator[HTTPRequest, requests.Response, Any]
+
+
+class HTTPTransport:
+    def __init__(self, pool_size: int = DEFAULT_POOL_SIZE,
+                 timeout: float = DEFAULT_TIMEOUT,
+                 headers: Optional[Dict[str, str]] = None,
+                 cache=None, limiter=None, retry=None, metrics=None):
+        """
+        Инициализация транспорта.
+
+        Args:
+            pool_size: Максимум keep-alive соединений к одному хосту
+            timeout: Таймаут запроса в секундах
+            headers: Заголовки по умолчанию для всех сессий
+            cache: HTTPCache для условных GET запросов (None - без кэша)
+            limiter: RateLimiter, через который проходят все запросы (None - без него)
+            retry: RetryPolicy для временных сбоев (None - без повторов)
+            metrics: RunMetrics, куда записывается каждый запрос (None - без метрик)
+        """
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.cache = cache
+        self.limiter = limiter
+        self.retry = retry
+        self.metrics = metrics
+        self.headers = {'User-Agent': USER_AGENT}
+        if headers:
+            self.headers.update(headers)
+        self._sessions: Dict[str, requests.Session] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def host_key(url: str) -> str:
+        """Возвращает ключ хоста (scheme://netloc) для URL."""
+        parts = urlsplit(url)
+        return f'{parts.scheme}://{parts.netloc}'
+
+    def session_for(self, url: str) -> requests.Session:
+        """
+        Возвращает сессию для хоста из URL, создавая ее при первом обращении.
+
+        Args:
+            url: Любой URL на нужном хосте
+
+        Returns:
+            Сессия с пулом соединений к этому хосту
+        """
+        key = self.host_key(url)
+        with self._lock:
+            session = self._sessions.get(key)
+            if session is None:
+                session = requests.Session()
+                session.headers.update(self.headers)
+                # Один пул на хост; pool_block не дает открывать соединения
+                # сверх pool_size, когда потоков больше, чем соединений
+                adapter = HTTPAdapter(pool_connections=1,
+                                      pool_maxsize=self.pool_size,
+                                      pool_block=True)
+                session.mount(key, adapter)
+                self._sessions[key] = session
+            return session
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """Выполняет запрос через сессию хоста (аргументы как у requests)."""
+        kwargs.setdefault('timeout', self.timeout)
+        return self.session_for(url).request(method, url, **kwargs)
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request('POST', url, **kwargs)
+
+    def send(self, request: HTTPRequest) -> requests.Response:
+        """Выполняет запрос, описанный HTTPRequest."""
+        if self.metrics is None:
+            return self._send_retried(request)
+        started = time.monotonic()
+        try:
+            response = self._send_retried(request)
+        except Exception as e:
+            self.metrics.observe_request(request, time.monotonic() - started, error=e)
+            raise
+        self.metrics.observe_request(request, time.monotonic() - started, response)
+        return response
+
+    def _send_retried(self, request: HTTPRequest) -> requests.Response:
+        if self.retry is None:
+            return self._send_limited(request)
+
+        delay = 0.0
+        for attempt in range(self.retry.retries + 1):
+            last = attempt == self.retry.retries
+            try:
+                response = self._send_limited(request)
+            except requests.exceptions.RequestException as e:
+                if last or not self.retry.should_retry(request, error=e):
+                    # Для метрик: сколько повторов было до окончательной ошибки
+                    e.retries = attempt
+                    raise
+                delay = self.retry.backoff(delay)
+            else:
+                if last or not self.retry.should_retry(request, response=response,
+                                                       rate_limited=self.limiter is not None):
+                    response.retries = attempt
+                    return response
+                delay = self.retry.backoff(delay, response)
+            time.sleep(delay)
+
+    def _send_limited(self, request: HTTPRequest) -> requests.Response:
+        if self.limiter is None:
+            return self._send_cached(request)
+
+        key = self.limiter.key_for(request.url, request.headers)
+        for _ in range(RATE_LIMIT_RETRIES + 1):
+            delay = self.limiter.reserve(key)
+            while delay > 0:
+                notice = self.limiter.sleep_notice(key, delay)
+                if notice:
+                    print(notice)
+                time.sleep(delay)
+                delay = self.limiter.reserve(key)
+            try:
+                response = self._send_cached(request)
+            except Exception:
+                self.limiter.release(key)
+                raise
+            if not self.limiter.observe(key, response):
+                break
+        return response
+
+    def _send_cached(self, request: HTTPRequest) -> requests.Response:
+        if self.cache is None:
+            return self.request(request.method, request.url, headers=request.headers,
+                                params=request.params, json=request.json)
+
+        entry, key, url, headers = self.cache.prepare(request.method, request.url,
+                                                      request.headers, request.params)
+        response = self.request(request.method, request.url, headers=headers,
+                                params=request.params, json=request.json)
+        return self.cache.complete(entry, key, url, response)
+
+    def drive(self, steps: Steps) -> Any:
+        """
+        Выполняет генератор шагов синхронно.
+
+        Каждый запрос генератора отправляется через send(); ответ передается
+        обратно в генератор, а исключение бросается в него в точке yield,
+        так что try/except внутри шагов работает как при прямом вызове.
+
+        Returns:
+            Значение, которое вернул генератор
+        """
+        try:
+            request = next(steps)
+            while True:
+                try:
+                    response = self.send(request)
+                except Exception as e:
+                    request = steps.throw(e)
+                else:
+                    request = steps.send(response)
+        except StopIteration as stop:
+            return stop.value
+
+    def close(self):
+        """Закрывает все сессии и их соединения."""
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,125 @@
+"""
+Дешевое обнаружение тегов через git ls-remote.
+
+Чтобы узнать последний тег, REST API приходится листать /tags
+страницами, и каждая страница расходует rate limit. git ls-remote
+--tags получает то же самое одним небольшим ответом (объявлением ссылок
+smart HTTP) без пагинации и без расхода квоты REST. Здесь объявление
+разбирается за один проход, включая "очищенные" записи name^{} с
+коммитом под аннотированным тегом, а найденные теги кладутся в кэш
+менеджера вместо запросов /tags.
+
+У ссылок нет дат, а объявление упорядочено по имени, поэтому теги
+выбираются только по semver. Репозиторий без semver тегов считается
+не проверенным и обрабатывается через API, как при ошибке git.
+"""
+
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .git_mirror import DEFAULT_FETCH_JOBS, DEFAULT_FETCH_TIMEOUT, GitMirrorError, git_env, run_git
+from .parallel_runner import run_in_threads
+from .records import Tag
+from .tag_selection import TagSelector
+
+
+TAG_PREFIX = 'refs/tags/'
+PEELED_SUFFIX = '^{}'
+# Порядки тегов, для которых хватает имен ссылок: "как отдал сервер" здесь
+# означает "по имени", то есть v0.10.0 раньше v0.9.0
+PROBE_TAG_ORDERS = ('semver',)
+
+
+def parse_tag_refs(advertisement: str) -> List[Dict]:
+    """
+    Теги из вывода ls-remote (строки "<sha>\\t<ссылка>") в виде ответа API.
+
+    Для аннотированного тега коммитом считается sha записи name^{},
+    для легковесного - sha самой ссылки. Остальные ссылки пропускаются.
+    """
+    tags: Dict[str, Dict] = {}
+    for line in advertisement.splitlines():
+        sha, _, ref = line.partition('\t')
+        if not ref.startswith(TAG_PREFIX):
+            continue
+        name = ref[len(TAG_PREFIX):]
+        peeled = name.endswith(PEELED_SUFFIX)
+        if peeled:
+            name = name[:-len(PEELED_SUFFIX)]
+        tag = tags.setdefault(name, {'name': name, 'commit': {'id': sha}})
+        if peeled:
+            tag['commit']['id'] = sha
+    return list(tags.values())
+
+
+class TagProbe:
+    def __init__(self, url_template: str, auth: Optional[Tuple[str, str]] = None,
+                 tag_order: str = 'semver', timeout: float = DEFAULT_FETCH_TIMEOUT):
+        """
+        Инициализация проверки тегов.
+
+        Args:
+            url_template: Адрес репозитория с {repo} (как у git зеркал)
+            auth: (пользователь, токен) для HTTP Basic
+            tag_order: Только semver (см. PROBE_TAG_ORDERS)
+            timeout: Потолок на один git ls-remote, секунды
+        """
+        if tag_order not in PROBE_TAG_ORDERS:
+            raise ValueError(f'ls-remote не поддерживает порядок тегов {tag_order}')
+        self.url_template = url_template
+        self.tag_order = tag_order
+        self.timeout = timeout
+        self.env = git_env(auth)
+        # Репозиторий -> причина, по которой теги не получены
+        self.failed: Dict[str, str] = {}
+        self.probed = 0
+        self.probe_time = 0.0
+
+    def probe(self, repo: str) -> List[Tag]:
+        """
+        Последний и предыдущий теги репозитория.
+
+        Raises:
+            GitMirrorError: git ls-remote завершился с ошибкой или среди
+                тегов нет ни одного semver
+        """
+        advertisement = run_git(['ls-remote', '--tags', self.url_template.format(repo=repo)],
+                                self.env, self.timeout)
+        selector = TagSelector(self.tag_order)
+        selector.feed(parse_tag_refs(advertisement))
+        if selector.seen and not selector.ranked:
+            # Первые по имени теги - не последние; пусть их выберет API
+            raise GitMirrorError('нет semver тегов')
+        return selector.selected
+
+    def _probe_one(self, repo: str) -> Tuple[Optional[List[Tag]], Optional[str]]:
+        """probe для пула потоков: ошибка возвращается, а не пробрасывается."""
+        try:
+            return self.probe(repo), None
+        except GitMirrorError as e:
+            return None, str(e)
+
+    def probe_all(self, repos: Iterable[str], jobs: int = DEFAULT_FETCH_JOBS) -> Dict[str, List[Tag]]:
+        """
+        Параллельно получает теги репозиториев.
+
+        Returns:
+            Репозиторий -> теги; неудачные попадают в failed
+        """
+        started = time.monotonic()
+        found = {}
+        for repo, (tags, error), _ in run_in_threads(self._probe_one, repos, jobs):
+            if error is not None:
+                self.failed[repo] = error
+            else:
+                found[repo] = tags
+        self.probed += len(found)
+        self.probe_time += time.monotonic() - started
+        return found
+
+    def report(self) -> str:
+        """Строка для итогов запуска."""
+        line = f'git ls-remote: теги {self.probed} репозитори(ев) за {self.probe_time:.1f} с'
+        if self.failed:
+            line += f', не удалось {len(self.failed)} (используется API)'
+        return line
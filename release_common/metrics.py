@@ -0,0 +1,309 @@
+"""
+Метрики запуска: HTTP запросы и этапы обработки репозиториев.
+
+Транспорт отдает сюда каждый запрос после всех повторов: эндпоинт
+(путь URL с плейсхолдерами вместо имен репозиториев и тегов), статус,
+размер тела ответа, длительность и число повторов. Для каждого
+репозитория учитывается время этапов из RepoResult.timings (поиск
+проекта, теги, проверка релиза, заметки, создание) и итоговый статус.
+
+В конце запуска метрики пишутся в текстовом формате Prometheus (для
+textfile collector из node_exporter) и/или в JSON отчет. Длительности
+хранятся гистограммами с фиксированными границами, поэтому память не
+растет с числом запросов, а перцентили в JSON - оценка по гистограмме.
+"""
+
+import json
+import os
+import re
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+import requests
+
+from .http_transport import HTTPRequest
+from .run_results import RepoResult
+
+
+PREFIX = 'release_creator'
+# Границы гистограмм длительности, секунды
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Имена репозиториев, проектов и тегов заменяются плейсхолдерами,
+# чтобы число эндпоинтов не росло с числом репозиториев
+ENDPOINT_PATTERNS = [
+    (re.compile(r'/repos/[^/]+/[^/]+'), '/repos/{owner}/{repo}'),
+    (re.compile(r'/projects/[^/]+'), '/projects/{id}'),
+    (re.compile(r'/groups/[^/]+'), '/groups/{group}'),
+    (re.compile(r'/orgs/[^/]+'), '/orgs/{org}'),
+    (re.compile(r'/releases/tags/[^/]+$'), '/releases/tags/{tag}'),
+    (re.compile(r'/releases/[^/]+$'), '/releases/{release}'),
+    (re.compile(r'/compare/[^/]+$'), '/compare/{range}'),
+]
+
+
+def endpoint_label(url: str) -> str:
+    """Путь URL без имен репозиториев и тегов (/repos/{owner}/{repo}/tags)."""
+    path = urlsplit(url).path.rstrip('/') or '/'
+    for pattern, replacement in ENDPOINT_PATTERNS:
+        path = pattern.sub(replacement, path)
+    return path
+
+
+class Histogram:
+    """Гистограмма с фиксированными границами (как histogram в Prometheus)."""
+
+    __slots__ = ('buckets', 'counts', 'count', 'sum', 'min', 'max')
+
+    def __init__(self, buckets: Tuple[float, ...] = DURATION_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+        self.min = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        self.min = value if not self.count else min(self.min, value)
+        self.max = max(self.max, value)
+        self.count += 1
+        self.sum += value
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[index] += 1
+                break
+
+    def cumulative(self) -> List[int]:
+        """Накопленные счетчики по границам (значения le в Prometheus)."""
+        total, result = 0, []
+        for count in self.counts:
+            total += count
+            result.append(total)
+        return result
+
+    def quantile(self, q: float) -> float:
+        """Оценка перцентиля линейной интерполяцией внутри корзины."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        lower, seen = 0.0, 0
+        for bound, count in zip(self.buckets, self.counts):
+            if count and seen + count >= rank:
+                # Границы корзины сужаются до известных минимума и максимума
+                low, high = max(lower, self.min), min(bound, self.max)
+                return low + (high - low) * (rank - seen) / count
+            seen += count
+            lower = bound
+        # Выше последней границы - известен только максимум
+        return self.max
+
+    def summary(self) -> Dict[str, float]:
+        return {'count': self.count, 'sum': round(self.sum, 6),
+                'p50': round(self.quantile(0.5), 6), 'p90': round(self.quantile(0.9), 6),
+                'p99': round(self.quantile(0.99), 6), 'max': round(self.max, 6)}
+
+
+class EndpointStats:
+    """Запросы к одному эндпоинту: статусы, байты, повторы, длительность."""
+
+    __slots__ = ('statuses', 'bytes', 'retries', 'duration')
+
+    def __init__(self):
+        self.statuses: Dict[str, int] = {}
+        self.bytes = 0
+        self.retries = 0
+        self.duration = Histogram()
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(**labels) -> str:
+    return ','.join(f'{name}="{_escape(str(value))}"' for name, value in labels.items())
+
+
+def _write_atomic(path: str, text: str):
+    """Запись через временный файл: textfile collector не увидит недописанный файл."""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+
+class RunMetrics:
+    def __init__(self, provider: str):
+        """
+        Инициализация сборщика метрик.
+
+        Args:
+            provider: github или gitlab (метка provider во всех метриках)
+        """
+        self.provider = provider
+        self.started = time.time()
+        # (хост, метод, эндпоинт) -> статистика
+        self._endpoints: Dict[Tuple[str, str, str], EndpointStats] = {}
+        self._stages: Dict[str, Histogram] = {}
+        self._repos: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def observe_request(self, request: HTTPRequest, duration: float,
+                        response: Optional[requests.Response] = None,
+                        error: Optional[Exception] = None):
+        """
+        Учитывает запрос после всех повторов.
+
+        Args:
+            request: Отправленный запрос
+            duration: Время от первой попытки до ответа, включая паузы повторов
+            response: Ответ (None, если запрос закончился исключением)
+            error: Исключение, если ответа нет
+        """
+        parts = urlsplit(request.url)
+        key = (parts.netloc, request.method, endpoint_label(request.url))
+        if response is not None:
+            # Ответ из HTTP кэша пришел как 304 без тела
+            cached = getattr(response, 'from_cache', False)
+            status = '304' if cached else str(response.status_code)
+            size = 0 if cached else len(response.content or b'')
+            retries = getattr(response, 'retries', 0)
+        else:
+            status = type(error).__name__ if error is not None else 'error'
+            size = 0
+            retries = getattr(error, 'retries', 0)
+
+        with self._lock:
+            stats = self._endpoints.get(key)
+            if stats is None:
+                stats = self._endpoints[key] = EndpointStats()
+            stats.statuses[status] = stats.statuses.get(status, 0) + 1
+            stats.bytes += size
+            stats.retries += retries
+            stats.duration.observe(duration)
+
+    def observe_stage(self, stage: str, seconds: float):
+        """Учитывает время этапа (например, GraphQL обнаружения для всего списка)."""
+        with self._lock:
+            histogram = self._stages.get(stage)
+            if histogram is None:
+                histogram = self._stages[stage] = Histogram()
+            histogram.observe(seconds)
+
+    def observe_result(self, result: RepoResult):
+        """Учитывает итог репозитория и время его этапов."""
+        for stage, seconds in result.timings.items():
+            self.observe_stage(stage, seconds)
+        with self._lock:
+            status = result.status.value
+            self._repos[status] = self._repos.get(status, 0) + 1
+
+    # ---- экспорт ----
+
+    def to_dict(self) -> Dict:
+        """Отчет для JSON."""
+        with self._lock:
+            endpoints = []
+            for (host, method, endpoint), stats in sorted(self._endpoints.items()):
+                endpoints.append({'host': host, 'method': method, 'endpoint': endpoint,
+                                  'requests': stats.duration.count, 'statuses': dict(stats.statuses),
+                                  'bytes': stats.bytes, 'retries': stats.retries,
+                                  'duration_seconds': stats.duration.summary()})
+            return {
+                'provider': self.provider,
+                'started': self.started,
+                'duration_seconds': round(time.time() - self.started, 3),
+                'repos': dict(self._repos),
+                'requests': endpoints,
+                'stages': {stage: histogram.summary()
+                           for stage, histogram in sorted(self._stages.items())},
+            }
+
+    def _histogram_lines(self, name: str, histogram: Histogram, labels: Dict[str, str]) -> List[str]:
+        lines = []
+        for bound, count in zip(histogram.buckets, histogram.cumulative()):
+            lines.append(f'{name}_bucket{{{_labels(**labels, le=repr(bound))}}} {count}')
+        lines.append(f'{name}_bucket{{{_labels(**labels, le="+Inf")}}} {histogram.count}')
+        lines.append(f'{name}_sum{{{_labels(**labels)}}} {histogram.sum:.6f}')
+        lines.append(f'{name}_count{{{_labels(**labels)}}} {histogram.count}')
+        return lines
+
+    def to_prometheus(self) -> str:
+        """Метрики в текстовом формате Prometheus (значения за запуск)."""
+        p = PREFIX
+        provider = {'provider': self.provider}
+        requests_lines, bytes_lines, retries_lines, duration_lines = [], [], [], []
+        with self._lock:
+            for (host, method, endpoint), stats in sorted(self._endpoints.items()):
+                labels = dict(provider, host=host, method=method, endpoint=endpoint)
+                for status, count in sorted(stats.statuses.items()):
+                    requests_lines.append(f'{p}_http_requests{{{_labels(**labels, status=status)}}} {count}')
+                bytes_lines.append(f'{p}_http_response_bytes{{{_labels(**labels)}}} {stats.bytes}')
+                retries_lines.append(f'{p}_http_retries{{{_labels(**labels)}}} {stats.retries}')
+                duration_lines += self._histogram_lines(f'{p}_http_request_duration_seconds',
+                                                        stats.duration, labels)
+            stage_lines = []
+            for stage, histogram in sorted(self._stages.items()):
+                stage_lines += self._histogram_lines(f'{p}_stage_duration_seconds', histogram,
+                                                     dict(provider, stage=stage))
+            repo_lines = [f'{p}_repos{{{_labels(**provider, status=status)}}} {count}'
+                          for status, count in sorted(self._repos.items())]
+
+        lines = [
+            f'# HELP {p}_http_requests HTTP запросы за последний запуск.',
+            f'# TYPE {p}_http_requests gauge',
+            *requests_lines,
+            f'# HELP {p}_http_response_bytes Байты тел ответов за последний запуск.',
+            f'# TYPE {p}_http_response_bytes gauge',
+            *bytes_lines,
+            f'# HELP {p}_http_retries Повторы запросов за последний запуск.',
+            f'# TYPE {p}_http_retries gauge',
+            *retries_lines,
+            f'# HELP {p}_http_request_duration_seconds Длительность запроса с повторами.',
+            f'# TYPE {p}_http_request_duration_seconds histogram',
+            *duration_lines,
+            f'# HELP {p}_stage_duration_seconds Длительность этапа обработки репозитория.',
+            f'# TYPE {p}_stage_duration_seconds histogram',
+            *stage_lines,
+            f'# HELP {p}_repos Репозитории по итогу обработки за последний запуск.',
+            f'# TYPE {p}_repos gauge',
+            *repo_lines,
+            f'# HELP {p}_run_duration_seconds Длительность последнего запуска.',
+            f'# TYPE {p}_run_duration_seconds gauge',
+            f'{p}_run_duration_seconds{{{_labels(**provider)}}} {time.time() - self.started:.3f}',
+            f'# HELP {p}_last_run_timestamp_seconds Время начала последнего запуска.',
+            f'# TYPE {p}_last_run_timestamp_seconds gauge',
+            f'{p}_last_run_timestamp_seconds{{{_labels(**provider)}}} {self.started:.3f}',
+        ]
+        return '\n'.join(lines) + '\n'
+
+    def write(self, prometheus_path: Optional[str] = None, json_path: Optional[str] = None):
+        """Записывает метрики в файлы (каждый - атомарно)."""
+        if prometheus_path:
+            _write_atomic(prometheus_path, self.to_prometheus())
+        if json_path:
+            _write_atomic(json_path, json.dumps(self.to_dict(), ensure_ascii=False, indent=2) + '\n')
+
+    def report(self) -> str:
+        """Строка для итогов запуска: самые долгие эндпоинты по суммарному времени."""
+        with self._lock:
+            total = sum(stats.duration.count for stats in self._endpoints.values())
+            slowest = sorted(self._endpoints.items(), key=lambda item: item[1].duration.sum,
+                             reverse=True)[:3]
+            top = ', '.join(f'{method} {endpoint} {stats.duration.sum:.1f} с '
+                            f'(p99 {stats.duration.quantile(0.99) * 1000:.0f} мс)'
+                            for (_, method, endpoint), stats in slowest)
+        return f'Метрики: {total} запросов; дольше всего: {top or "-"}'
+
+    def traffic_report(self) -> str:
+        """Строка для итогов запуска: объем тел ответов и самые объемные эндпоинты."""
+        with self._lock:
+            total = sum(stats.duration.count for stats in self._endpoints.values())
+            size = sum(stats.bytes for stats in self._endpoints.values())
+            largest = sorted(self._endpoints.items(), key=lambda item: item[1].bytes,
+                             reverse=True)[:3]
+            top = ', '.join(f'{method} {endpoint} {stats.bytes / 1024:.0f} КБ'
+                            for (_, method, endpoint), stats in largest if stats.bytes)
+        return f'Ответы API: {size / 1024:.0f} КБ в {total} запросах; больше всего: {top or "-"}'
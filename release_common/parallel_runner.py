@@ -0,0 +1,208 @@
+"""
+Параллельная обработка репозиториев пулом потоков.
+
+Менеджеры печатают ход работы через print(). Чтобы вывод разных
+репозиториев не перемешивался, sys.stdout на время прогона подменяется
+роутером: все, что печатает задача, попадает в ее собственный буфер,
+а основной поток выводит буфер одним блоком, когда задача завершилась.
+"""
+
+import contextlib
+import io
+import queue
+import sys
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Tuple
+
+
+_task_output: ContextVar[Optional[io.StringIO]] = ContextVar('task_output', default=None)
+
+
+class OutputRouter(io.TextIOBase):
+    """Заменитель sys.stdout: пишет в буфер текущей задачи, если он задан."""
+
+    def __init__(self, stream):
+        self.stream = stream
+
+    def write(self, text: str) -> int:
+        buffer = _task_output.get()
+        if buffer is not None:
+            return buffer.write(text)
+        return self.stream.write(text)
+
+    def flush(self):
+        self.stream.flush()
+
+    @property
+    def encoding(self):
+        return getattr(self.stream, 'encoding', 'utf-8')
+
+
+@contextlib.contextmanager
+def routed_stdout():
+    """Подменяет sys.stdout на OutputRouter на время блока."""
+    original = sys.stdout
+    sys.stdout = OutputRouter(original)
+    try:
+        yield
+    finally:
+        sys.stdout = original
+
+
+@contextlib.contextmanager
+def captured_output() -> Iterator[io.StringIO]:
+    """
+    Собирает вывод текущего потока или asyncio задачи в отдельный буфер.
+
+    Буфер хранится в ContextVar, поэтому у каждого потока и у каждой
+    asyncio задачи он свой.
+    """
+    buffer = io.StringIO()
+    token = _task_output.set(buffer)
+    try:
+        yield buffer
+    finally:
+        _task_output.reset(token)
+
+
+def call_captured(func: Callable, *args) -> Tuple[Any, str]:
+    """
+    Вызывает func, собирая все, что она печатает, в отдельный буфер.
+
+    Returns:
+        Кортеж (результат func, напечатанный текст)
+    """
+    with captured_output() as buffer:
+        result = func(*args)
+    return result, buffer.getvalue()
+
+
+def run_in_threads(func: Callable[[Any], Any], items: Iterable,
+                   workers: int = 1) -> Iterator[Tuple[Any, Any, str]]:
+    """
+    Применяет func к каждому элементу items в пуле из workers потоков.
+
+    При workers == 1 элементы обрабатываются по порядку, а вывод идет
+    напрямую в консоль, как и раньше.
+
+    Args:
+        func: Обработчик одного элемента; исключения должен ловить сам
+        items: Элементы для обработки
+        workers: Количество потоков
+
+    Yields:
+        Кортежи (элемент, результат, напечатанный текст) в порядке завершения
+    """
+    if workers <= 1:
+        for item in items:
+            yield item, func(item), ''
+        return
+
+    # Элементы берутся из items по мере освобождения потоков, а не все
+    # сразу: потоковый источник (ItemStream) не читается наперед
+    yield from run_in_lanes(func, {None: items}, workers)
+
+
+def run_in_lanes(func: Callable[[Any], Any], lanes: Dict[Any, Iterable],
+                 workers: int = 1) -> Iterator[Tuple[Any, Any, str]]:
+    """
+    Как run_in_threads, но элементы разбиты на полосы (например, по хостам API).
+
+    В каждой полосе одновременно обрабатывается не больше workers
+    элементов, а следующий элемент полосы берется, когда освободилось ее
+    место. Медленный или упершийся в rate limit хост не занимает потоки
+    остальных, поэтому общее время - время самой долгой полосы, а не сумма.
+
+    Args:
+        func: Обработчик одного элемента; исключения должен ловить сам
+        lanes: Полоса -> элементы
+        workers: Сколько элементов каждой полосы обрабатывать одновременно
+
+    Yields:
+        Кортежи (элемент, результат, напечатанный текст) в порядке завершения
+    """
+    iterators = {lane: iter(items) for lane, items in lanes.items()}
+    if not iterators:
+        return
+    finished = object()
+
+    with routed_stdout(), ThreadPoolExecutor(max_workers=workers * len(iterators)) as pool:
+        pending = {}
+
+        def submit_next(lane):
+            item = next(iterators[lane], finished)
+            if item is not finished:
+                pending[pool.submit(call_captured, func, item)] = (lane, item)
+
+        for lane in iterators:
+            for _ in range(workers):
+                submit_next(lane)
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                lane, item = pending.pop(future)
+                submit_next(lane)
+                result, output = future.result()
+                yield item, result, output
+
+
+# Потолок элементов, полученных источником, но еще не взятых в обработку
+DEFAULT_STREAM_BUFFER = 1000
+
+
+class ItemStream:
+    """
+    Итератор по элементам, которые источник выдает в фоновом потоке.
+
+    Источник (например, постраничный список репозиториев организации)
+    вызывает emit для каждого элемента, как только получил страницу, и
+    обработка начинается до того, как список прочитан целиком. Очередь
+    ограничена: если обработка отстает, источник ждет.
+    """
+
+    # Следующий элемент может потребовать ожидания (async_engine ждет его вне event loop)
+    blocking = True
+
+    def __init__(self, produce: Callable[[Callable[[Any], None]], None],
+                 buffer: int = DEFAULT_STREAM_BUFFER):
+        """
+        Запускает источник.
+
+        Args:
+            produce: Функция, которая вызывает emit(элемент) для каждого элемента
+            buffer: Сколько полученных элементов держать в очереди
+        """
+        self.count = 0
+        self._queue: queue.Queue = queue.Queue(maxsize=buffer)
+        self._end = object()
+        self._error: Optional[BaseException] = None
+        self._thread = threading.Thread(target=self._run, args=(produce,),
+                                        name='item-stream', daemon=True)
+        self._thread.start()
+
+    def _emit(self, item):
+        self.count += 1
+        self._queue.put(item)
+
+    def _run(self, produce: Callable[[Callable[[Any], None]], None]):
+        try:
+            produce(self._emit)
+        except BaseException as e:
+            self._error = e
+        finally:
+            self._queue.put(self._end)
+
+    def __iter__(self) -> 'ItemStream':
+        return self
+
+    def __next__(self):
+        item = self._queue.get()
+        if item is self._end:
+            # Признак конца возвращается в очередь для остальных потребителей
+            self._queue.put(self._end)
+            if self._error is not None:
+                raise self._error
+            raise StopIteration
+        return item
@@ -0,0 +1,253 @@
+"""
+Планировщик запросов с учетом rate limit API.
+
+Через RateLimiter проходит каждый запрос транспорта. Для каждой пары
+(хост, токен) он запоминает остаток бюджета из заголовков ответа
+(X-RateLimit-* у GitHub, RateLimit-* у GitLab) и:
+
+- когда бюджет исчерпан, ждет его сброса вместо того, чтобы получить 403/429;
+- когда бюджета осталось мало, растягивает остаток до сброса токен-бакетом,
+  чтобы не упереться в ноль (тем же токеном могут пользоваться и другие);
+- на 403/429 с Retry-After (вторичные лимиты GitHub) ждет указанное время
+  и повторяет запрос; 429 повторяется только здесь, RetryPolicy его не
+  повторяет, пока лимитер включен.
+
+Пока бюджет большой, запросы не задерживаются, так что скорость остается
+максимально допустимой.
+"""
+
+import hashlib
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Callable, Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+
+# Доля бюджета, начиная с которой запросы растягиваются до сброса
+LOW_WATER_FRACTION = 0.1
+# GitHub советует ждать минуту, если вторичный лимит пришел без Retry-After
+SECONDARY_LIMIT_WAIT = 60.0
+# Пауза после 429 без Retry-After и без исчерпанного бюджета в заголовках
+TOO_MANY_REQUESTS_WAIT = 10.0
+# Запас к моменту сброса: часы клиента и сервера расходятся
+RESET_MARGIN = 1.0
+# Ожидания дольше этого печатаются
+NOTICE_AFTER = 5.0
+# Как часто перепроверять бюджет, пока ждем заголовков нового окна
+POLL_INTERVAL = 0.05
+
+TOKEN_HEADERS = ('Authorization', 'PRIVATE-TOKEN')
+
+RateKey = Tuple[str, str, str]
+
+
+class RateBudget:
+    """Состояние лимита одного хоста и токена."""
+
+    __slots__ = ('limit', 'remaining', 'reset_at', 'blocked_until', 'in_flight',
+                 'observed', 'tokens', 'refilled_at')
+
+    def __init__(self, now: float):
+        self.limit: Optional[int] = None
+        self.remaining: Optional[int] = None
+        self.reset_at: Optional[float] = None
+        self.blocked_until = 0.0
+        self.in_flight = 0
+        # Был ли хоть один ответ: до него отправляется один пробный запрос
+        self.observed = False
+        # Токен-бакет для режима "бюджета мало" и потолка --max-rps
+        self.tokens = 1.0
+        self.refilled_at = now
+
+    def pace(self, now: float) -> Optional[float]:
+        """Допустимая скорость (запросов в секунду) или None, если ограничивать не нужно."""
+        if self.remaining is None or self.limit is None or self.reset_at is None:
+            return None
+        if self.remaining > self.limit * LOW_WATER_FRACTION:
+            return None
+        return max(self.remaining, 1) / max(self.reset_at - now, 1.0)
+
+
+class RateLimiter:
+    def __init__(self, max_rps: Optional[float] = None, burst: int = 10,
+                 clock: Callable[[], float] = time.time):
+        """
+        Инициализация планировщика.
+
+        Args:
+            max_rps: Общий потолок запросов в секунду на хост и токен (None - без потолка)
+            burst: Емкость токен-бакета - сколько запросов можно отправить подряд
+            clock: Текущее время в секундах эпохи (в тестах - управляемые часы)
+        """
+        self.max_rps = max_rps
+        self.burst = burst
+        self.clock = clock
+        self.waited = 0.0
+        self.throttled = 0
+        self._budgets: Dict[RateKey, RateBudget] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key_for(url: str, headers: Optional[Dict[str, str]]) -> RateKey:
+        """Ключ бюджета: хост, хэш токена и ресурс (у GraphQL GitHub свой лимит)."""
+        parts = urlsplit(url)
+        headers = CaseInsensitiveDict(headers or {})
+        secret = ''.join(headers.get(name, '') for name in TOKEN_HEADERS)
+        token_hash = hashlib.sha256(secret.encode('utf-8')).hexdigest()[:12]
+        resource = 'graphql' if parts.path.rstrip('/').endswith('/graphql') else 'core'
+        return parts.netloc, token_hash, resource
+
+    def _delay(self, budget: RateBudget, now: float) -> float:
+        """Сколько ждать до следующего запроса (0 - можно отправлять)."""
+        if budget.blocked_until > now:
+            return budget.blocked_until - now
+        if not budget.observed and budget.in_flight:
+            # Размер бюджета еще неизвестен: не отправляем пачку вслепую
+            return POLL_INTERVAL
+
+        if budget.remaining is not None and budget.remaining <= 0:
+            if budget.reset_at is not None and budget.reset_at + RESET_MARGIN > now:
+                return budget.reset_at + RESET_MARGIN - now
+            if budget.reset_at is not None:
+                # Окно сбросилось: бюджет снова полный, новое время сброса
+                # придет в заголовках ответа
+                budget.remaining = budget.limit
+                budget.reset_at = None
+            elif budget.in_flight:
+                # Бюджет нового окна уже разобран - ждем заголовки ответов
+                return POLL_INTERVAL
+
+        rates = [rate for rate in (budget.pace(now), self.max_rps) if rate]
+        if rates:
+            rate = min(rates)
+            budget.tokens = min(float(self.burst),
+                                budget.tokens + (now - budget.refilled_at) * rate)
+            budget.refilled_at = now
+            if budget.tokens < 1:
+                return (1 - budget.tokens) / rate
+        return 0.0
+
+    def reserve(self, key: RateKey) -> float:
+        """
+        Пытается зарезервировать один запрос.
+
+        Returns:
+            0, если запрос можно отправлять (он учтен в бюджете), иначе
+            сколько секунд подождать перед повторным вызовом reserve
+        """
+        with self._lock:
+            now = self.clock()
+            budget = self._budgets.setdefault(key, RateBudget(now))
+            delay = self._delay(budget, now)
+            if delay > 0:
+                # Короткие опросы в ожидании заголовков в статистику не входят
+                if delay != POLL_INTERVAL:
+                    self.waited += delay
+                return delay
+
+            if self.max_rps or budget.pace(now):
+                budget.tokens -= 1
+            if budget.remaining is not None:
+                budget.remaining -= 1
+            budget.in_flight += 1
+            return 0.0
+
+    def release(self, key: RateKey):
+        """Снимает резерв запроса, который завершился исключением без ответа."""
+        with self._lock:
+            budget = self._budgets.get(key)
+            if budget is not None and budget.in_flight:
+                budget.in_flight -= 1
+
+    def sleep_notice(self, key: RateKey, delay: float) -> Optional[str]:
+        """Сообщение о долгом ожидании (чтобы прогон не выглядел зависшим)."""
+        if delay < NOTICE_AFTER:
+            return None
+        resume = time.strftime('%H:%M:%S', time.localtime(self.clock() + delay))
+        return f"⏳ Лимит API {key[0]} ({key[2]}): ожидание {delay:.0f} с, до {resume}"
+
+    @staticmethod
+    def _header_int(headers, *names) -> Optional[int]:
+        for name in names:
+            value = headers.get(name)
+            if value is not None:
+                try:
+                    return int(float(value))
+                except ValueError:
+                    pass
+        return None
+
+    def _retry_after(self, headers) -> Optional[float]:
+        value = headers.get('Retry-After')
+        if value is None:
+            return None
+        try:
+            return max(float(value), 0.0)
+        except ValueError:
+            pass
+        try:
+            return max(parsedate_to_datetime(value).timestamp() - self.clock(), 0.0)
+        except (TypeError, ValueError):
+            return None
+
+    def observe(self, key: RateKey, response: requests.Response) -> bool:
+        """
+        Учитывает заголовки лимита из ответа.
+
+        Returns:
+            True, если запрос отклонен из-за rate limit и его нужно повторить
+            (ожидание уже учтено и будет выдержано в следующем reserve)
+        """
+        headers = response.headers
+        limit = self._header_int(headers, 'X-RateLimit-Limit', 'RateLimit-Limit')
+        remaining = self._header_int(headers, 'X-RateLimit-Remaining', 'RateLimit-Remaining')
+        reset_at = self._header_int(headers, 'X-RateLimit-Reset', 'RateLimit-Reset')
+
+        with self._lock:
+            now = self.clock()
+            budget = self._budgets.setdefault(key, RateBudget(now))
+            if budget.in_flight:
+                budget.in_flight -= 1
+            budget.observed = True
+            if limit is not None:
+                budget.limit = limit
+            stale = reset_at is not None and (
+                reset_at < now or (budget.reset_at is not None and reset_at < budget.reset_at))
+            if remaining is not None and not stale:
+                if reset_at is not None and reset_at != budget.reset_at:
+                    # Новое окно лимита: верим серверу, но запросы, которые
+                    # еще в пути, сервер пока не посчитал
+                    budget.remaining = remaining - budget.in_flight
+                    budget.reset_at = float(reset_at)
+                else:
+                    # Ответы на параллельные запросы приходят не по порядку;
+                    # заголовки уже закончившегося окна (stale) не учитываются
+                    budget.remaining = min(remaining, budget.remaining
+                                           if budget.remaining is not None else remaining)
+
+            if response.status_code not in (403, 429):
+                return False
+
+            wait = self._retry_after(headers)
+            if wait is None and remaining == 0 and budget.reset_at is not None:
+                wait = budget.reset_at - now + RESET_MARGIN
+            if wait is None and 'rate limit' in response.text.lower():
+                wait = SECONDARY_LIMIT_WAIT
+            if wait is None and response.status_code == 429:
+                wait = TOO_MANY_REQUESTS_WAIT
+            if wait is None:
+                # Обычный 403 (нет доступа) - не rate limit
+                return False
+
+            budget.blocked_until = max(budget.blocked_until, now + wait)
+            self.throttled += 1
+            return True
+
+    def report(self) -> str:
+        """Строка для итогов запуска."""
+        return (f'Rate limit: суммарное ожидание запросов {self.waited:.1f} с, '
+                f'повторов после 403/429: {self.throttled}')
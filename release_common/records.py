@@ -0,0 +1,82 @@
+"""
+Компактные записи вместо декодированных JSON ответов.
+
+Ответы API о тегах, коммитах и релизах содержат гораздо больше, чем
+нужно для выбора тега, заметок и итогов: ссылки на архивы, полные
+объекты коммитов, авторов, ассеты. Если держать такие словари, пока
+строятся заметки, память растет вместе с числом репозиториев и длиной
+диапазонов коммитов. Здесь каждая запись строится прямо из элемента
+ответа и хранит только нужные поля в __slots__, а сам ответ сразу
+становится не нужен.
+"""
+
+from typing import Dict, Optional
+
+
+class Tag:
+    """Тег: имя, коммит и дата коммита (если API ее отдает)."""
+
+    __slots__ = ('name', 'sha', 'date')
+
+    def __init__(self, name: str, sha: Optional[str] = None, date: Optional[str] = None):
+        self.name = name
+        self.sha = sha
+        self.date = date
+
+    @classmethod
+    def from_api(cls, tag: Dict) -> 'Tag':
+        """Из элемента /tags GitHub (commit.sha) или GitLab (commit.id, commit.created_at)."""
+        commit = tag.get('commit') or {}
+        return cls(tag.get('name', ''), commit.get('sha') or commit.get('id'),
+                   commit.get('created_at'))
+
+    def __repr__(self):
+        return f'Tag({self.name!r})'
+
+
+class CommitSummary:
+    """Коммит для заметок: sha, первая строка сообщения, автор и ссылка."""
+
+    __slots__ = ('sha', 'title', 'author', 'url')
+
+    def __init__(self, sha: str, title: str, author: str, url: Optional[str] = None):
+        self.sha = sha
+        self.title = title
+        self.author = author
+        self.url = url
+
+    @classmethod
+    def from_github(cls, commit: Dict) -> 'CommitSummary':
+        """Из элемента commits ответа REST /compare."""
+        details = commit.get('commit') or {}
+        return cls(commit['sha'], (details.get('message') or '').split('\n', 1)[0],
+                   (details.get('author') or {}).get('name') or '', commit.get('html_url'))
+
+    @classmethod
+    def from_gitlab(cls, commit: Dict) -> 'CommitSummary':
+        """Из элемента ответа /repository/commits."""
+        # title у GitLab может быть обрезан, первая строка message - нет
+        title = (commit.get('message') or commit.get('title') or '').split('\n', 1)[0]
+        return cls(commit['id'], title, commit.get('author_name') or '', commit.get('web_url'))
+
+    def __repr__(self):
+        return f'CommitSummary({self.sha[:8]} {self.title!r})'
+
+
+class ReleaseResult:
+    """Созданный релиз: ID (для правки описания), тег и ссылка на страницу."""
+
+    __slots__ = ('id', 'tag_name', 'url')
+
+    def __init__(self, tag_name: str, url: Optional[str] = None, id: Optional[int] = None):
+        self.tag_name = tag_name
+        self.url = url
+        self.id = id
+
+    @classmethod
+    def from_github(cls, release: Dict) -> 'ReleaseResult':
+        """Из ответа POST/GET /releases GitHub."""
+        return cls(release['tag_name'], release.get('html_url'), release.get('id'))
+
+    def __repr__(self):
+        return f'ReleaseResult({self.tag_name!r})'
@@ -0,0 +1,124 @@
+"""
+План релизов: обнаружение отдельно от создания.
+
+С --plan запуск делает только чтение: выбирает последний и предыдущий
+теги, проверяет наличие релиза и генерирует заметки, а вместо создания
+записывает в план готовое тело запроса на создание. План - небольшой
+JSON файл, его можно просмотреть и поправить руками.
+
+С --apply запуск читает план и выполняет только запросы на создание.
+Повторная проверка нужна лишь записям, которые старше --plan-max-age:
+для них заново выбирается последний тег, и если он изменился, репозиторий
+обрабатывается полностью. "Уже существует" при создании означает пропуск.
+"""
+
+import json
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+
+from .run_results import RepoResult, RepoStatus
+
+
+PLAN_VERSION = 1
+DEFAULT_PLAN_MAX_AGE_HOURS = 24.0
+
+
+class PlanEntry:
+    """Релиз, который нужно создать: репозиторий, тег и данные запроса."""
+
+    __slots__ = ('repo', 'tag_name', 'data', 'planned_at')
+
+    def __init__(self, repo: str, tag_name: str, data: Dict, planned_at: float):
+        self.repo = repo
+        self.tag_name = tag_name
+        # Тело запроса на создание (payload) и, для GitLab, ID проекта
+        self.data = data
+        self.planned_at = planned_at
+
+    def to_dict(self) -> Dict:
+        return {'repo': self.repo, 'tag_name': self.tag_name,
+                'planned_at': round(self.planned_at, 3), **self.data}
+
+    @classmethod
+    def from_dict(cls, entry: Dict) -> 'PlanEntry':
+        data = dict(entry)
+        repo, tag_name = data.pop('repo'), data.pop('tag_name')
+        planned_at = data.pop('planned_at', 0.0)
+        return cls(repo, tag_name, data, planned_at)
+
+    def is_stale(self, max_age: float, now: Optional[float] = None) -> bool:
+        """Старше ли запись max_age секунд (тогда перед созданием ее перепроверяют)."""
+        return (now or time.time()) - self.planned_at > max_age
+
+
+class ReleasePlan:
+    def __init__(self, provider: str, api_url: str):
+        """
+        Инициализация плана.
+
+        Args:
+            provider: github или gitlab
+            api_url: URL API, для которого составлен план (проверяется при --apply)
+        """
+        self.provider = provider
+        self.api_url = api_url
+        self.created = time.time()
+        self.entries: List[PlanEntry] = []
+        # Итог -> сколько репозиториев (для просмотра плана)
+        self.skipped: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def add(self, result: RepoResult):
+        """Добавляет в план запланированный релиз; остальные итоги только считаются."""
+        with self._lock:
+            if result.status is RepoStatus.PLANNED:
+                self.entries.append(PlanEntry(result.repo, result.tag_name, result.planned,
+                                              time.time()))
+            else:
+                status = result.status.value
+                self.skipped[status] = self.skipped.get(status, 0) + 1
+
+    def save(self, path: str):
+        """Записывает план (через временный файл, чтобы не оставить недописанный)."""
+        with self._lock:
+            data = {'version': PLAN_VERSION, 'provider': self.provider, 'api_url': self.api_url,
+                    'created': round(self.created, 3), 'skipped': self.skipped,
+                    'entries': [entry.to_dict() for entry in self.entries]}
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp = f'{path}.{os.getpid()}.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=1)
+            f.write('\n')
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str, provider: str, api_url: str) -> 'ReleasePlan':
+        """
+        Читает план.
+
+        Raises:
+            ValueError: файл не является планом или составлен для другой платформы/API
+        """
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if not isinstance(data, dict) or data.get('version') != PLAN_VERSION:
+            raise ValueError(f'{path} не является планом версии {PLAN_VERSION}')
+        if data.get('provider') != provider or data.get('api_url') != api_url:
+            raise ValueError(f"план составлен для {data.get('provider')} {data.get('api_url')}, "
+                             f"а не для {provider} {api_url}")
+        plan = cls(provider, api_url)
+        plan.created = data.get('created', 0.0)
+        plan.skipped = data.get('skipped', {})
+        plan.entries = [PlanEntry.from_dict(entry) for entry in data.get('entries', [])]
+        return plan
+
+    def report(self) -> str:
+        """Строка для итогов запуска."""
+        errors = self.skipped.get(RepoStatus.ERROR.value, 0)
+        skipped = sum(self.skipped.values()) - errors
+        line = f'План: релизов к созданию {len(self.entries)}, не требуют действий {skipped}'
+        if errors:
+            line += f', не удалось спланировать {errors}'
+        return line
@@ -0,0 +1,53 @@
+"""
+Репозитории организаций и групп вместо списка в файле.
+
+Источник постранично обходит репозитории организаций GitHub или
+проекты групп GitLab (с подгруппами), отбрасывает не подходящие под
+фильтры (темы, архивные, шаблон имени) и сразу отдает подходящие в
+обработку через ItemStream: релизы первых репозиториев создаются, пока
+следующие страницы списка еще читаются.
+"""
+
+import threading
+from fnmatch import fnmatchcase
+from typing import Iterable, List, Optional
+
+
+# Максимальный размер страницы списка репозиториев и у GitHub, и у GitLab
+REPOS_PER_PAGE = 100
+
+
+class RepoFilter:
+    def __init__(self, topics: Optional[List[str]] = None, include_archived: bool = False,
+                 patterns: Optional[List[str]] = None):
+        """
+        Инициализация фильтра.
+
+        Args:
+            topics: Темы, которые должны быть у репозитория (все сразу)
+            include_archived: Не отбрасывать архивные репозитории
+            patterns: Шаблоны (fnmatch) полного пути или имени; подходит любой
+        """
+        self.topics = list(topics or [])
+        self.include_archived = include_archived
+        self.patterns = list(patterns or [])
+        self.listed = 0
+        self.matched = 0
+        self._lock = threading.Lock()
+
+    def matches(self, path: str, topics: Iterable[str] = (), archived: bool = False) -> bool:
+        """Подходит ли репозиторий под фильтр (и учитывает его в счетчиках)."""
+        name = path.rsplit('/', 1)[-1]
+        matched = ((self.include_archived or not archived)
+                   and all(topic in topics for topic in self.topics)
+                   and (not self.patterns
+                        or any(fnmatchcase(path, pattern) or fnmatchcase(name, pattern)
+                               for pattern in self.patterns)))
+        with self._lock:
+            self.listed += 1
+            self.matched += matched
+        return matched
+
+    def report(self) -> str:
+        """Строка для итогов запуска."""
+        return f'В списках {self.listed} репозитори(ев), под фильтры подошло {self.matched}'
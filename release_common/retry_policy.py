@@ -0,0 +1,127 @@
+"""
+Повтор запросов при временных сбоях.
+
+Ответы 5xx, обрывы соединения и таймауты повторяются с паузой
+по схеме "decorrelated jitter": каждая следующая пауза выбирается
+случайно между базовой и утроенной предыдущей, так что тысячи
+параллельных запросов после сбоя не возвращаются к API одновременно.
+429 повторяет RateLimiter (с паузой из Retry-After или до сброса
+бюджета); здесь он повторяется, только если лимитера нет
+(--no-rate-limit), иначе запрос, упершийся в лимит, повторялся бы
+обоими циклами.
+
+Неидемпотентные запросы (POST) повторяются, только если они помечены
+как идемпотентные (HTTPRequest.idempotent) или точно не дошли до
+сервера: соединение не установлено (таймаут подключения, отказ в
+соединении, ошибка DNS). Число выполненных повторов
+записывается в response.retries, чтобы шаги могли отличить "релиз уже
+существует" от "релиз создан нашей же попыткой, ответ на которую потерян".
+"""
+
+import random
+import threading
+from typing import Optional
+
+import requests
+from urllib3.exceptions import MaxRetryError, NewConnectionError
+
+from .http_transport import HTTPRequest
+
+
+DEFAULT_RETRIES = 3
+DEFAULT_BASE_DELAY = 0.5
+DEFAULT_MAX_DELAY = 30.0
+
+RETRY_STATUSES = {500, 502, 503, 504}
+TOO_MANY_REQUESTS = 429
+IDEMPOTENT_METHODS = {'GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'}
+
+
+def connection_not_established(error: Exception) -> bool:
+    """
+    Ошибка при установке соединения: запрос точно не ушел на сервер.
+
+    requests сообщает об отказе в соединении и ошибке DNS как о
+    ConnectionError, внутри которой MaxRetryError с NewConnectionError;
+    обрыв уже установленного соединения выглядит так же снаружи, но
+    причина у него другая.
+    """
+    if isinstance(error, requests.exceptions.ConnectTimeout):
+        return True
+    if not isinstance(error, requests.exceptions.ConnectionError) or not error.args:
+        return False
+    reason = error.args[0]
+    if isinstance(reason, MaxRetryError):
+        reason = reason.reason
+    return isinstance(reason, NewConnectionError)
+
+
+class RetryPolicy:
+    def __init__(self, retries: int = DEFAULT_RETRIES,
+                 base_delay: float = DEFAULT_BASE_DELAY,
+                 max_delay: float = DEFAULT_MAX_DELAY):
+        """
+        Инициализация политики повторов.
+
+        Args:
+            retries: Сколько раз повторять запрос (0 - не повторять)
+            base_delay: Минимальная пауза перед повтором в секундах
+            max_delay: Максимальная пауза перед повтором в секундах
+        """
+        self.retries = retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retried = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def is_idempotent(request: HTTPRequest) -> bool:
+        return request.method in IDEMPOTENT_METHODS or request.idempotent
+
+    def should_retry(self, request: HTTPRequest,
+                     response: Optional[requests.Response] = None,
+                     error: Optional[Exception] = None,
+                     rate_limited: bool = False) -> bool:
+        """
+        Стоит ли повторить запрос после такого ответа или ошибки.
+
+        Args:
+            rate_limited: Запросы идут через RateLimiter, который сам повторяет 429
+        """
+        if error is not None:
+            # Соединение не установлено - запрос точно не дошел до сервера
+            if connection_not_established(error):
+                return True
+            if not isinstance(error, (requests.exceptions.ConnectionError,
+                                      requests.exceptions.Timeout,
+                                      requests.exceptions.ChunkedEncodingError)):
+                return False
+            return self.is_idempotent(request)
+        status = response.status_code
+        if status == TOO_MANY_REQUESTS and not rate_limited:
+            return self.is_idempotent(request)
+        return status in RETRY_STATUSES and self.is_idempotent(request)
+
+    def backoff(self, previous: float, response: Optional[requests.Response] = None) -> float:
+        """
+        Пауза перед следующей попыткой (decorrelated jitter).
+
+        Args:
+            previous: Предыдущая пауза (0 перед первым повтором)
+            response: Ответ сервера; его Retry-After увеличивает паузу
+        """
+        delay = min(self.max_delay,
+                    random.uniform(self.base_delay, max(previous, self.base_delay) * 3))
+        if response is not None:
+            try:
+                delay = max(delay, min(float(response.headers.get('Retry-After', 0)),
+                                       self.max_delay))
+            except ValueError:
+                pass
+        with self._lock:
+            self.retried += 1
+        return delay
+
+    def report(self) -> str:
+        """Строка для итогов запуска."""
+        return f'Повторов запросов после временных сбоев: {self.retried}'
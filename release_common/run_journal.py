@@ -0,0 +1,130 @@
+"""
+Журнал запуска для продолжения после сбоя.
+
+Каждый результат этапа (выбранные теги, сгенерированные заметки, итог
+обработки репозитория) сразу дописывается строкой JSON в конец файла.
+Если запуск прервался, --resume читает журнал: репозитории с итогом
+"создан" или "уже существует" пропускаются, а для остальных теги и
+заметки берутся из журнала вместо повторных запросов к API.
+
+Файл только дописывается, поэтому сбой может испортить лишь последнюю
+строку; при чтении такая строка пропускается. Запуск, дошедший до конца,
+дописывает отметку о завершении: журнал без нее остался от прерванного
+запуска, и новый запуск не затирает его без явного --fresh.
+"""
+
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from .run_results import RepoResult, RepoStatus
+
+
+# Итоги, после которых репозиторий при продолжении не обрабатывается заново
+DONE_STATUSES = {RepoStatus.CREATED.value, RepoStatus.ALREADY_EXISTS.value,
+                 RepoStatus.UNCHANGED.value}
+
+# Этап отметки о завершении запуска (строка без репозитория)
+COMPLETE_STAGE = 'complete'
+
+
+def default_journal_path(name: str) -> str:
+    """~/.cache/release-creator/<name>_journal.jsonl (с учетом XDG_CACHE_HOME)."""
+    base = os.getenv('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'release-creator', f'{name}_journal.jsonl')
+
+
+def is_unfinished(path: str) -> bool:
+    """Остался ли в path журнал прерванного запуска (записи есть, отметки о завершении нет)."""
+    last_stage = None
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    last_stage = json.loads(line)['stage']
+                except (ValueError, KeyError, TypeError):
+                    continue
+    except FileNotFoundError:
+        return False
+    return last_stage is not None and last_stage != COMPLETE_STAGE
+
+
+class RunJournal:
+    def __init__(self, path: str, resume: bool = False):
+        """
+        Инициализация журнала.
+
+        Args:
+            path: Путь к JSONL файлу журнала
+            resume: Продолжить прерванный запуск (иначе журнал начинается заново)
+        """
+        self.path = path
+        self.reused = 0
+        # Репозиторий -> этап -> данные
+        self._stages: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        if resume and os.path.exists(self.path):
+            self._load()
+        self._file = open(self.path, 'a' if resume else 'w', encoding='utf-8')
+
+    def _load(self):
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # Строка, недописанная из-за сбоя
+                    continue
+                if entry['stage'] == COMPLETE_STAGE:
+                    continue
+                self._stages.setdefault(entry['repo'], {})[entry['stage']] = entry.get('data')
+
+    def get(self, repo: str, stage: str) -> Optional[Any]:
+        """Данные этапа из прерванного запуска или None."""
+        with self._lock:
+            data = self._stages.get(repo, {}).get(stage)
+            if data is not None:
+                self.reused += 1
+            return data
+
+    def record(self, repo: str, stage: str, data: Any):
+        """Дописывает результат этапа в журнал."""
+        line = json.dumps({'repo': repo, 'stage': stage, 'data': data, 'time': time.time()},
+                          ensure_ascii=False)
+        with self._lock:
+            self._stages.setdefault(repo, {})[stage] = data
+            self._file.write(line + '\n')
+            # Сбрасываем в ОС сразу: упасть может сам процесс, а не машина
+            self._file.flush()
+
+    def finish(self, result: RepoResult):
+        """Записывает итог обработки репозитория."""
+        self.record(result.repo, 'result', {'status': result.status.value,
+                                            'tag_name': result.tag_name,
+                                            'release_url': result.release_url,
+                                            'error': result.error})
+
+    def is_done(self, repo: str) -> bool:
+        """Обработан ли репозиторий в прерванном запуске."""
+        with self._lock:
+            result = self._stages.get(repo, {}).get('result')
+        return bool(result) and result.get('status') in DONE_STATUSES
+
+    def complete(self):
+        """Отмечает, что запуск дошел до конца: журнал можно начинать заново."""
+        line = json.dumps({'repo': None, 'stage': COMPLETE_STAGE, 'time': time.time()})
+        with self._lock:
+            self._file.write(line + '\n')
+            self._file.flush()
+
+    def report(self) -> str:
+        """Строка для итогов запуска."""
+        return f'Журнал {self.path}: данных этапов взято из прерванного запуска: {self.reused}'
+
+    def close(self):
+        with self._lock:
+            self._file.close()
@@ -0,0 +1,72 @@
+"""
+Результат обработки одного репозитория.
+
+process_repository возвращает RepoResult вместо True/False, так что
+итоговая статистика знает, почему релиз не создан (уже существует,
+нет тегов, ошибка), и не делает повторных запросов к API.
+"""
+
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Dict, Iterator, Optional
+
+
+class RepoStatus(Enum):
+    CREATED = 'created'
+    ALREADY_EXISTS = 'already_exists'
+    NO_TAGS = 'no_tags'
+    # Последний тег тот же, что в прошлом запуске (--changed-only)
+    UNCHANGED = 'unchanged'
+    # Релиз нужно создать, но запуск только составляет план (--plan)
+    PLANNED = 'planned'
+    ERROR = 'error'
+
+
+@dataclass
+class RepoResult:
+    """Итог обработки репозитория: статус, тег, причина ошибки и время этапов."""
+
+    repo: str
+    status: RepoStatus = RepoStatus.ERROR
+    tag_name: Optional[str] = None
+    release_url: Optional[str] = None
+    error: Optional[str] = None
+    # Этап -> секунды (project_id, tags, notes, check, create)
+    timings: Dict[str, float] = field(default_factory=dict)
+    # Что нужно для создания релиза по плану (тело запроса и т.п.)
+    planned: Optional[Dict] = None
+
+    def __bool__(self) -> bool:
+        # Как и раньше, "истина" означает, что релиз создан
+        return self.status is RepoStatus.CREATED
+
+    @property
+    def failed(self) -> bool:
+        """Считается ли результат неудачей для кода возврата."""
+        return self.status in (RepoStatus.ERROR, RepoStatus.NO_TAGS)
+
+    @property
+    def total_time(self) -> float:
+        return sum(self.timings.values())
+
+    @contextmanager
+    def timed(self, stage: str) -> Iterator[None]:
+        """Замеряет время этапа и добавляет его в timings."""
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.timings[stage] = self.timings.get(stage, 0.0) + time.monotonic() - started
+
+    def finish(self, status: RepoStatus, **fields) -> 'RepoResult':
+        """Проставляет итоговый статус (и поля) и возвращает себя."""
+        self.status = status
+        for name, value in fields.items():
+            setattr(self, name, value)
+        return self
+
+    def fail(self, error: str) -> 'RepoResult':
+        """Отмечает результат как ошибку с указанной причиной."""
+        return self.finish(RepoStatus.ERROR, error=error)
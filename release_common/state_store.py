@@ -0,0 +1,87 @@
+"""
+Состояние репозиториев между запусками.
+
+Для каждого репозитория хранится последний тег, для которого релиз уже
+есть (создан или существовал), и время проверки. С --changed-only
+запуск выбирает последний тег (запрос тегов идет через HTTP кэш, то есть
+условный и обычно заканчивается 304) и, если тег тот же, что в прошлый
+раз, дальше репозиторий не обрабатывает: ни проверки релиза, ни
+заметок, ни создания.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+from .run_results import RepoResult, RepoStatus
+
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS repos (
+    repo TEXT PRIMARY KEY,
+    tag_name TEXT NOT NULL,
+    status TEXT NOT NULL,
+    checked REAL NOT NULL
+)
+'''
+
+# Итоги, после которых для тега больше нечего делать
+SETTLED_STATUSES = {RepoStatus.CREATED, RepoStatus.ALREADY_EXISTS}
+
+
+def default_state_path(name: str) -> str:
+    """~/.cache/release-creator/<name>_state.sqlite (с учетом XDG_CACHE_HOME)."""
+    base = os.getenv('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'release-creator', f'{name}_state.sqlite')
+
+
+class StateStore:
+    def __init__(self, path: str):
+        """
+        Инициализация хранилища состояния.
+
+        Args:
+            path: Путь к файлу SQLite
+        """
+        self.path = path
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        # Одно соединение на все потоки; доступ сериализуется self._lock
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('PRAGMA synchronous=NORMAL')
+        self._db.execute(SCHEMA)
+        self._db.commit()
+
+    def last_tag(self, repo: str) -> Optional[str]:
+        """Тег, для которого релиз был в прошлый раз, или None."""
+        with self._lock:
+            row = self._db.execute('SELECT tag_name FROM repos WHERE repo = ?',
+                                   (repo,)).fetchone()
+        return row[0] if row else None
+
+    def is_unchanged(self, repo: str, tag_name: str) -> bool:
+        """
+        Совпадает ли последний тег с тегом прошлого запуска.
+
+        Такие репозитории завершаются статусом UNCHANGED; считает их
+        итог запуска вместе с остальными статусами.
+        """
+        return self.last_tag(repo) == tag_name
+
+    def update(self, result: RepoResult):
+        """Запоминает тег, если релиз для него создан или уже существовал."""
+        if result.status not in SETTLED_STATUSES or not result.tag_name:
+            return
+        with self._lock:
+            self._db.execute(
+                'INSERT OR REPLACE INTO repos (repo, tag_name, status, checked) VALUES (?, ?, ?, ?)',
+                (result.repo, result.tag_name, result.status.value, time.time()))
+            self._db.commit()
+
+    def close(self):
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,218 @@
+"""
+Постраничный обход тегов и выбор последнего тега по версии или дате.
+
+Раньше последним тегом считался tags[0] с первой страницы /tags, но
+GitHub не упорядочивает этот список ни по версии, ни по дате, а
+следующие страницы не просматривались вовсе. Здесь теги читаются
+страницами по 100 (по Link или X-Next-Page), каждая страница сразу
+отдается TagSelector, который хранит только двух лучших кандидатов
+(записями Tag, а не словарями из ответа).
+Если API сам сортирует теги в нужном порядке (GitLab order_by=version
+или updated), обход останавливается, как только кандидаты найдены. В
+режиме минимальных ответов такой обход начинается со страницы из двух
+тегов, и страницы по 100 запрашиваются, только если их не хватило.
+Для тега из webhook события нужен не последний тег, а предыдущий перед
+ним (below): так заметки исправления v1.4.3, вышедшего после v2.0.0,
+строятся от v1.4.2.
+"""
+
+import re
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .http_transport import HTTPRequest, Steps
+from .records import Tag
+
+
+TAGS_PER_PAGE = 100
+# Первая страница в режиме минимальных ответов: только последний и предыдущий теги
+PROBE_TAGS_PER_PAGE = 2
+# Потолок страниц для API без гарантий порядка (10 страниц = 1000 тегов)
+DEFAULT_MAX_TAG_PAGES = 10
+TAG_ORDERS = ('semver', 'date', 'api')
+
+SEMVER = re.compile(
+    r'^[vV]?(\d+)\.(\d+)(?:\.(\d+))?(?:-([0-9A-Za-z.-]+))?(?:\+[0-9A-Za-z.-]+)?$')
+
+
+def parse_version(name: str) -> Optional[Tuple]:
+    """
+    Ключ сортировки semver тега (v1.2.3, 1.2, 2.0.0-rc.1) или None.
+
+    Пре-релиз младше релиза той же версии; числовые части пре-релиза
+    сравниваются как числа, как в semver 2.0.
+    """
+    match = SEMVER.match(name)
+    if not match:
+        return None
+    major, minor, patch, prerelease = match.groups()
+    if prerelease is None:
+        pre_key: Tuple = (1,)
+    else:
+        pre_key = (0,) + tuple((0, int(part), '') if part.isdigit() else (1, 0, part)
+                               for part in prerelease.split('.'))
+    return int(major), int(minor), int(patch or 0), pre_key
+
+
+def parse_tag_date(tag: Dict) -> Optional[datetime]:
+    """Дата коммита тега (GitLab: commit.created_at) или None."""
+    value = (tag.get('commit') or {}).get('created_at')
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        return None
+
+
+class TagSelector:
+    def __init__(self, order: str = 'semver', keep: int = 2, presorted: bool = False,
+                 below: Optional[str] = None):
+        """
+        Инициализация выбора тегов.
+
+        Args:
+            order: semver - по версии, date - по дате коммита, api - как отдал API
+            keep: Сколько лучших тегов хранить (последний и предыдущий)
+            presorted: API уже отдает теги в порядке order (можно остановиться раньше)
+            below: Учитывать только теги до этого: для semver - с версией
+                ниже, для date и api (или если below не версия) - идущие в
+                списке после него
+        """
+        if order not in TAG_ORDERS:
+            raise ValueError(f'Неизвестный порядок тегов: {order}')
+        self.order = order
+        self.keep = keep
+        self.presorted = presorted
+        self.below = below
+        self._below_key = parse_version(below) if below and order == 'semver' else None
+        self.seen = 0
+        self._below_seen = False
+        # Первые теги в порядке API - запасной вариант, если ни один не подошел
+        self._first: List[Tag] = []
+        self._best: List[Tuple] = []
+
+    def _key(self, tag: Dict):
+        if self.order == 'semver':
+            return parse_version(tag.get('name', ''))
+        if self.order == 'date':
+            return parse_tag_date(tag)
+        return None
+
+    def _is_not_below(self, tag: Dict) -> bool:
+        if tag.get('name') == self.below:
+            self._below_seen = True
+            return True
+        if self._below_key is None:
+            # Список идет от новых к старым: до события - все, что после него
+            return not self._below_seen
+        key = parse_version(tag.get('name', ''))
+        return key is not None and key >= self._below_key
+
+    def feed(self, tags: List[Dict]) -> bool:
+        """
+        Учитывает очередную страницу тегов.
+
+        Returns:
+            True, если на следующих страницах еще может быть кандидат лучше
+        """
+        for tag in tags:
+            self.seen += 1
+            if self.below is not None and self._is_not_below(tag):
+                continue
+            if len(self._first) < self.keep:
+                self._first.append(Tag.from_api(tag))
+            key = self._key(tag)
+            if key is None:
+                continue
+            if len(self._best) == self.keep and key <= self._best[-1][0]:
+                continue
+            # -seen: при равных ключах выигрывает тег, встреченный раньше
+            self._best.append((key, -self.seen, Tag.from_api(tag)))
+            self._best.sort(key=lambda entry: entry[:2], reverse=True)
+            del self._best[self.keep:]
+
+        if self.order == 'api':
+            return len(self._first) < self.keep
+        if self.presorted:
+            return len(self._best) < self.keep
+        return True
+
+    @property
+    def ranked(self) -> bool:
+        """Нашелся ли тег, подходящий под order (иначе selected - первые теги API)."""
+        return bool(self._best)
+
+    @property
+    def selected(self) -> List[Tag]:
+        """Лучшие теги, начиная с последнего."""
+        if self.order == 'api' or not self._best:
+            return list(self._first)
+        return [tag for _, _, tag in self._best]
+
+
+def paginate_steps(url: str, headers: Dict[str, str], params: Optional[Dict],
+                   on_page: Callable[[List[Dict]], bool],
+                   max_pages: Optional[int] = None) -> Steps:
+    """
+    Шаги постраничного обхода списка.
+
+    Каждая страница передается в on_page сразу после получения; обход
+    заканчивается, когда страниц больше нет, on_page вернул False или
+    достигнут max_pages. Следующая страница ищется в заголовке Link
+    (GitHub и GitLab), а при его отсутствии - в X-Next-Page (GitLab).
+
+    Returns:
+        Кортеж (просмотрено страниц, остались ли непросмотренные страницы)
+    """
+    pages = 0
+    params = dict(params or {})
+    while True:
+        response = yield HTTPRequest('GET', url, headers=headers, params=params or None)
+        response.raise_for_status()
+        pages += 1
+        wants_more = on_page(response.json())
+
+        next_url = response.links.get('next', {}).get('url')
+        next_page = response.headers.get('X-Next-Page')
+        if not next_url and not next_page:
+            return pages, False
+        if not wants_more:
+            return pages, False
+        if max_pages is not None and pages >= max_pages:
+            return pages, True
+        if next_url:
+            # В Link уже есть все параметры запроса
+            url, params = next_url, {}
+        else:
+            params['page'] = next_page
+
+
+def release_tags_steps(url: str, headers: Dict[str, str], params: Optional[Dict],
+                       order: str, presorted: bool = False, max_pages: Optional[int] = None,
+                       minimal: bool = False, below: Optional[str] = None) -> Steps:
+    """
+    Шаги выбора последнего и предыдущего тегов.
+
+    Args:
+        presorted: API отдает теги в порядке order
+        minimal: Сначала запросить страницу из PROBE_TAGS_PER_PAGE тегов;
+            помогает, только если теги уже упорядочены (presorted или api)
+        below: Выбирать только среди тегов до этого (см. TagSelector)
+
+    Returns:
+        Кортеж (выбранные теги, просмотрено страниц, остались ли непросмотренные)
+    """
+    params = dict(params or {})
+    if minimal and (presorted or order == 'api'):
+        selector = TagSelector(order, presorted=presorted, below=below)
+        pages, truncated = yield from paginate_steps(
+            url, headers, {**params, 'per_page': PROBE_TAGS_PER_PAGE}, selector.feed, max_pages=1)
+        if not truncated:
+            return selector.selected, pages, False
+        # Среди первых тегов нет двух подходящих: обычный обход с первой страницы
+
+    selector = TagSelector(order, presorted=presorted, below=below)
+    pages, truncated = yield from paginate_steps(url, headers, {**params, 'per_page': TAGS_PER_PAGE},
+                                                 selector.feed, max_pages=max_pages)
+    return selector.selected, pages, truncated
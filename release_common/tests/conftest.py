@@ -0,0 +1,38 @@
+import os
+import subprocess
+
+import pytest
+
+GIT_IDENTITY = {'GIT_AUTHOR_NAME': 'dev', 'GIT_AUTHOR_EMAIL': 'dev@example.com',
+                'GIT_COMMITTER_NAME': 'dev', 'GIT_COMMITTER_EMAIL': 'dev@example.com'}
+
+
+@pytest.fixture
+def git_repos(tmp_path):
+    """
+    Фабрика локальных репозиториев: make(repo, [(тег, сообщение коммита, аннотированный)]).
+
+    Для каждого тега создается отдельный коммит. Возвращает шаблон адреса
+    file://.../{repo}, как у --mirror-url.
+    """
+    root = tmp_path / 'remote'
+    env = dict(os.environ, **GIT_IDENTITY)
+
+    def git(path, *args):
+        subprocess.run(['git', *args], cwd=path, env=env, check=True, capture_output=True)
+
+    def make(repo, tags):
+        path = root / repo
+        path.mkdir(parents=True)
+        git(path, 'init', '--quiet')
+        for name, message, annotated in tags:
+            git(path, 'commit', '--quiet', '--allow-empty', '-m', message)
+            if annotated:
+                git(path, 'tag', '-a', name, '-m', f'Release {name}')
+            else:
+                git(path, 'tag', name)
+        return path
+
+    make.url_template = f'file://{root}/{{repo}}'
+    make.git = git
+    return make
@@ -0,0 +1,38 @@
+import time
+
+import pytest
+
+from release_common.http_transport import HTTPRequest
+
+pytest.importorskip('aiohttp')
+
+from release_common.async_engine import AsyncTransport, run_in_event_loop  # noqa: E402
+
+
+def test_blocking_step_code_does_not_stall_event_loop(mock_api):
+    def steps(repo):
+        response = yield HTTPRequest('GET', f'{mock_api.url}/repos/org/{repo}/tags')
+        # Как запись журнала или чтение git зеркала между запросами
+        time.sleep(0.5)
+        print(f'{repo}: {len(response.json())}')
+        return repo
+
+    started = time.monotonic()
+    results = list(run_in_event_loop(steps, ['a', 'b', 'c'], AsyncTransport(concurrency=3)))
+    elapsed = time.monotonic() - started
+
+    assert elapsed < 1.0
+    assert sorted((item, result, output) for item, result, output in results) == [
+        ('a', 'a', 'a: 5\n'), ('b', 'b', 'b: 5\n'), ('c', 'c', 'c: 5\n')]
+
+
+def test_steps_see_request_errors(mock_api):
+    def steps(_):
+        try:
+            yield HTTPRequest('GET', 'http://127.0.0.1:1/unreachable')
+        except Exception as e:
+            return type(e).__name__
+
+    results = list(run_in_event_loop(steps, ['x'], AsyncTransport()))
+
+    assert results[0][1] == 'ConnectionError'
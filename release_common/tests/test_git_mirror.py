@@ -0,0 +1,82 @@
+import os
+
+import pytest
+
+from release_common.git_mirror import GitMirror, GitMirrorError
+
+
+@pytest.fixture
+def mirror(git_repos, tmp_path):
+    return GitMirror(str(tmp_path / 'mirrors'), git_repos.url_template)
+
+
+def names(tags):
+    return [tag.name for tag in tags]
+
+
+def test_sync_clones_once_then_fetches_new_tags(git_repos, mirror):
+    path = git_repos('org/app', [('v1.0.0', 'first', False), ('v1.1.0', 'second', True)])
+
+    assert mirror.sync('org/app') is True
+    git_repos.git(path, 'commit', '--quiet', '--allow-empty', '-m', 'third')
+    git_repos.git(path, 'tag', 'v1.2.0')
+    git_repos.git(path, 'tag', '-d', 'v1.0.0')
+    assert mirror.sync('org/app') is False
+
+    mirror.sync_all(['org/app'])
+    assert names(mirror.release_tags('org/app')) == ['v1.2.0', 'v1.1.0']
+    # Удаленный на сервере тег удален и из зеркала
+    with pytest.raises(GitMirrorError):
+        mirror.commits('org/app', 'v1.0.0', 'v1.2.0')
+    assert mirror.path_for('org/app').endswith('local/org/app.git')
+
+
+def test_release_tags_by_semver_and_below(git_repos, mirror):
+    git_repos('org/app', [('v1.4.2', 'fix', False), ('v2.0.0', 'major', True),
+                          ('v1.4.3', 'hotfix', True), ('nightly', 'build', False)])
+    mirror.sync_all(['org/app'])
+
+    assert names(mirror.release_tags('org/app')) == ['v2.0.0', 'v1.4.3']
+    assert names(mirror.release_tags('org/app', below='v1.4.3')) == ['v1.4.2']
+
+
+def test_commits_between_tags_oldest_first(git_repos, mirror):
+    git_repos('org/app', [('v1.0.0', 'first', False), ('v1.0.1', 'fix: parser', False),
+                          ('v1.1.0', 'feat: cache\n\nDetails', True)])
+    mirror.sync_all(['org/app'])
+
+    commits = mirror.commits('org/app', 'v1.0.0', 'v1.1.0')
+
+    assert [commit['message'] for commit in commits] == ['fix: parser', 'feat: cache\n\nDetails']
+    assert {commit['author_email'] for commit in commits} == {'dev@example.com'}
+
+
+def test_failed_sync_is_reported_and_not_read(git_repos, mirror):
+    git_repos('org/app', [('v1.0.0', 'first', False)])
+
+    mirror.sync_all(['org/app', 'org/missing'])
+
+    assert list(mirror.synced) == ['org/app']
+    assert 'org/missing' in mirror.failed
+    with pytest.raises(GitMirrorError):
+        mirror.release_tags('org/missing')
+    assert 'не удалось 1' in mirror.report()
+
+
+def test_concurrent_clone_of_same_repo_is_not_an_error(git_repos, mirror, monkeypatch):
+    git_repos('org/app', [('v1.0.0', 'first', False)])
+    other = GitMirror(mirror.root, git_repos.url_template)
+    clone = mirror._git
+
+    def clone_while_other_finishes_first(*args, **kwargs):
+        output = clone(*args, **kwargs)
+        if args[0] == 'clone':
+            # Другой процесс закончил clone раньше и уже переименовал свой каталог
+            assert other.sync('org/app') is True
+        return output
+
+    monkeypatch.setattr(mirror, '_git', clone_while_other_finishes_first)
+
+    assert mirror.sync('org/app') is False
+    # Временных каталогов не осталось
+    assert sorted(os.listdir(os.path.dirname(mirror.path_for('org/app')))) == ['app.git']
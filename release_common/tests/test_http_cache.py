@@ -0,0 +1,95 @@
+from urllib.parse import quote
+
+import requests
+
+from release_common.http_cache import HTTPCache
+from release_common.http_transport import HTTPRequest, HTTPTransport
+
+
+def make_response(body: bytes, etag: str) -> requests.Response:
+    response = requests.Response()
+    response.status_code = 200
+    response.headers['ETag'] = etag
+    response._content = body
+    return response
+
+
+def test_second_get_is_revalidated_from_cache(mock_api, tmp_path):
+    cache = HTTPCache(str(tmp_path / 'cache.sqlite'))
+    url = f'{mock_api.url}/repos/org/app/tags'
+    with HTTPTransport(cache=cache) as transport:
+        first = transport.send(HTTPRequest('GET', url))
+        second = transport.send(HTTPRequest('GET', url))
+
+    assert not getattr(first, 'from_cache', False)
+    assert second.from_cache
+    assert second.status_code == 200
+    assert second.json() == first.json()
+    # Сервер получил If-None-Match и ответил 304 без тела
+    assert mock_api.state.not_modified == 1
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert cache.bytes_saved == len(first.content)
+    cache.close()
+
+
+def test_requests_with_other_token_do_not_share_entry(mock_api, tmp_path):
+    cache = HTTPCache(str(tmp_path / 'cache.sqlite'))
+    url = f'{mock_api.url}/repos/org/app/tags'
+    with HTTPTransport(cache=cache) as transport:
+        transport.send(HTTPRequest('GET', url, headers={'Authorization': 'token a'}))
+        response = transport.send(HTTPRequest('GET', url, headers={'Authorization': 'token b'}))
+
+    assert not getattr(response, 'from_cache', False)
+    assert mock_api.state.not_modified == 0
+    cache.close()
+
+
+def test_least_recently_used_entry_is_evicted(tmp_path):
+    cache = HTTPCache(str(tmp_path / 'cache.sqlite'), max_bytes=250)
+    entries = {}
+    for name in ('a', 'b'):
+        key, url = cache.cache_key('GET', f'https://api.test/{name}', None, None)
+        cache.store(key, url, make_response(name.encode() * 100, f'"{name}"'))
+        entries[name] = key
+    # Обращение к a делает самой старой запись b
+    cache.revalidated(cache.lookup(entries['a']), make_response(b'', '"a"'))
+
+    key, url = cache.cache_key('GET', 'https://api.test/c', None, None)
+    cache.store(key, url, make_response(b'c' * 100, '"c"'))
+
+    assert cache.evictions == 1
+    assert cache.lookup(entries['b']) is None
+    assert cache.lookup(entries['a']).body == b'a' * 100
+    assert cache.lookup(key).body == b'c' * 100
+    cache.close()
+
+
+def test_smaller_limit_evicts_on_open(tmp_path):
+    path = str(tmp_path / 'cache.sqlite')
+    cache = HTTPCache(path)
+    for name in ('a', 'b', 'c'):
+        key, url = cache.cache_key('GET', f'https://api.test/{name}', None, None)
+        cache.store(key, url, make_response(b'x' * 100, f'"{name}"'))
+    cache.close()
+
+    cache = HTTPCache(path, max_bytes=150)
+
+    assert cache.evictions == 2
+    cache.close()
+
+
+def test_pagination_headers_survive_cache_hit(mock_api, tmp_path):
+    cache = HTTPCache(str(tmp_path / 'cache.sqlite'))
+    github_url = f'{mock_api.url}/repos/org/app/tags'
+    with HTTPTransport(cache=cache) as transport:
+        project = transport.get(f'{mock_api.url}/api/v4/projects/{quote("grp/app", safe="")}').json()
+        gitlab_url = f'{mock_api.url}/api/v4/projects/{project["id"]}/repository/tags'
+        for url in (github_url, gitlab_url):
+            transport.send(HTTPRequest('GET', url, params={'per_page': 2}))
+        github = transport.send(HTTPRequest('GET', github_url, params={'per_page': 2}))
+        gitlab = transport.send(HTTPRequest('GET', gitlab_url, params={'per_page': 2}))
+
+    assert github.from_cache and gitlab.from_cache
+    assert github.links['next']['url'].endswith('page=2')
+    assert gitlab.headers['X-Next-Page'] == '2'
+    cache.close()
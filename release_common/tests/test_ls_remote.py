@@ -0,0 +1,59 @@
+import subprocess
+
+import pytest
+
+from release_common.git_mirror import GitMirrorError
+from release_common.ls_remote import TagProbe, parse_tag_refs
+
+
+def test_parse_tag_refs_uses_peeled_commit():
+    advertisement = ('1111\trefs/heads/main\n'
+                     '2222\trefs/tags/v1.0.0\n'
+                     '3333\trefs/tags/v2.0.0\n'
+                     '4444\trefs/tags/v2.0.0^{}\n')
+
+    tags = parse_tag_refs(advertisement)
+
+    assert tags == [{'name': 'v1.0.0', 'commit': {'id': '2222'}},
+                    {'name': 'v2.0.0', 'commit': {'id': '4444'}}]
+
+
+def test_probe_picks_latest_semver_not_first_by_name(git_repos):
+    path = git_repos('org/app', [('v0.1.0', 'first', False), ('v0.9.0', 'second', False),
+                                 ('v2.0.0', 'third', True)])
+    head = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=path, check=True,
+                          capture_output=True, text=True).stdout.strip()
+
+    tags = TagProbe(git_repos.url_template).probe('org/app')
+
+    assert [tag.name for tag in tags] == ['v2.0.0', 'v0.9.0']
+    # У аннотированного тега - коммит, а не объект тега
+    assert tags[0].sha == head
+
+
+def test_probe_without_semver_tags_leaves_repo_to_api(git_repos):
+    git_repos('org/app', [('beta', 'first', False), ('alpha', 'second', False)])
+    probe = TagProbe(git_repos.url_template)
+
+    with pytest.raises(GitMirrorError):
+        probe.probe('org/app')
+    assert probe.probe_all(['org/app']) == {}
+    assert 'org/app' in probe.failed
+
+
+def test_probe_all_collects_failures(git_repos):
+    git_repos('org/app', [('v1.0.0', 'first', False)])
+    git_repos('org/empty', [])
+    probe = TagProbe(git_repos.url_template)
+
+    found = probe.probe_all(['org/app', 'org/empty', 'org/missing'], jobs=2)
+
+    assert [tag.name for tag in found['org/app']] == ['v1.0.0']
+    assert found['org/empty'] == []
+    assert list(probe.failed) == ['org/missing']
+
+
+@pytest.mark.parametrize('order', ['api', 'date'])
+def test_probe_rejects_orders_that_need_server_order_or_dates(order):
+    with pytest.raises(ValueError):
+        TagProbe('file:///srv/{repo}', tag_order=order)
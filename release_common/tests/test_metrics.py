@@ -0,0 +1,112 @@
+import json
+import os
+
+import pytest
+import requests
+
+from release_common.http_transport import HTTPRequest
+from release_common.metrics import Histogram, RunMetrics, endpoint_label
+from release_common.run_results import RepoResult, RepoStatus
+
+
+TAGS_URL = 'https://api.github.com/repos/org/app/tags'
+
+
+def make_response(status: int = 200, body: bytes = b'', from_cache: bool = False):
+    response = requests.Response()
+    response.status_code = status
+    response._content = body
+    if from_cache:
+        response.from_cache = True
+    return response
+
+
+@pytest.fixture
+def metrics():
+    metrics = RunMetrics('github')
+    metrics.observe_request(HTTPRequest('GET', TAGS_URL), 0.03, make_response(body=b'x' * 2048))
+    metrics.observe_request(HTTPRequest('GET', 'https://api.github.com/repos/org/lib/tags'), 0.02,
+                            make_response(body=b'x' * 4096, from_cache=True))
+    error = requests.exceptions.ConnectionError('refused')
+    error.retries = 2
+    metrics.observe_request(HTTPRequest('POST', 'https://api.github.com/repos/org/app/releases'),
+                            1.5, error=error)
+    metrics.observe_result(RepoResult('org/app', RepoStatus.CREATED, tag_name='v1.0.4',
+                                      timings={'tags': 0.03, 'create': 1.5}))
+    return metrics
+
+
+def test_endpoint_label_hides_names():
+    assert endpoint_label('https://api.github.com/repos/org/app/releases/tags/v1.0.0') == \
+        '/repos/{owner}/{repo}/releases/tags/{tag}'
+    assert endpoint_label('https://gitlab.com/api/v4/projects/grp%2Fapp/releases/v1.0') == \
+        '/api/v4/projects/{id}/releases/{release}'
+
+
+def test_percentiles_of_uniform_sample():
+    histogram = Histogram()
+    for n in range(1, 1001):
+        histogram.observe(n / 1000)
+
+    assert histogram.quantile(0.5) == pytest.approx(0.5)
+    assert histogram.quantile(0.9) == pytest.approx(0.9)
+    assert histogram.quantile(0.99) == pytest.approx(0.99)
+    assert histogram.summary()['max'] == 1.0
+
+
+def test_percentiles_stay_within_observed_range():
+    histogram = Histogram()
+    assert histogram.quantile(0.5) == 0.0
+
+    for value in (70.0, 80.0, 90.0):
+        histogram.observe(value)
+    # Выше последней границы известен только максимум
+    assert histogram.quantile(0.5) == 90.0
+
+    histogram = Histogram()
+    for _ in range(10):
+        histogram.observe(0.3)
+    assert histogram.quantile(0.5) == pytest.approx(0.3)
+
+
+def test_prometheus_file(metrics, tmp_path):
+    path = str(tmp_path / 'metrics' / 'release_creator.prom')
+
+    metrics.write(prometheus_path=path)
+
+    with open(path, encoding='utf-8') as f:
+        lines = f.read().splitlines()
+    labels = 'provider="github",host="api.github.com",method="GET",endpoint="/repos/{owner}/{repo}/tags"'
+    assert f'release_creator_http_requests{{{labels},status="200"}} 1' in lines
+    assert f'release_creator_http_requests{{{labels},status="304"}} 1' in lines
+    assert f'release_creator_http_response_bytes{{{labels}}} 2048' in lines
+    assert f'release_creator_http_request_duration_seconds_bucket{{{labels},le="0.025"}} 1' in lines
+    assert f'release_creator_http_request_duration_seconds_bucket{{{labels},le="+Inf"}} 2' in lines
+    post = 'provider="github",host="api.github.com",method="POST",endpoint="/repos/{owner}/{repo}/releases"'
+    assert f'release_creator_http_requests{{{post},status="ConnectionError"}} 1' in lines
+    assert f'release_creator_http_retries{{{post}}} 2' in lines
+    assert 'release_creator_repos{provider="github",status="created"} 1' in lines
+    assert os.listdir(os.path.dirname(path)) == ['release_creator.prom']
+
+
+def test_json_report(metrics, tmp_path):
+    path = str(tmp_path / 'metrics.json')
+
+    metrics.write(json_path=path)
+
+    with open(path, encoding='utf-8') as f:
+        report = json.load(f)
+    assert report['provider'] == 'github'
+    assert report['repos'] == {'created': 1}
+    assert set(report['stages']) == {'tags', 'create'}
+    tags, = [entry for entry in report['requests'] if entry['method'] == 'GET']
+    assert tags['requests'] == 2
+    assert tags['statuses'] == {'200': 1, '304': 1}
+    assert tags['bytes'] == 2048
+    assert tags['duration_seconds']['max'] == 0.03
+
+
+def test_traffic_report(metrics):
+    assert metrics.traffic_report() == \
+        'Ответы API: 2 КБ в 3 запросах; больше всего: GET /repos/{owner}/{repo}/tags 2 КБ'
+    assert RunMetrics('gitlab').traffic_report() == 'Ответы API: 0 КБ в 0 запросах; больше всего: -'
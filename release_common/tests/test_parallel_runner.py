@@ -0,0 +1,151 @@
+import io
+import sys
+import threading
+import time
+
+import pytest
+
+from release_common.parallel_runner import (
+    ItemStream, OutputRouter, captured_output, run_in_lanes, run_in_threads)
+
+
+class SleepyStep:
+    """Шаг обработки, который печатает в несколько приемов и спит между ними."""
+
+    def __init__(self, delay: float = 0.02, delays=None):
+        self.delay = delay
+        self.delays = delays or {}
+        self.active = 0
+        self.max_active = 0
+        # Хост -> сколько его элементов обрабатывается сейчас и максимум
+        self.host_active = {}
+        self.host_max_active = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, item):
+        host = item.split('/', 1)[0]
+        with self._lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+            self.host_active[host] = self.host_active.get(host, 0) + 1
+            self.host_max_active[host] = max(self.host_max_active.get(host, 0),
+                                             self.host_active[host])
+        try:
+            for stage in ('start', 'tags', 'done'):
+                print(f'{item}: {stage}')
+                time.sleep(self.delays.get(host, self.delay))
+            return item.upper()
+        finally:
+            with self._lock:
+                self.active -= 1
+                self.host_active[host] -= 1
+
+
+def test_router_writes_task_output_to_its_buffer():
+    stream = io.StringIO()
+    router = OutputRouter(stream)
+
+    with captured_output() as buffer:
+        router.write('inside\n')
+    router.write('outside\n')
+
+    assert buffer.getvalue() == 'inside\n'
+    assert stream.getvalue() == 'outside\n'
+
+
+def test_threads_collect_all_results_with_separate_output():
+    step = SleepyStep()
+    items = [f'org/repo{n}' for n in range(8)]
+    stdout = sys.stdout
+
+    results = list(run_in_threads(step, items, workers=4))
+
+    assert sys.stdout is stdout
+    assert sorted(item for item, _, _ in results) == items
+    assert all(result == item.upper() for item, result, _ in results)
+    # Вывод каждой задачи - только ее строки и целиком, без чужих вставок
+    for item, _, output in results:
+        assert output == f'{item}: start\n{item}: tags\n{item}: done\n'
+    assert 1 < step.max_active <= 4
+
+
+def test_single_worker_prints_directly(capsys):
+    results = list(run_in_threads(SleepyStep(0), ['org/a', 'org/b'], workers=1))
+
+    assert [(item, result, output) for item, result, output in results] == [
+        ('org/a', 'ORG/A', ''), ('org/b', 'ORG/B', '')]
+    assert capsys.readouterr().out.splitlines()[0] == 'org/a: start'
+
+
+def test_stream_yields_items_before_source_finishes():
+    first_page_taken = threading.Event()
+
+    def produce(emit):
+        emit('org/a')
+        emit('org/b')
+        # Следующая "страница" читается только после того, как обработка началась
+        assert first_page_taken.wait(5)
+        emit('org/c')
+
+    stream = ItemStream(produce)
+
+    assert next(stream) == 'org/a'
+    first_page_taken.set()
+    assert list(stream) == ['org/b', 'org/c']
+    assert stream.count == 3
+
+
+def test_stream_raises_source_error_after_emitted_items():
+    def produce(emit):
+        emit('org/a')
+        raise RuntimeError('page 2 failed')
+
+    stream = ItemStream(produce)
+
+    assert next(stream) == 'org/a'
+    with pytest.raises(RuntimeError, match='page 2 failed'):
+        next(stream)
+
+
+def test_stream_stops_reading_source_when_consumer_stops():
+    def produce(emit):
+        for n in range(100):
+            emit(f'org/repo{n}')
+
+    stream = ItemStream(produce, buffer=2)
+    taken = [next(stream) for _ in range(3)]
+
+    assert taken == ['org/repo0', 'org/repo1', 'org/repo2']
+    # Источник ждет места в очереди и не читает список дальше
+    stream._thread.join(0.2)
+    assert stream._thread.is_alive()
+    assert stream.count <= 3 + 2 + 1
+
+
+def test_lanes_limit_each_host_separately():
+    step = SleepyStep()
+    lanes = {host: [f'{host}/repo{n}' for n in range(6)]
+             for host in ('github.com', 'gitlab.com', 'gitlab.example.com')}
+
+    results = list(run_in_lanes(step, lanes, workers=2))
+
+    assert sorted(item for item, _, _ in results) == sorted(sum(lanes.values(), []))
+    for item, _, output in results:
+        assert output == f'{item}: start\n{item}: tags\n{item}: done\n'
+    assert all(active <= 2 for active in step.host_max_active.values())
+    assert step.max_active > 2
+
+
+def test_slow_lane_does_not_hold_back_other_lanes():
+    step = SleepyStep(delay=0.005, delays={'slow.example.com': 0.05})
+    lanes = {'slow.example.com': [f'slow.example.com/repo{n}' for n in range(4)],
+             'github.com': [f'github.com/repo{n}' for n in range(8)]}
+
+    order = [item for item, _, _ in run_in_lanes(step, lanes, workers=1)]
+
+    # Быстрая полоса заканчивает, пока медленная обрабатывает первые элементы
+    assert max(order.index(item) for item in lanes['github.com']) < order.index(lanes['slow.example.com'][-1])
+
+
+def test_no_lanes_yield_nothing():
+    assert list(run_in_lanes(SleepyStep(), {})) == []
@@ -0,0 +1,124 @@
+import pytest
+import requests
+
+from release_common.rate_limiter import POLL_INTERVAL, RESET_MARGIN, RateLimiter
+
+
+class FakeClock:
+    """Часы, которые двигаются только вручную (вместо time.sleep)."""
+
+    def __init__(self, now: float = 1_700_000_000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float):
+        self.now += seconds
+
+
+def make_response(status: int = 200, **headers) -> requests.Response:
+    response = requests.Response()
+    response.status_code = status
+    response.headers.update({name.replace('_', '-'): str(value) for name, value in headers.items()})
+    response._content = b''
+    return response
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def limiter(clock):
+    return RateLimiter(clock=clock)
+
+
+KEY = RateLimiter.key_for('https://api.github.com/repos/org/app', {'Authorization': 'token x'})
+
+
+def budget_response(clock, remaining: int, reset_in: float, limit: int = 100, **headers):
+    return make_response(X_RateLimit_Limit=limit, X_RateLimit_Remaining=remaining,
+                         X_RateLimit_Reset=int(clock.now + reset_in), **headers)
+
+
+def test_unobserved_budget_sends_one_probe_first(limiter):
+    assert limiter.reserve(KEY) == 0
+    # Пока нет ответа с заголовками, остальные запросы ждут
+    assert limiter.reserve(KEY) == POLL_INTERVAL
+
+    limiter.observe(KEY, make_response())
+
+    assert limiter.reserve(KEY) == 0
+    assert limiter.reserve(KEY) == 0
+    assert limiter.waited == 0
+
+
+def test_large_budget_is_not_paced(limiter, clock):
+    limiter.reserve(KEY)
+    limiter.observe(KEY, budget_response(clock, remaining=50, reset_in=600))
+
+    assert all(limiter.reserve(KEY) == 0 for _ in range(20))
+
+
+def test_low_budget_is_spread_until_reset(limiter, clock):
+    limiter.reserve(KEY)
+    limiter.observe(KEY, budget_response(clock, remaining=5, reset_in=10))
+
+    assert limiter.reserve(KEY) == 0
+    # Осталось 4 запроса на 10 секунд: один в 2.5 секунды
+    delay = limiter.reserve(KEY)
+    assert delay == pytest.approx(2.5)
+
+    clock.sleep(delay)
+    assert limiter.reserve(KEY) == 0
+
+
+def test_exhausted_budget_waits_until_reset(limiter, clock):
+    limiter.reserve(KEY)
+    limiter.observe(KEY, budget_response(clock, remaining=0, reset_in=30))
+
+    delay = limiter.reserve(KEY)
+    assert delay == pytest.approx(30 + RESET_MARGIN)
+
+    clock.sleep(delay)
+    assert limiter.reserve(KEY) == 0
+
+
+def test_rate_limited_403_waits_until_reset(limiter, clock):
+    limiter.reserve(KEY)
+
+    assert limiter.observe(KEY, make_response(403, X_RateLimit_Limit=100, X_RateLimit_Remaining=0,
+                                              X_RateLimit_Reset=int(clock.now + 20)))
+    assert limiter.reserve(KEY) == pytest.approx(20 + RESET_MARGIN)
+    assert limiter.throttled == 1
+
+
+def test_retry_after_blocks_requests(limiter, clock):
+    limiter.reserve(KEY)
+
+    assert limiter.observe(KEY, make_response(429, Retry_After=7))
+    assert limiter.reserve(KEY) == pytest.approx(7)
+
+    clock.sleep(7)
+    assert limiter.reserve(KEY) == 0
+
+
+def test_plain_403_is_not_retried(limiter):
+    limiter.reserve(KEY)
+
+    assert not limiter.observe(KEY, make_response(403))
+    assert limiter.reserve(KEY) == 0
+
+
+def test_max_rps_spaces_requests(clock):
+    limiter = RateLimiter(max_rps=2, clock=clock)
+    assert limiter.reserve(KEY) == 0
+    limiter.observe(KEY, make_response())
+
+    delay = limiter.reserve(KEY)
+    assert delay == pytest.approx(0.5)
+
+    clock.sleep(delay)
+    assert limiter.reserve(KEY) == 0
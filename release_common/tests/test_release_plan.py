@@ -0,0 +1,54 @@
+import pytest
+
+from release_common.release_plan import PlanEntry, ReleasePlan
+from release_common.run_results import RepoResult, RepoStatus
+
+
+def planned(repo, tag_name, payload):
+    return RepoResult(repo, RepoStatus.PLANNED, tag_name=tag_name, planned={'payload': payload})
+
+
+def test_plan_round_trip(tmp_path):
+    path = str(tmp_path / 'plans' / 'plan.json')
+    plan = ReleasePlan('gitlab', 'https://gitlab.example/api/v4')
+    plan.add(planned('grp/app', 'v1.0.0', {'tag_name': 'v1.0.0', 'description': 'Заметки'}))
+    plan.add(RepoResult('grp/lib', RepoStatus.ALREADY_EXISTS))
+    plan.add(RepoResult('grp/old').fail('получение тегов: 404'))
+    plan.save(path)
+
+    loaded = ReleasePlan.load(path, 'gitlab', 'https://gitlab.example/api/v4')
+
+    [entry] = loaded.entries
+    assert (entry.repo, entry.tag_name) == ('grp/app', 'v1.0.0')
+    assert entry.data == {'payload': {'tag_name': 'v1.0.0', 'description': 'Заметки'}}
+    assert loaded.skipped == {'already_exists': 1, 'error': 1}
+    assert loaded.report() == ('План: релизов к созданию 1, не требуют действий 1, '
+                               'не удалось спланировать 1')
+
+
+@pytest.mark.parametrize('provider, api_url', [
+    ('github', 'https://gitlab.example/api/v4'),
+    ('gitlab', 'https://gitlab.other/api/v4'),
+])
+def test_plan_for_other_provider_or_api_is_rejected(tmp_path, provider, api_url):
+    path = str(tmp_path / 'plan.json')
+    ReleasePlan('gitlab', 'https://gitlab.example/api/v4').save(path)
+
+    with pytest.raises(ValueError):
+        ReleasePlan.load(path, provider, api_url)
+
+
+def test_non_plan_file_is_rejected(tmp_path):
+    path = tmp_path / 'plan.json'
+    path.write_text('[]', encoding='utf-8')
+
+    with pytest.raises(ValueError):
+        ReleasePlan.load(str(path), 'github', 'https://api.github.com')
+
+
+def test_entry_dict_round_trip_and_staleness():
+    entry = PlanEntry('org/app', 'v1.0.0', {'payload': {'tag_name': 'v1.0.0'}}, 1000.0)
+
+    assert PlanEntry.from_dict(entry.to_dict()).to_dict() == entry.to_dict()
+    assert not entry.is_stale(60, now=1030.0)
+    assert entry.is_stale(60, now=1100.0)
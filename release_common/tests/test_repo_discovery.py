@@ -0,0 +1,30 @@
+from release_common.repo_discovery import RepoFilter
+
+
+def test_filter_requires_all_topics():
+    repo_filter = RepoFilter(topics=['service', 'python'])
+
+    assert repo_filter.matches('org/api', ['python', 'service', 'web'])
+    assert not repo_filter.matches('org/lib', ['python'])
+
+
+def test_filter_skips_archived_unless_included():
+    assert not RepoFilter().matches('org/old', archived=True)
+    assert RepoFilter(include_archived=True).matches('org/old', archived=True)
+
+
+def test_filter_patterns_match_path_or_name():
+    repo_filter = RepoFilter(patterns=['org/api-*', 'worker'])
+
+    assert repo_filter.matches('org/api-gateway')
+    assert repo_filter.matches('grp/sub/worker')
+    assert not repo_filter.matches('org/web')
+
+
+def test_filter_counts_listed_and_matched():
+    repo_filter = RepoFilter(patterns=['a*'])
+    for path in ('org/alpha', 'org/beta', 'org/atlas'):
+        repo_filter.matches(path)
+
+    assert (repo_filter.listed, repo_filter.matched) == (3, 2)
+    assert '3' in repo_filter.report() and '2' in repo_filter.report()
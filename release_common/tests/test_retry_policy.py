@@ -0,0 +1,124 @@
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from release_common.http_transport import RATE_LIMIT_RETRIES, HTTPRequest, HTTPTransport
+from release_common.rate_limiter import RateLimiter
+from release_common.retry_policy import RetryPolicy, connection_not_established
+
+
+class TooManyRequestsHandler(BaseHTTPRequestHandler):
+    """Всегда отвечает 429 с Retry-After: 0 и считает запросы."""
+
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    status = 429
+
+    def do_GET(self):
+        self.server.requests += 1
+        self.send_response(self.status)
+        self.send_header('Retry-After', '0')
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    do_POST = do_GET
+
+
+class UnavailableHandler(TooManyRequestsHandler):
+    """Всегда отвечает 503."""
+
+    status = 503
+
+
+def serve(handler):
+    server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    server.requests = 0
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    host, port = server.server_address
+    return server, f'http://{host}:{port}/tags'
+
+
+@pytest.fixture
+def throttled_url():
+    server, url = serve(TooManyRequestsHandler)
+    yield server, url
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def unavailable_url():
+    server, url = serve(UnavailableHandler)
+    yield server, url
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def refused_url():
+    """Адрес, на котором никто не слушает: соединение отклоняется."""
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+    return f'http://127.0.0.1:{port}/releases'
+
+
+def test_429_is_retried_only_by_rate_limiter(throttled_url):
+    server, url = throttled_url
+    retry = RetryPolicy(retries=3, base_delay=0, max_delay=0)
+
+    with HTTPTransport(limiter=RateLimiter(), retry=retry) as transport:
+        response = transport.send(HTTPRequest('GET', url))
+
+    assert response.status_code == 429
+    assert server.requests == RATE_LIMIT_RETRIES + 1
+    assert retry.retried == 0
+
+
+def test_429_is_retried_by_policy_without_rate_limiter(throttled_url):
+    server, url = throttled_url
+    retry = RetryPolicy(retries=3, base_delay=0, max_delay=0)
+
+    with HTTPTransport(retry=retry) as transport:
+        response = transport.send(HTTPRequest('GET', url))
+
+    assert response.status_code == 429
+    assert server.requests == 4
+
+
+def test_post_5xx_is_not_retried(unavailable_url):
+    server, url = unavailable_url
+    retry = RetryPolicy(retries=3, base_delay=0, max_delay=0)
+
+    with HTTPTransport(retry=retry) as transport:
+        response = transport.send(HTTPRequest('POST', url, json={}))
+
+    assert response.status_code == 503
+    assert server.requests == 1
+    assert retry.retried == 0
+
+
+def test_post_is_retried_when_connection_refused(refused_url):
+    retry = RetryPolicy(retries=2, base_delay=0, max_delay=0)
+
+    with HTTPTransport(retry=retry) as transport:
+        with pytest.raises(requests.exceptions.ConnectionError) as error:
+            transport.send(HTTPRequest('POST', refused_url, json={}))
+
+    assert connection_not_established(error.value)
+    assert retry.retried == 2
+
+
+def test_dropped_connection_is_not_connection_failure():
+    error = requests.exceptions.ConnectionError(
+        ConnectionResetError(104, 'Connection reset by peer'))
+
+    assert not connection_not_established(error)
+    assert not RetryPolicy().should_retry(HTTPRequest('POST', 'http://api/releases'), error=error)
@@ -0,0 +1,30 @@
+from release_common.run_journal import RunJournal, is_unfinished
+from release_common.run_results import RepoResult, RepoStatus
+
+
+def test_journal_without_completion_mark_is_unfinished(tmp_path):
+    path = str(tmp_path / 'journal.jsonl')
+    assert not is_unfinished(path)
+
+    journal = RunJournal(path)
+    journal.finish(RepoResult('org/app', RepoStatus.CREATED))
+    assert is_unfinished(path)
+
+    journal.complete()
+    journal.close()
+    assert not is_unfinished(path)
+
+
+def test_resume_continues_after_completion_mark(tmp_path):
+    path = str(tmp_path / 'journal.jsonl')
+    journal = RunJournal(path)
+    journal.finish(RepoResult('org/app', RepoStatus.CREATED))
+    journal.complete()
+    journal.close()
+
+    journal = RunJournal(path, resume=True)
+    journal.record('org/other', 'tags', ['v1.0.0'])
+    journal.close()
+
+    assert is_unfinished(path)
+    assert RunJournal(path, resume=True).is_done('org/app')
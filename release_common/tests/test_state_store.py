@@ -0,0 +1,33 @@
+from release_common.run_results import RepoResult, RepoStatus
+from release_common.state_store import StateStore
+
+
+def settled(repo: str, tag_name: str, status: RepoStatus = RepoStatus.CREATED) -> RepoResult:
+    result = RepoResult(repo, status)
+    result.tag_name = tag_name
+    return result
+
+
+def test_settled_tag_is_unchanged_in_next_run(tmp_path):
+    path = str(tmp_path / 'state.sqlite')
+    state = StateStore(path)
+    state.update(settled('org/app', 'v1.0.4'))
+    state.update(settled('org/lib', 'v2.0.0', RepoStatus.ALREADY_EXISTS))
+    state.close()
+
+    state = StateStore(path)
+    assert state.is_unchanged('org/app', 'v1.0.4')
+    assert state.is_unchanged('org/lib', 'v2.0.0')
+    assert not state.is_unchanged('org/app', 'v1.0.5')
+    assert not state.is_unchanged('org/new', 'v1.0.0')
+    state.close()
+
+
+def test_unsettled_results_are_not_remembered(tmp_path):
+    state = StateStore(str(tmp_path / 'state.sqlite'))
+    state.update(settled('org/app', 'v1.0.3'))
+    for status in (RepoStatus.ERROR, RepoStatus.PLANNED, RepoStatus.NO_TAGS):
+        state.update(settled('org/app', 'v1.0.4', status))
+
+    assert state.last_tag('org/app') == 'v1.0.3'
+    state.close()
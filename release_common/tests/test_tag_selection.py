@@ -0,0 +1,98 @@
+from release_common.tag_selection import (
+    DEFAULT_MAX_TAG_PAGES, TagSelector, parse_version, release_tags_steps)
+
+
+def names(tags):
+    return [tag.name for tag in tags]
+
+
+def test_semver_picks_latest_and_previous_regardless_of_api_order():
+    selector = TagSelector('semver')
+    selector.feed([{'name': 'v1.9.0'}, {'name': 'v1.10.0'}, {'name': 'nightly'},
+                   {'name': 'v1.10.0-rc.1'}])
+
+    assert names(selector.selected) == ['v1.10.0', 'v1.10.0-rc.1']
+
+
+def test_prerelease_is_older_than_release():
+    assert parse_version('2.0.0-rc.2') < parse_version('2.0.0-rc.10') < parse_version('v2.0.0')
+
+
+def test_below_skips_event_tag_and_newer_versions():
+    selector = TagSelector('semver', below='v1.4.3')
+    selector.feed([{'name': 'v2.0.0'}, {'name': 'v1.4.3'}, {'name': 'v1.4.2'}, {'name': 'v1.4.1'}])
+
+    assert names(selector.selected) == ['v1.4.2', 'v1.4.1']
+
+
+def test_below_in_api_order_takes_tags_listed_after_event_tag():
+    selector = TagSelector('api', below='v1.4.3')
+    assert selector.feed([{'name': 'v2.0.0'}, {'name': 'v1.4.3'}])
+    selector.feed([{'name': 'v1.4.2'}, {'name': 'v1.4.1'}, {'name': 'v1.4.0'}])
+
+    assert names(selector.selected) == ['v1.4.2', 'v1.4.1']
+
+
+def test_below_in_date_order_ranks_only_older_tags():
+    def tag(name, day):
+        return {'name': name, 'commit': {'created_at': f'2024-01-{day:02d}T00:00:00Z'}}
+
+    selector = TagSelector('date', presorted=True, below='hotfix')
+    selector.feed([tag('v2.0.0', 20), tag('hotfix', 15), tag('v1.4.2', 10), tag('v1.4.1', 5)])
+
+    assert names(selector.selected) == ['v1.4.2', 'v1.4.1']
+
+
+def test_api_order_stops_after_first_page(mock_api, transport):
+    mock_api.state.tags_per_repo = 350
+
+    tags, pages, truncated = transport.drive(release_tags_steps(
+        f'{mock_api.url}/repos/org/app/tags', {}, None, 'api'))
+
+    # Как GitHub: имена отсортированы строкой, и первым идет не последний тег
+    assert names(tags) == ['v1.0.99', 'v1.0.98']
+    assert (pages, truncated) == (1, False)
+    assert len(transport.sent) == 1
+
+
+def test_presorted_date_order_stops_after_first_page(mock_api, transport):
+    mock_api.state.tags_per_repo = 350
+    project_id = mock_api.state.project_id('grp/app')
+
+    tags, pages, truncated = transport.drive(release_tags_steps(
+        f'{mock_api.url}/api/v4/projects/{project_id}/repository/tags', {},
+        {'order_by': 'updated', 'sort': 'desc'}, 'date', presorted=True))
+
+    assert names(tags) == ['v1.0.349', 'v1.0.348']
+    assert (pages, truncated) == (1, False)
+
+
+def test_semver_order_reads_pages_up_to_limit(mock_api, transport):
+    url = f'{mock_api.url}/repos/org/app/tags'
+    mock_api.state.tags_per_repo = 350
+
+    tags, pages, truncated = transport.drive(release_tags_steps(url, {}, None, 'semver'))
+
+    assert names(tags) == ['v1.0.349', 'v1.0.348']
+    assert (pages, truncated) == (4, False)
+
+    mock_api.state.tags_per_repo = DEFAULT_MAX_TAG_PAGES * 100 + 50
+    transport.sent.clear()
+    _, pages, truncated = transport.drive(release_tags_steps(
+        url, {}, None, 'semver', max_pages=DEFAULT_MAX_TAG_PAGES))
+
+    assert (pages, truncated) == (DEFAULT_MAX_TAG_PAGES, True)
+    assert len(transport.sent) == DEFAULT_MAX_TAG_PAGES
+
+
+def test_gitlab_next_page_header_is_followed(mock_api, transport):
+    mock_api.state.tags_per_repo = 250
+    project_id = mock_api.state.project_id('grp/app')
+
+    # От старых к новым: последний тег - на последней странице, а в ответах нет Link
+    tags, pages, truncated = transport.drive(release_tags_steps(
+        f'{mock_api.url}/api/v4/projects/{project_id}/repository/tags', {},
+        {'sort': 'asc'}, 'semver'))
+
+    assert names(tags) == ['v1.0.249', 'v1.0.248']
+    assert (pages, truncated) == (3, False)
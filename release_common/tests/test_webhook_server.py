@@ -0,0 +1,160 @@
+import hashlib
+import hmac
+import http.client
+import json
+import threading
+import time
+
+import pytest
+
+from release_common.run_results import RepoResult, RepoStatus
+from release_common.webhook_server import (RecentEvents, TagEvent, WebhookAuthError, WebhookServer,
+                                           parse_github_event, parse_gitlab_event)
+
+
+def signed(body: bytes, event: str = 'create', secret: str = 'secret'):
+    digest = hmac.new(secret.encode('utf-8'), body, hashlib.sha256).hexdigest()
+    return {'X-Hub-Signature-256': f'sha256={digest}', 'X-GitHub-Event': event,
+            'X-GitHub-Delivery': 'delivery-1'}
+
+
+@pytest.fixture
+def webhook():
+    """Фабрика запущенных WebhookServer на свободном порту."""
+    started = []
+
+    def make(handle_event):
+        server = WebhookServer(('127.0.0.1', 0), parse_github_event, 'secret', handle_event)
+        thread = threading.Thread(target=server.serve, daemon=True)
+        thread.start()
+        started.append((server, thread))
+        return server
+
+    yield make
+    for server, thread in started:
+        server.shutdown()
+        thread.join()
+
+
+def test_recent_events_rejects_repeated_keys_until_forgotten():
+    recent = RecentEvents()
+
+    assert recent.add(('tag', 'org/app', 'v1.0.0'), ('delivery', '1'))
+    assert not recent.add(('delivery', '1'))
+    recent.forget(('tag', 'org/app', 'v1.0.0'), ('delivery', '1'))
+    assert recent.add(('delivery', '1'))
+
+
+def test_recent_events_expire_after_ttl():
+    recent = RecentEvents(ttl=0.05)
+
+    assert recent.add(('delivery', '1'))
+    time.sleep(0.1)
+    assert recent.add(('delivery', '1'))
+
+
+def test_processed_event_is_deduplicated(webhook):
+    server = webhook(lambda event: RepoResult(event.repo, RepoStatus.CREATED))
+    event = TagEvent('org/app', 'v1.0.0', 'delivery-1')
+
+    assert server.submit(event) == 202
+    server.events.join()
+    assert server.submit(TagEvent('org/app', 'v1.0.0', 'delivery-2')) == 200
+
+
+def test_failed_event_is_processed_again_on_redelivery(webhook):
+    calls = []
+
+    def handle_event(event):
+        calls.append(event)
+        if len(calls) == 1:
+            raise RuntimeError('API недоступен')
+        return RepoResult(event.repo, RepoStatus.CREATED)
+
+    server = webhook(handle_event)
+    event = TagEvent('org/app', 'v1.0.0', 'delivery-1')
+
+    assert server.submit(event) == 202
+    server.events.join()
+    assert server.submit(event) == 202
+    server.events.join()
+    assert len(calls) == 2
+    assert server.stats['failed'] == 1
+
+
+def test_failed_result_is_processed_again_on_redelivery(webhook):
+    server = webhook(lambda event: RepoResult(event.repo).fail('получение тегов: 502'))
+    event = TagEvent('org/app', 'v1.0.0', 'delivery-1')
+
+    assert server.submit(event) == 202
+    server.events.join()
+    assert server.submit(event) == 202
+
+
+def test_parse_github_create_tag_event():
+    body = json.dumps({'ref_type': 'tag', 'ref': 'v1.0.0',
+                       'repository': {'full_name': 'org/app'}}).encode()
+
+    event = parse_github_event(signed(body), body, 'secret')
+
+    assert (event.repo, event.tag, event.delivery_id) == ('org/app', 'v1.0.0', 'delivery-1')
+
+
+def test_parse_github_ignores_branch_push_and_tag_deletion():
+    branch = json.dumps({'ref': 'refs/heads/main', 'repository': {'full_name': 'org/app'}}).encode()
+    deleted = json.dumps({'ref': 'refs/tags/v1.0.0', 'deleted': True,
+                          'repository': {'full_name': 'org/app'}}).encode()
+
+    assert parse_github_event(signed(branch, 'push'), branch, 'secret') is None
+    assert parse_github_event(signed(deleted, 'push'), deleted, 'secret') is None
+
+
+@pytest.mark.parametrize('signature', ['', 'sha256=0', 'sha256=подпись'])
+def test_parse_github_rejects_bad_signature(signature):
+    with pytest.raises(WebhookAuthError):
+        parse_github_event({'X-Hub-Signature-256': signature}, b'{}', 'секрет')
+
+
+@pytest.mark.parametrize('body', [b'[]', b'"v1.0.0"', b'not json', b'\xff'])
+def test_parse_github_rejects_non_object_body(body):
+    with pytest.raises(ValueError):
+        parse_github_event(signed(body), body, 'secret')
+
+
+def test_parse_github_ignores_malformed_fields():
+    body = json.dumps({'ref_type': 'tag', 'ref': ['v1.0.0'], 'repository': 'org/app'}).encode()
+
+    assert parse_github_event(signed(body), body, 'secret') is None
+
+
+def test_parse_gitlab_tag_push_with_non_ascii_token():
+    body = json.dumps({'object_kind': 'tag_push', 'ref': 'refs/tags/v1.0.0', 'after': '1' * 40,
+                       'project': {'path_with_namespace': 'grp/app'}}).encode()
+    # http.server отдает заголовки, декодированные как latin-1
+    token = 'секрет'.encode('utf-8').decode('latin-1')
+
+    event = parse_gitlab_event({'X-Gitlab-Token': token}, body, 'секрет')
+
+    assert (event.repo, event.tag) == ('grp/app', 'v1.0.0')
+    with pytest.raises(WebhookAuthError):
+        parse_gitlab_event({'X-Gitlab-Token': 'токен'}, body, 'secret')
+
+
+def post(server, body: bytes, headers) -> int:
+    connection = http.client.HTTPConnection(*server.server_address, timeout=5)
+    try:
+        connection.request('POST', '/', body=body, headers=headers)
+        return connection.getresponse().status
+    finally:
+        connection.close()
+
+
+def test_http_replies_to_bad_requests(webhook):
+    server = webhook(lambda event: RepoResult(event.repo, RepoStatus.CREATED))
+    body = json.dumps({'ref_type': 'tag', 'ref': 'v1.0.0',
+                       'repository': {'full_name': 'org/app'}}).encode()
+
+    assert post(server, b'[1]', signed(b'[1]')) == 400
+    assert post(server, body, {'X-Hub-Signature-256': 'sha256=подпись'.encode('utf-8')}) == 401
+    assert post(server, body, signed(body)) == 202
+    assert post(server, body, signed(body)) == 200
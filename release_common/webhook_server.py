@@ -0,0 +1,360 @@
+"""
+Прием webhook событий о новых тегах и создание релизов сразу по событию.
+
+Вместо периодического обхода всего списка репозиториев демон слушает
+HTTP и принимает:
+
+- GitHub: события create (ref_type=tag) и push в refs/tags/*, подпись
+  X-Hub-Signature-256 (HMAC-SHA256 тела с секретом webhook);
+- GitLab: Tag Push Hook, токен X-Gitlab-Token.
+
+Принятое событие кладется в ограниченную очередь и сразу получает 202;
+обработчики берут события из очереди и создают релизы через общий
+транспорт с уже прогретыми keep-alive соединениями. Если очередь
+заполнена, демон отвечает 503 с Retry-After, и GitHub/GitLab повторят
+доставку позже. Повторные доставки (тот же ID доставки или тот же тег,
+например create и push для одного тега от GitHub) отбрасываются; если
+обработка события не удалась, оно забывается, и повторная доставка
+обрабатывается заново.
+"""
+
+import hashlib
+import hmac
+import json
+import queue
+import sys
+import threading
+import time
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .parallel_runner import call_captured, routed_stdout
+
+
+DEFAULT_QUEUE_SIZE = 1000
+DEFAULT_PORT = 8080
+# Сколько последних событий помнить для отбрасывания повторов
+DEDUP_SIZE = 10000
+DEDUP_TTL = 3600.0
+# Через сколько секунд повторить доставку, если очередь заполнена
+RETRY_AFTER = 30
+MAX_BODY_BYTES = 25 * 1024 * 1024
+
+ZERO_SHA = '0' * 40
+
+
+class WebhookAuthError(Exception):
+    """Подпись или токен webhook не совпали."""
+
+
+class TagEvent:
+    """Новый тег в репозитории."""
+
+    __slots__ = ('repo', 'tag', 'delivery_id')
+
+    def __init__(self, repo: str, tag: str, delivery_id: Optional[str] = None):
+        self.repo = repo
+        self.tag = tag
+        self.delivery_id = delivery_id
+
+    def __repr__(self) -> str:
+        return f'TagEvent({self.repo}@{self.tag})'
+
+
+def _tag_from_ref(ref) -> Optional[str]:
+    if not isinstance(ref, str) or not ref.startswith('refs/tags/'):
+        return None
+    return ref[len('refs/tags/'):]
+
+
+def _header_bytes(headers, name: str) -> bytes:
+    """
+    Значение заголовка как байты для hmac.compare_digest.
+
+    http.server декодирует заголовки как latin-1, так что обратное
+    кодирование возвращает исходные байты; строки с символами вне
+    latin-1 (заголовки, переданные не из http.server) кодируются в UTF-8.
+    """
+    value = headers.get(name, '')
+    try:
+        return value.encode('latin-1')
+    except UnicodeEncodeError:
+        return value.encode('utf-8')
+
+
+def _json_object(body: bytes) -> Dict:
+    """Тело события как JSON объект; ValueError, если это не JSON объект."""
+    payload = json.loads(body or b'{}')
+    if not isinstance(payload, dict):
+        raise ValueError('тело события не является JSON объектом')
+    return payload
+
+
+def _field(payload: Dict, name: str, key: str):
+    """payload[name][key] или None, если name - не объект."""
+    value = payload.get(name)
+    return value.get(key) if isinstance(value, dict) else None
+
+
+def parse_github_event(headers, body: bytes, secret: str) -> Optional[TagEvent]:
+    """
+    Проверяет подпись и извлекает тег из события GitHub.
+
+    Returns:
+        TagEvent или None, если событие не про новый тег (ping, ветки, удаление)
+
+    Raises:
+        WebhookAuthError: неверная или отсутствующая подпись
+        ValueError: тело не является JSON объектом
+    """
+    digest = hmac.new(secret.encode('utf-8'), body, hashlib.sha256).hexdigest()
+    expected = f'sha256={digest}'.encode('ascii')
+    if not hmac.compare_digest(expected, _header_bytes(headers, 'X-Hub-Signature-256')):
+        raise WebhookAuthError('неверная подпись X-Hub-Signature-256')
+
+    event = headers.get('X-GitHub-Event', '')
+    payload = _json_object(body)
+    repo = _field(payload, 'repository', 'full_name')
+    if event == 'create' and payload.get('ref_type') == 'tag':
+        tag = payload.get('ref')
+    elif event == 'push' and not payload.get('deleted'):
+        tag = _tag_from_ref(payload.get('ref'))
+    else:
+        return None
+    if not isinstance(repo, str) or not isinstance(tag, str) or not repo or not tag:
+        return None
+    return TagEvent(repo, tag, headers.get('X-GitHub-Delivery'))
+
+
+def parse_gitlab_event(headers, body: bytes, secret: str) -> Optional[TagEvent]:
+    """
+    Проверяет токен и извлекает тег из Tag Push Hook GitLab.
+
+    Returns:
+        TagEvent или None, если событие не про новый тег
+
+    Raises:
+        WebhookAuthError: неверный или отсутствующий X-Gitlab-Token
+        ValueError: тело не является JSON объектом
+    """
+    if not hmac.compare_digest(secret.encode('utf-8'), _header_bytes(headers, 'X-Gitlab-Token')):
+        raise WebhookAuthError('неверный X-Gitlab-Token')
+
+    payload = _json_object(body)
+    if payload.get('object_kind') != 'tag_push' or payload.get('after') == ZERO_SHA:
+        # Не тег или удаление тега
+        return None
+    repo = _field(payload, 'project', 'path_with_namespace')
+    tag = _tag_from_ref(payload.get('ref'))
+    if not isinstance(repo, str) or not repo or not tag:
+        return None
+    delivery_id = headers.get('Idempotency-Key') or headers.get('X-Gitlab-Event-UUID')
+    return TagEvent(repo, tag, delivery_id)
+
+
+class RecentEvents:
+    """Ограниченный по размеру и времени набор недавно принятых событий."""
+
+    def __init__(self, size: int = DEDUP_SIZE, ttl: float = DEDUP_TTL):
+        self.size = size
+        self.ttl = ttl
+        self._seen: 'OrderedDict[Tuple, float]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, *keys: Tuple) -> bool:
+        """Запоминает ключи события; False, если любой из них уже был недавно."""
+        now = time.monotonic()
+        with self._lock:
+            while self._seen and (len(self._seen) > self.size
+                                  or next(iter(self._seen.values())) < now - self.ttl):
+                self._seen.popitem(last=False)
+            if any(key in self._seen for key in keys):
+                return False
+            for key in keys:
+                self._seen[key] = now
+            return True
+
+    def forget(self, *keys: Tuple):
+        """Забывает ключи (событие не удалось принять)."""
+        with self._lock:
+            for key in keys:
+                self._seen.pop(key, None)
+
+
+class WebhookServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int],
+                 parse_event: Callable[[Dict, bytes, str], Optional[TagEvent]],
+                 secret: str, handle_event: Callable[[TagEvent], object],
+                 workers: int = 1, queue_size: int = DEFAULT_QUEUE_SIZE,
+                 accept: Optional[Callable[[str], bool]] = None):
+        """
+        Инициализация демона.
+
+        Args:
+            address: (хост, порт) для прослушивания
+            parse_event: parse_github_event или parse_gitlab_event
+            secret: Секрет webhook (GitHub) или токен (GitLab)
+            handle_event: Обработчик события; вызывается в потоке-обработчике.
+                Исключение или результат с failed (RepoResult) - сбой обработки
+            workers: Количество потоков-обработчиков
+            queue_size: Сколько событий может ждать обработки
+            accept: Фильтр репозиториев (None - принимать все)
+        """
+        super().__init__(address, WebhookHandler)
+        self.parse_event = parse_event
+        self.secret = secret
+        self.handle_event = handle_event
+        self.accept = accept
+        self.events: 'queue.Queue[Optional[TagEvent]]' = queue.Queue(maxsize=queue_size)
+        self.recent = RecentEvents()
+        self.stats = {'accepted': 0, 'duplicates': 0, 'rejected': 0, 'ignored': 0,
+                      'overloaded': 0, 'processed': 0, 'failed': 0}
+        self._stats_lock = threading.Lock()
+        self._workers = [threading.Thread(target=self._work, name=f'webhook-worker-{n}', daemon=True)
+                         for n in range(workers)]
+
+    def count(self, name: str):
+        with self._stats_lock:
+            self.stats[name] += 1
+
+    @staticmethod
+    def _dedup_keys(event: TagEvent) -> List[Tuple]:
+        keys = [('tag', event.repo, event.tag)]
+        if event.delivery_id:
+            keys.append(('delivery', event.delivery_id))
+        return keys
+
+    def submit(self, event: TagEvent) -> int:
+        """Ставит событие в очередь; возвращает HTTP статус ответа."""
+        if self.accept is not None and not self.accept(event.repo):
+            self.count('ignored')
+            return 202
+        keys = self._dedup_keys(event)
+        if not self.recent.add(*keys):
+            self.count('duplicates')
+            return 200
+        try:
+            self.events.put_nowait(event)
+        except queue.Full:
+            # Забываем событие, чтобы повторная доставка не считалась дублем
+            self.recent.forget(*keys)
+            self.count('overloaded')
+            return 503
+        self.count('accepted')
+        return 202
+
+    def _work(self):
+        while True:
+            event = self.events.get()
+            if event is None:
+                self.events.task_done()
+                return
+            failed = True
+            try:
+                result, output = call_captured(self.handle_event, event)
+                sys.stdout.write(output)
+                sys.stdout.flush()
+                failed = bool(getattr(result, 'failed', False))
+            except Exception as e:
+                print(f"❌ Ошибка обработки {event}: {e}")
+            finally:
+                if failed:
+                    # Повторная доставка после сбоя не должна считаться дублем
+                    self.recent.forget(*self._dedup_keys(event))
+                    self.count('failed')
+                self.count('processed')
+                self.events.task_done()
+
+    def serve(self):
+        """Принимает события до Ctrl+C, затем дообрабатывает очередь."""
+        with routed_stdout():
+            for worker in self._workers:
+                worker.start()
+            try:
+                self.serve_forever()
+            except KeyboardInterrupt:
+                pass
+            finally:
+                self.server_close()
+                print(f"\n⏹️  Остановка: дообработка {self.events.qsize()} событий в очереди...")
+                for _ in self._workers:
+                    self.events.put(None)
+                for worker in self._workers:
+                    worker.join()
+
+    def report(self) -> str:
+        """Строка для итогов работы."""
+        s = self.stats
+        return (f"Webhook: принято {s['accepted']}, обработано {s['processed']} "
+                f"(с ошибкой {s['failed']}), "
+                f"повторов {s['duplicates']}, отклонено (подпись) {s['rejected']}, "
+                f"пропущено (не тег или не из списка) {s['ignored']}, отказов из-за очереди {s['overloaded']}")
+
+
+class WebhookHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    server: WebhookServer
+
+    def log_message(self, format, *args):
+        pass
+
+    def _reply(self, status: int, message: str, headers: Optional[Dict[str, str]] = None):
+        body = json.dumps({'message': message}, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path.rstrip('/') == '/health':
+            self._reply(200, f'ok, в очереди {self.server.events.qsize()}')
+        else:
+            self._reply(404, 'Not Found')
+
+    def do_POST(self):
+        try:
+            length = int(self.headers.get('Content-Length') or 0)
+        except ValueError:
+            length = -1
+        if length < 0:
+            self.close_connection = True
+            self._reply(400, 'неверный Content-Length')
+            return
+        if length > MAX_BODY_BYTES:
+            self.close_connection = True
+            self._reply(413, 'слишком большое тело запроса')
+            return
+        body = self.rfile.read(length) if length else b''
+
+        try:
+            event = self.server.parse_event(self.headers, body, self.server.secret)
+        except WebhookAuthError as e:
+            self.server.count('rejected')
+            self._reply(401, str(e))
+            return
+        except ValueError:
+            self._reply(400, 'тело не является JSON объектом')
+            return
+        except Exception as e:
+            # Неожиданная структура события не должна обрывать соединение без ответа
+            self._reply(400, f'некорректное событие: {e}')
+            return
+
+        if event is None:
+            self.server.count('ignored')
+            self._reply(202, 'событие не про новый тег, пропущено')
+            return
+
+        status = self.server.submit(event)
+        if status == 503:
+            self._reply(503, 'очередь заполнена', {'Retry-After': str(RETRY_AFTER)})
+        elif status == 200:
+            self._reply(200, 'повторная доставка, пропущено')
+        else:
+            self._reply(202, 'принято')